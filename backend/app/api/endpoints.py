@@ -1,89 +1,210 @@
-from fastapi import APIRouter, HTTPException, Query
-from models.schema import TopicPost, PaperDelete, Paper, Topic, QueryInput
-from db.firebase import db
-from services.search_papers_agent import search_graph_agent
-from services.summarize_papers_agent import summarize_graph_agent
-from services.qna_chatbot_agent import qna_graph_agent
+import json
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from models.schema import TopicPost, PaperPost, PaperDelete, QueryInput
+from db.repository import get_topic_repository
+from services.qna_chatbot_agent import remove_paper_from_index, delete_topic_index, astream_answer, topic_index_is_empty
+from services.agent_registry import agent_registry
+from services.content_cache import get_content_cache
+from services.executors import run_in_pool
+from services.answer_cache import get_answer_cache
+from services.conversation_memory import MEMORY_MAX_MESSAGES, roll_up_history
+from services.job_queue import get_job_queue
+from services.providers import embedding_stats
+from services.telemetry import metrics, span
 from uuid import uuid4
 
 router = APIRouter()
 
+# Handlers are async and never block the event loop: SQLite and vector index calls go to the
+# "light" pool (services.executors) and the Q&A graph is awaited.
 @router.get("/")
-def get_root():
+async def get_root():
     return {"message": "Welcome to ScholarPilot!"}
 
 @router.get("/topics")
-def get_topics():
-    topics = db.collection("topics").get()
-    topics = [topic.to_dict() for topic in topics]
-    return {"topics": [f"{topic["title"]} - {topic["id"]}" for topic in topics]}
-
-@router.post("/topics")
-def initialize_topic(input: TopicPost):
-    scraped_graph = search_graph_agent.compile()
-    initial_state = {
-        "topic": input.topic,
-        "scraped_data": "",
-        "cleaned_data": ""
-    }
-    scraped_state = scraped_graph.invoke(initial_state)
-    summarize_graph = summarize_graph_agent.compile()
-    before_summarize_state = {
-        "topic": scraped_state["topic"],
-        "summarized_data": scraped_state["cleaned_data"]
-    }
-    final_state = summarize_graph.invoke(before_summarize_state)
-    id = uuid4().hex
-    papers = []
-    for paper in final_state["summarized_data"]:
-        paper_id = uuid4().hex
-        authors = list(set(paper.get("compared_authors", []) + paper.get("authors", [])))
-        new_paper = Paper(id=paper_id, title=paper["title"], authors=authors, summary=paper["summary"], topic_id=id, link=paper["link"], year=paper["year"])
-        papers.append(new_paper)
-    topic = Topic(id=id, title=final_state["topic"], papers=papers, qna_history=[])
-    db.collection("topics").document(id).set(topic.dict())
-    saved_topic = db.collection("topics").document(id).get().to_dict()
-    return {"topic": saved_topic}
+async def get_topics(limit: int = Query(100, ge=1, le=1000), cursor: str | None = None):
+    """One page of "title - id" strings from the topic index; pass next_cursor to get the next page."""
+    topics, next_cursor = await get_topic_repository().list_topics(limit, cursor)
+    return {"topics": [f"{topic['title']} - {topic['id']}" for topic in topics], "next_cursor": next_cursor}
 
-@router.post("/topics/{topic_id}/qna")
-def post_qna(topic_id: str, input: QueryInput):
-    topic = db.collection("topics").document(topic_id).get().to_dict()
+@router.get("/topics/lookup")
+async def lookup_topic(title: str):
+    """Find a topic by title, ignoring case and extra whitespace."""
+    topic = await get_topic_repository().find_topic_by_title(title)
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found.")
-    initial_state = {
+    return {"topic": topic}
+
+@router.post("/topics", status_code=202)
+async def initialize_topic(input: TopicPost):
+    """Queue topic creation and return immediately; poll GET /jobs/{job_id} for progress."""
+    topic_id = uuid4().hex
+    # Reserving the title is the duplicate check: it fails if a topic with this title exists
+    # or is still being created.
+    if not await get_topic_repository().reserve_title(input.topic, topic_id):
+        raise HTTPException(status_code=409, detail="Topic already exists.")
+    job_id = await run_in_pool("light", get_job_queue().submit, "create_topic", {"topic": input.topic, "topic_id": topic_id})
+    return {"job_id": job_id, "topic_id": topic_id}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await run_in_pool("light", get_job_queue().get, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return {"job": job}
+
+async def load_qna_state(topic_id: str, query: str) -> dict | None:
+    with span("db.load_qna_state"):
+        return await _load_qna_state(topic_id, query)
+
+async def _load_qna_state(topic_id: str, query: str) -> dict | None:
+    repository = get_topic_repository()
+    topic = await repository.get_topic(topic_id)
+    if not topic:
+        return None
+    # Papers are only needed to build the index for topics that predate per-topic indexes.
+    papers = []
+    if await run_in_pool("light", topic_index_is_empty, topic_id):
+        papers = await repository.list_all_papers(topic_id)
+    return {
+        "topic_id": topic_id,
         "topic": topic["title"],
-        "papers": topic["papers"],
-        "query": input.query,
-        "qna_history": topic["qna_history"]
+        "papers": papers,
+        "query": query,
+        # Only the recent window is sent verbatim; older turns are in the stored summary.
+        "qna_history": await repository.recent_messages(topic_id, MEMORY_MAX_MESSAGES),
+        "history_summary": topic.get("history_summary", "")
     }
-    qna_graph = qna_graph_agent.compile()
-    final_state = qna_graph.invoke(initial_state)
-    # topic["qna_history"].append({"role": "user", "content": input.query})
+
+@router.post("/topics/{topic_id}/qna")
+async def post_qna(topic_id: str, input: QueryInput, background_tasks: BackgroundTasks):
+    initial_state = await load_qna_state(topic_id, input.query)
+    if not initial_state:
+        raise HTTPException(status_code=404, detail="Topic not found.")
+    loaded = len(initial_state["qna_history"])
+    final_state = await agent_registry.qna.ainvoke(initial_state)
     response = final_state["qna_history"][-1]["content"]
-    # topic["qna_history"].append({"role": "assistant", "content": response})
-    db.collection("topics").document(topic_id).set(topic)
+    repository = get_topic_repository()
+    with span("db.append_messages"):
+        await repository.append_messages(topic_id, final_state["qna_history"][loaded:])
+    background_tasks.add_task(roll_up_history, repository, topic_id)
     return {"response": response}
 
+@router.post("/topics/{topic_id}/qna/stream")
+async def stream_qna(topic_id: str, input: QueryInput):
+    """
+    Server-sent events variant of post_qna: a "sources" event with the retrieved paper ids,
+    then "token" events as the model generates, then "done" once the history is saved.
+    """
+    state = await load_qna_state(topic_id, input.query)
+    if not state:
+        raise HTTPException(status_code=404, detail="Topic not found.")
+    loaded = len(state["qna_history"])
+
+    async def events():
+        async for event in astream_answer(state):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        with span("db.append_messages"):
+            await get_topic_repository().append_messages(topic_id, state["qna_history"][loaded:])
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+        background=BackgroundTask(roll_up_history, get_topic_repository(), topic_id)
+    )
+
+async def with_pages(repository, topic_id: str, topic: dict, papers_limit: int = 50, papers_cursor: str | None = None,
+                     messages_limit: int = 50, messages_cursor: str | None = None) -> dict:
+    """Add one page of papers and one page of Q&A history to topic metadata, as GET /topics/{id} returns it."""
+    topic["papers"], topic["papers_cursor"] = await repository.list_papers(topic_id, papers_limit, papers_cursor)
+    topic["qna_history"], topic["messages_cursor"] = await repository.list_messages(topic_id, messages_limit, messages_cursor)
+    return topic
 
 @router.get("/topics/{topic_id}")
-def get_topic(topic_id: str):
-    topic = db.collection("topics").document(topic_id).get().to_dict()
-    # print(topic)
+async def get_topic(
+    topic_id: str,
+    papers_limit: int = Query(50, ge=1, le=200),
+    papers_cursor: str | None = None,
+    messages_limit: int = Query(50, ge=1, le=200),
+    messages_cursor: str | None = None
+):
+    """
+    Return the topic with one page of papers and one page of Q&A history (the latest
+    messages). Pass papers_cursor / messages_cursor from a response to load the next
+    papers or older messages.
+    """
+    repository = get_topic_repository()
+    topic = await repository.get_topic(topic_id)
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found.")
-    return {"topic": topic}
+    return {"topic": await with_pages(repository, topic_id, topic, papers_limit, papers_cursor, messages_limit, messages_cursor)}
+
+@router.delete("/topics/{topic_id}")
+async def delete_topic(topic_id: str):
+    if not await get_topic_repository().delete_topic(topic_id):
+        raise HTTPException(status_code=404, detail="Topic not found.")
+    await run_in_pool("light", delete_topic_index, topic_id)
+    return {"deleted": topic_id}
+
+@router.post("/topics/{topic_id}/papers", status_code=202)
+async def add_papers_to_topic(topic_id: str, input: PaperPost):
+    """
+    Queue adding papers by link and/or by a follow-up search query. Papers already in the
+    topic are skipped; poll GET /jobs/{job_id} for the ones added.
+    """
+    if not input.links and not input.query:
+        raise HTTPException(status_code=400, detail="Provide links or a query.")
+    if not await get_topic_repository().get_topic(topic_id):
+        raise HTTPException(status_code=404, detail="Topic not found.")
+    job_id = await run_in_pool("light", get_job_queue().submit, "add_papers", {"topic_id": topic_id, "links": input.links, "query": input.query})
+    return {"job_id": job_id, "topic_id": topic_id}
+
+@router.post("/topics/{topic_id}/refresh", status_code=202)
+async def refresh_topic(topic_id: str):
+    """Queue a new search for the topic's title and add any papers it finds that the topic lacks."""
+    topic = await get_topic_repository().get_topic(topic_id)
+    if not topic:
+        raise HTTPException(status_code=404, detail="Topic not found.")
+    job_id = await run_in_pool("light", get_job_queue().submit, "add_papers", {"topic_id": topic_id, "links": [], "query": topic["title"]})
+    return {"job_id": job_id, "topic_id": topic_id}
 
 @router.delete("/topics/{topic_id}/papers/{paper_id}")
-def remove_paper_from_topic(topic_id: str, paper_id: str):
-    topic = db.collection("topics").document(topic_id).get().to_dict()
+async def remove_paper_from_topic(topic_id: str, paper_id: str):
+    """Remove a paper and return the topic in the same shape as GET /topics/{topic_id}."""
+    repository = get_topic_repository()
+    topic = await repository.remove_paper(topic_id, paper_id)
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found.")
-    papers = topic["papers"]
-    for paper in papers:
-        if paper["id"] == paper_id:
-            papers.remove(paper)
-            break
-    topic["papers"] = papers
-    db.collection("topics").document(topic_id).set(topic)
-    return {"topic": topic}
-    
+    await run_in_pool("light", remove_paper_from_index, topic_id, paper_id)
+    return {"topic": await with_pages(repository, topic_id, topic)}
+
+def cache_stats() -> dict:
+    return {
+        "content_cache": get_content_cache().stats(),
+        "answer_cache": get_answer_cache().stats(),
+        "embedding_cache": embedding_stats()
+    }
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return await run_in_pool("light", cache_stats)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Span latency histograms, LLM call and token counters and cache hit rates in Prometheus text format."""
+    stats = await run_in_pool("light", cache_stats)
+    caches = {f"content_{layer}": layer_stats for layer, layer_stats in stats["content_cache"].items()}
+    caches["answers"] = stats["answer_cache"]
+    if stats["embedding_cache"]:
+        embedded = stats["embedding_cache"]
+        caches["embeddings"] = {"hits": embedded["cache_hits"], "misses": embedded["texts_embedded"]}
+    return PlainTextResponse(metrics.render_prometheus(caches), media_type="text/plain; version=0.0.4")
+
+@router.get("/metrics/summary")
+async def get_metrics_summary():
+    """Per-span counts, mean and bucketed p50/p95 latencies and LLM usage as JSON."""
+    return metrics.snapshot()
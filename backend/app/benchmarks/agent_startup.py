@@ -0,0 +1,55 @@
+"""
+Measure application startup cost and per-request graph overhead.
+
+Reports the time to import the agent modules, to compile and warm up every graph through
+the registry, and the per-request cost of the old `.compile()` on every request versus
+reusing the registry's compiled graph.
+
+Run from backend/app:  python -m benchmarks.agent_startup --requests 200
+"""
+import argparse
+import time
+
+from benchmarks.common import latency_summary, offline_env, report, timed
+
+offline_env()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    from services.agent_registry import AgentRegistry
+    import_seconds = time.perf_counter() - start
+
+    registry = AgentRegistry()
+    start = time.perf_counter()
+    registry.startup(warm_up=False)
+    compile_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    registry.warm_up()
+    warm_up_seconds = time.perf_counter() - start
+
+    per_request = {}
+    for name, builder in AgentRegistry.builders.items():
+        compile_each, reuse = [], []
+        for _ in range(args.requests):
+            with timed(compile_each):
+                builder.compile()
+            with timed(reuse):
+                registry.graph(name)
+        per_request[name] = {"compile_per_request": latency_summary(compile_each), "registry": latency_summary(reuse)}
+
+    report({
+        "startup": {
+            "import_seconds": round(import_seconds, 3),
+            "compile_seconds": round(compile_seconds, 3),
+            "warm_up_seconds": round(warm_up_seconds, 3)
+        },
+        "per_request_overhead": per_request
+    })
+
+if __name__ == "__main__":
+    main()
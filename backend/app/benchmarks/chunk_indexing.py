@@ -0,0 +1,50 @@
+"""
+Chunked full-text indexing throughput and chunk-level retrieval latency per topic size.
+
+For each topic size, indexes synthetic papers with --text-chars characters of full text,
+reports chunks embedded per second, then runs --queries retrievals through the
+parent-deduplicating retriever used by Q&A.
+
+Run from backend/app:  python -m benchmarks.chunk_indexing --sizes 10 100 1000
+"""
+import argparse
+import time
+
+from benchmarks.common import latency_summary, offline_env, report, synthetic_papers, temp_path, timed
+
+offline_env(ANSWER_CACHE="false", CHROMA_PERSIST_DIR=temp_path("chunk-bench-"))
+
+from services import qna_chatbot_agent as qna
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--text-chars", type=int, default=8000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        topic_id = f"chunks{size}"
+        papers = synthetic_papers(size, full_text_chars=args.text_chars)
+        start = time.perf_counter()
+        chunks = qna.index_topic_papers(topic_id, papers)
+        seconds = time.perf_counter() - start
+
+        retriever = qna.build_retriever(topic_id, qna.get_topic_vectorstore(topic_id), mode="dense")
+        latencies = []
+        for i in range(args.queries):
+            with timed(latencies):
+                retriever.invoke(f"How does component C{i % 13} of method M{i % size} behave?")
+        results.append({
+            "papers": size,
+            "chunks": chunks,
+            "index_seconds": round(seconds, 2),
+            "chunks_per_second": round(chunks / seconds, 1),
+            "retrieval": latency_summary(latencies)
+        })
+        qna.delete_topic_index(topic_id)
+    report(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import json
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+def offline_env(**values: str) -> None:
+    """Default the settings for an offline run (a placeholder Groq key plus values); variables already set win."""
+    for name, value in {"GROQ_API_KEY": "benchmark", **values}.items():
+        os.environ.setdefault(name, value)
+
+def temp_path(prefix: str, name: str = "") -> str:
+    """A fresh temporary directory, or the path of name inside it."""
+    directory = tempfile.mkdtemp(prefix=prefix)
+    return os.path.join(directory, name) if name else directory
+
+def report(results, output: str | None = None) -> None:
+    """Print the results as JSON, and also write them to output if given."""
+    text = json.dumps(results, indent=2)
+    if output:
+        with open(output, "w") as file:
+            file.write(text)
+    print(text)
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def latency_summary(latencies: list[float]) -> dict:
+    """Summarize latencies (in seconds) as milliseconds."""
+    return {
+        "count": len(latencies),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2)
+    }
+
+@contextmanager
+def timed(latencies: list[float]):
+    start = time.perf_counter()
+    yield
+    latencies.append(time.perf_counter() - start)
+
+def synthetic_full_text(i: int, topic: str, chars: int) -> str:
+    sentences = [
+        f"Section {n}: we analyse component C{(i + n) % 13} of method M{i} for {topic} "
+        f"and measure its effect on dataset D{(i * n) % 7} with ablation A{n % 5}."
+        for n in range(chars // 120 + 1)
+    ]
+    return " ".join(sentences)[:chars]
+
+def synthetic_papers(count: int, topic: str = "benchmark topic", full_text_chars: int = 0) -> list[dict]:
+    return [
+        {
+            "id": f"paper{i}",
+            "title": f"Paper {i} on {topic}",
+            "authors": [f"Author {i}", f"Author {i + 1}"],
+            "summary": (
+                f"This paper studies aspect {i} of {topic}. It proposes method M{i}, evaluates it "
+                f"on dataset D{i % 7} and reports improvements over prior baselines."
+            ),
+            "link": f"https://example.com/paper{i}",
+            "year": 2000 + i % 25,
+            "full_text": synthetic_full_text(i, topic, full_text_chars)
+        }
+        for i in range(count)
+    ]
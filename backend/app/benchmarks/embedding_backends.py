@@ -0,0 +1,104 @@
+"""
+Embedding throughput and latency: sentence-transformers on torch versus onnxruntime (fp32 and
+int8), and the shared EmbeddingService's micro-batching and cache.
+
+1. Encodes --texts synthetic chunks with each backend at every --batch-sizes, reporting
+   texts/s and per-batch latency, plus the mean cosine similarity of each ONNX variant's
+   vectors to torch's.
+2. Runs --concurrency threads that each embed single queries through EmbeddingService, once
+   with batch size 1 (one encoder call per text) and once with micro-batching.
+3. Embeds the corpus twice through the service to show the text-hash cache.
+
+The ONNX model is exported to EMBEDDING_ONNX_DIR on first run (this needs torch once).
+
+Run from backend/app:  python -m benchmarks.embedding_backends --batch-sizes 1 8 32 64
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import latency_summary, report, synthetic_full_text, timed
+from services.embedding_service import EMBEDDING_BATCH_SIZE, EmbeddingService, OnnxEncoder, TorchEncoder
+from services.providers import EMBEDDING_MODEL_NAME
+
+def corpus(count: int) -> list[str]:
+    return [synthetic_full_text(i, "retrieval", 600) for i in range(count)]
+
+def backend_rows(encoder, texts: list[str], batch_sizes: list[int]) -> tuple[list[dict], list[list[float]]]:
+    encoder.encode(texts[:8])
+    rows, vectors = [], []
+    for batch_size in batch_sizes:
+        latencies, vectors = [], []
+        start = time.perf_counter()
+        for offset in range(0, len(texts), batch_size):
+            with timed(latencies):
+                vectors += encoder.encode(texts[offset:offset + batch_size])
+        seconds = time.perf_counter() - start
+        rows.append({"batch_size": batch_size, "texts_per_second": round(len(texts) / seconds, 1), "batch_latency": latency_summary(latencies)})
+    return rows, vectors
+
+def mean_cosine(a: list[list[float]], b: list[list[float]]) -> float:
+    import numpy as np
+    a, b = np.asarray(a), np.asarray(b)
+    cosines = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    return round(float(cosines.mean()), 4)
+
+def concurrent_queries(service: EmbeddingService, texts: list[str], concurrency: int) -> dict:
+    latencies = []
+
+    def embed(text: str) -> None:
+        with timed(latencies):
+            service.embed_query(text)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(embed, texts))
+    seconds = time.perf_counter() - start
+    return {"queries_per_second": round(len(texts) / seconds, 1), "latency": latency_summary(latencies), **service.stats()}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--service-backend", choices=["torch", "onnx-int8"], default="onnx-int8")
+    args = parser.parse_args()
+
+    texts = corpus(args.texts)
+    encoders = {
+        "torch": TorchEncoder(EMBEDDING_MODEL_NAME),
+        "onnx-fp32": OnnxEncoder(EMBEDDING_MODEL_NAME, quantize="none"),
+        "onnx-int8": OnnxEncoder(EMBEDDING_MODEL_NAME, quantize="int8")
+    }
+    backends, vectors = {}, {}
+    for name, encoder in encoders.items():
+        backends[name], vectors[name] = backend_rows(encoder, texts, args.batch_sizes)
+    agreement = {name: mean_cosine(vectors["torch"], vectors[name]) for name in ("onnx-fp32", "onnx-int8")}
+
+    encoder = encoders[args.service_backend]
+    queries = [f"query {i}: {text[:200]}" for i, text in enumerate(texts)]
+    micro_batching = {
+        "unbatched": concurrent_queries(EmbeddingService(encoder, batch_size=1), queries, args.concurrency),
+        "batched": concurrent_queries(EmbeddingService(encoder, batch_size=EMBEDDING_BATCH_SIZE), queries, args.concurrency)
+    }
+
+    service = EmbeddingService(encoder)
+    cache = {}
+    for run in ("cold", "warm"):
+        start = time.perf_counter()
+        service.embed_documents(texts)
+        cache[run] = {"seconds": round(time.perf_counter() - start, 4), **service.stats()}
+
+    report({
+        "model": EMBEDDING_MODEL_NAME,
+        "texts": len(texts),
+        "backends": backends,
+        "cosine_to_torch": agreement,
+        "service_backend": args.service_backend,
+        "concurrency": args.concurrency,
+        "micro_batching": micro_batching,
+        "cache": cache
+    })
+
+if __name__ == "__main__":
+    main()
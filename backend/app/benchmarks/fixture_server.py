@@ -0,0 +1,117 @@
+"""
+Local HTTP server standing in for Google Scholar and publisher sites.
+
+GET /scholar?q=<query> returns a Scholar-style results page with --papers results whose
+links point back at this server: /papers/<key>.html (a publisher page with citation meta
+tags and Abstract/Conclusion sections) or /papers/<key>.pdf (a generated PDF). Every query
+gets its own deterministic set of papers with distinct text, so content and summary caches
+only hit when a run really repeats work.
+"""
+import hashlib
+import threading
+import time
+from functools import lru_cache
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.pdf_fixtures import make_pdf, paper_pages
+
+def paper_key(query: str, index: int) -> str:
+    return f"{hashlib.sha1(query.encode('utf-8')).hexdigest()[:10]}-{index}"
+
+def paper_number(key: str) -> int:
+    digest, index = key.rsplit("-", 1)
+    return int(digest, 16) % 100000 * 100 + int(index)
+
+def paragraph(number: int, section: str, sentences: int = 6) -> str:
+    return " ".join(
+        f"In {section.lower()} {n}, method M{number} improves metric K{(number + n) % 11} on corpus C{n % 7} "
+        f"by {(number * n) % 13}.{n % 10} points over the baseline."
+        for n in range(sentences)
+    )
+
+@lru_cache(maxsize=4096)
+def html_page(key: str) -> bytes:
+    number = paper_number(key)
+    title = f"Method M{number} for benchmark retrieval"
+    sections = "".join(
+        f"<section><h2>{name}</h2>" + "".join(f"<p>{paragraph(number, name)}</p>" for _ in range(6)) + "</section>"
+        for name in ("1 Introduction", "2 Method", "3 Experiments", "4 Discussion")
+    )
+    return (
+        f"<!DOCTYPE html><html><head><title>{title}</title>"
+        f"<meta name='citation_title' content='{title}'>"
+        f"<meta name='citation_abstract' content='{paragraph(number, 'Abstract')}'></head><body>"
+        "<nav><a href='#abstract'>Abstract</a><a href='#conclusion'>Conclusion</a></nav>"
+        f"<article><h1>{title}</h1><h2>Abstract</h2><p>{paragraph(number, 'Abstract')}</p>{sections}"
+        f"<h2>5 Conclusion</h2><p>{paragraph(number, 'Conclusion')}</p>"
+        "<h2>References</h2><ol>" + "".join(f"<li>Reference {n} for M{number}.</li>" for n in range(40)) + "</ol>"
+        "</article></body></html>"
+    ).encode("utf-8")
+
+@lru_cache(maxsize=4096)
+def pdf_page(key: str, pages: int) -> bytes:
+    return make_pdf(paper_pages(paper_number(key), pages))
+
+def scholar_page(query: str, papers: int, pdf_ratio: float, base_url: str) -> bytes:
+    results = []
+    for i in range(papers):
+        key = paper_key(query, i)
+        number = paper_number(key)
+        # Spread PDFs evenly: result i is a PDF when the running share falls below pdf_ratio.
+        extension = "pdf" if int((i + 1) * pdf_ratio) > int(i * pdf_ratio) else "html"
+        results.append(
+            "<div class='gs_r gs_or gs_scl'><div class='gs_ri'>"
+            f"<h3 class='gs_rt'><a href='{base_url}/papers/{key}.{extension}'>Method M{number} for {escape(query)}</a></h3>"
+            f"<div class='gs_a'>A Author{number}, B Author{number + 1} - Journal of Benchmarks, {2000 + number % 25} - localhost</div>"
+            f"<div class='gs_rs'>{paragraph(number, 'Snippet', 2)}</div>"
+            "</div></div>"
+        )
+    return f"<html><body><div id='gs_res_ccl_mid'>{''.join(results)}</div></body></html>".encode("utf-8")
+
+class FixtureServer:
+    def __init__(self, papers: int = 10, pdf_ratio: float = 0.3, pdf_pages: int = 12, latency: float = 0.0):
+        self.papers = papers
+        self.pdf_ratio = pdf_ratio
+        self.pdf_pages = pdf_pages
+        self.latency = latency
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                time.sleep(server.latency)
+                url = urlparse(self.path)
+                if url.path == "/scholar":
+                    query = parse_qs(url.query).get("q", [""])[0]
+                    body, content_type = scholar_page(query, server.papers, server.pdf_ratio, server.url), "text/html; charset=utf-8"
+                elif url.path.startswith("/papers/") and url.path.endswith(".html"):
+                    body, content_type = html_page(url.path[len("/papers/"):-len(".html")]), "text/html; charset=utf-8"
+                elif url.path.startswith("/papers/") and url.path.endswith(".pdf"):
+                    body, content_type = pdf_page(url.path[len("/papers/"):-len(".pdf")], server.pdf_pages), "application/pdf"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
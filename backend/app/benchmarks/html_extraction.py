@@ -0,0 +1,56 @@
+"""
+HTML extraction throughput over the saved publisher pages in benchmarks/fixtures/html.
+
+Compares the previous path (BeautifulSoup get_text, then a keyword search for "abstract" and
+"conclusion" over the flat text) with the lxml section extractor reading the whole page and
+stopping once the abstract and conclusion are complete. Reports pages/s, MB/s and, per page,
+whether the summarizer input contains the abstract and the conclusion.
+
+Run from backend/app:  python -m benchmarks.html_extraction --repeats 50
+"""
+import argparse
+import time
+from pathlib import Path
+
+from benchmarks.common import report
+from services.html_extractor import extract_html_sections
+from services.summarize_papers_agent import extract_relevant_sections, sections_content
+
+FIXTURES = Path(__file__).parent / "fixtures" / "html"
+
+def soup_content(body: bytes) -> str:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(body, "html.parser")
+    for tag in soup.find_all(["header", "footer", "nav", "script", "style"]):
+        tag.decompose()
+    return extract_relevant_sections(soup.get_text(separator="\n"))
+
+def lxml_content(full_text: bool):
+    return lambda body: sections_content(extract_html_sections(body, full_text=full_text).to_dict())
+
+def sections_found(content: str) -> dict:
+    return {"abstract": "abstract" in content.lower(), "conclusion": "conclusion" in content.lower()}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    pages = {path.name: path.read_bytes() for path in sorted(FIXTURES.glob("*.html"))}
+    total_bytes = sum(len(body) for body in pages.values())
+    methods = {"bs4_flat_text": soup_content, "lxml_full": lxml_content(True), "lxml_early_stop": lxml_content(False)}
+    rows = {}
+    for name, extract in methods.items():
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            contents = {page: extract(body) for page, body in pages.items()}
+        seconds = time.perf_counter() - start
+        rows[name] = {
+            "pages_per_second": round(args.repeats * len(pages) / seconds, 1),
+            "mb_per_second": round(args.repeats * total_bytes / seconds / 1e6, 2),
+            "pages": {page: sections_found(content) for page, content in contents.items()}
+        }
+    report({"pages": len(pages), "bytes": total_bytes, "repeats": args.repeats, "methods": rows})
+
+if __name__ == "__main__":
+    main()
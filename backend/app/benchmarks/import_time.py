@@ -0,0 +1,109 @@
+"""
+Import-time regression check and cold-start measurement for the backend.
+
+1. Runs `python -X importtime -c "import main"` and fails if any heavy module (torch,
+   sentence-transformers, chromadb, langchain, BeautifulSoup, Firebase, ...) is imported
+   eagerly, or if the total import time exceeds --budget-ms.
+2. Starts the app in a fresh interpreter with WARM_UP_ON_STARTUP=false and reports the
+   wall time from process start to the first successful GET /api/ response.
+
+Run from backend/app:  python -m benchmarks.import_time --budget-ms 1500
+Exits non-zero on a regression, so it can run in CI.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import report
+
+FORBIDDEN_PREFIXES = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "chromadb",
+    "langchain_chroma",
+    "langchain_huggingface",
+    "langchain_community",
+    "langchain_groq",
+    "langchain.",
+    "bs4",
+    "pypdf",
+    "firebase_admin",
+    "google.cloud.firestore"
+)
+
+COLD_START_SCRIPT = """
+import time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+import main
+imported = time.perf_counter()
+with TestClient(main.app) as client:
+    response = client.get("/api/")
+    assert response.status_code == 200, response.text
+    first_response = time.perf_counter()
+print(f"{imported - start} {first_response - start}")
+"""
+
+def app_env() -> dict:
+    workdir = tempfile.mkdtemp(prefix="import-time-")
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    env["WARM_UP_ON_STARTUP"] = "false"
+    env["JOB_QUEUE_PATH"] = os.path.join(workdir, "jobs.sqlite3")
+    env["CONTENT_CACHE_PATH"] = os.path.join(workdir, "cache.sqlite3")
+    return env
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """Map module name -> cumulative import time in microseconds."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        modules[name] = int(cumulative)
+    return modules
+
+def check_imports(budget_ms: float) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, env=app_env()
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import main failed:\n{result.stderr[-2000:]}")
+    modules = parse_importtime(result.stderr)
+    forbidden = sorted(
+        name for name in modules
+        if any(name == prefix.rstrip(".") or name.startswith(prefix if prefix.endswith(".") else prefix + ".") for prefix in FORBIDDEN_PREFIXES)
+    )
+    top_level = {name: us for name, us in modules.items() if name == "main"}
+    total_ms = top_level.get("main", 0) / 1000
+    return {
+        "total_import_ms": round(total_ms, 1),
+        "budget_ms": budget_ms,
+        "forbidden_modules": forbidden,
+        "slowest": sorted(((name, round(us / 1000, 1)) for name, us in modules.items()), key=lambda item: -item[1])[:10]
+    }
+
+def measure_cold_start() -> dict:
+    result = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT], capture_output=True, text=True, env=app_env())
+    if result.returncode != 0:
+        raise SystemExit(f"cold start failed:\n{result.stderr[-2000:]}")
+    imported, first_response = (float(value) for value in result.stdout.split()[-2:])
+    return {"import_seconds": round(imported, 3), "first_get_api_seconds": round(first_response, 3)}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    args = parser.parse_args()
+
+    results = {"imports": check_imports(args.budget_ms), "cold_start": measure_cold_start()}
+    report(results)
+    imports = results["imports"]
+    if imports["forbidden_modules"] or imports["total_import_ms"] > args.budget_ms:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Latency of the interactive routes while topic creation runs in the background.
+
+Uses the same offline setup as benchmarks.pipeline_e2e (fixture server, FakeChatModel,
+in-memory topics, temporary caches). One seed topic is created first, then topic listing
+and Q&A are measured twice at --concurrency: once with the app otherwise idle ("idle") and
+once while --background topic creations are queued and running ("loaded"). Because blocking
+work runs on the sized pools in services.executors rather than on the event loop, the
+loaded latencies should stay close to the idle ones.
+
+Run from backend/app:
+  python -m benchmarks.load_mix --background 8 --concurrency 8 --embeddings fake
+"""
+import argparse
+import asyncio
+import os
+
+from benchmarks.common import report
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.pipeline_e2e import BENCHMARK_ENV, free_port, run_phase, start_app
+
+async def wait_for_job(client, job_id: str, poll_interval: float) -> None:
+    while True:
+        job = (await client.get(f"/api/jobs/{job_id}")).json()["job"]
+        if job["status"] == "succeeded":
+            return
+        if job["status"] == "failed":
+            raise RuntimeError(job["error"])
+        await asyncio.sleep(poll_interval)
+
+async def drive(base_url: str, args) -> dict:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        async def create(name: str) -> str:
+            response = await client.post("/api/topics", json={"topic": name})
+            response.raise_for_status()
+            submitted = response.json()
+            await wait_for_job(client, submitted["job_id"], args.poll_interval)
+            return submitted["topic_id"]
+
+        seed_topic = await create(f"load mix seed {args.seed}")
+
+        async def list_topics() -> None:
+            (await client.get("/api/topics", params={"limit": 100})).raise_for_status()
+
+        async def ask(tag: str) -> None:
+            query = f"What does method M{tag} improve over the baseline, and on which corpus?"
+            (await client.post(f"/api/topics/{seed_topic}/qna", json={"query": query})).raise_for_status()
+
+        async def measure(label: str) -> dict:
+            return {
+                "list": await run_phase([list_topics] * args.list_requests, args.concurrency),
+                # Distinct questions per phase, so the answer cache never serves one phase from the other.
+                "qna": await run_phase([lambda i=i: ask(f"{label}-{i}") for i in range(args.questions)], args.concurrency)
+            }
+
+        results = {"idle": await measure("idle")}
+        background = asyncio.gather(
+            *(create(f"load mix background {args.seed}-{i}") for i in range(args.background)),
+            return_exceptions=True
+        )
+        # Let the jobs get past submission and into scraping and summarizing.
+        await asyncio.sleep(args.warmup)
+        results["loaded"] = await measure("loaded")
+        created = await background
+        results["background_topics"] = {
+            "created": sum(1 for result in created if isinstance(result, str)),
+            "errors": [repr(result) for result in created if isinstance(result, Exception)][:3]
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--background", type=int, default=8, help="Topic creations running while the load phase is measured")
+    parser.add_argument("--papers", type=int, default=10, help="Papers per topic (search results)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--list-requests", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--fetch-latency", type=float, default=0.02)
+    parser.add_argument("--pdf-ratio", type=float, default=0.3)
+    parser.add_argument("--pdf-pages", type=int, default=12)
+    parser.add_argument("--embeddings", choices=["model", "fake"], default="model")
+    parser.add_argument("--warmup", type=float, default=0.5, help="Seconds between queueing the background topics and measuring")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--seed", default="run")
+    parser.add_argument("--output", help="Write the results JSON to this file")
+    args = parser.parse_args()
+
+    with FixtureServer(papers=args.papers, pdf_ratio=args.pdf_ratio, pdf_pages=args.pdf_pages, latency=args.fetch_latency) as fixtures:
+        for name, value in BENCHMARK_ENV.items():
+            os.environ.setdefault(name, value)
+        os.environ["SCHOLAR_URL"] = f"{fixtures.url}/scholar"
+        os.environ["SEARCH_RESULTS"] = str(args.papers)
+        os.environ.setdefault("JOB_WORKERS", str(args.background))
+
+        from main import app
+        from services.fake_chat_model import FakeChatModel
+        from services.providers import set_embedding_model, set_llm
+
+        set_llm(FakeChatModel(latency=args.llm_latency))
+        if args.embeddings == "fake":
+            from langchain_core.embeddings import DeterministicFakeEmbedding
+            set_embedding_model(DeterministicFakeEmbedding(size=384))
+
+        server, thread = start_app(app, free_port())
+        try:
+            results = asyncio.run(drive(f"http://127.0.0.1:{server.config.port}", args))
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    results["slowdown"] = {
+        operation: {
+            metric: round(results["loaded"][operation][metric] / results["idle"][operation][metric], 2)
+            for metric in ("p50_ms", "p95_ms", "p99_ms")
+            if results["idle"][operation].get(metric)
+        }
+        for operation in ("list", "qna")
+    }
+    results["config"] = {key: value for key, value in vars(args).items() if key != "output"}
+    report(results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Prompt size per Q&A turn with full-history memory versus token-budgeted memory.
+
+Simulates a conversation of --turns question/answer pairs on an in-memory topic. After each
+turn the budgeted memory rolls older turns into the stored summary (using the offline
+FakeChatModel), as the Q&A endpoints do. Reports tiktoken-measured prompt tokens for the
+memory part of the prompt at several points in the conversation, and the number of
+summary calls made.
+
+Run from backend/app:  python -m benchmarks.memory_prompt_size --turns 100
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import offline_env, report
+
+offline_env(TOPIC_STORE="memory")
+
+from db.repository import get_topic_repository
+from services import conversation_memory as memory
+from services.fake_chat_model import FakeChatModel
+from services.providers import set_llm
+
+def turn(i: int, answer_words: int) -> list[dict]:
+    return [
+        {"role": "user", "content": f"Question {i}: how does method M{i} compare with the baseline on dataset D{i % 7}?"},
+        {"role": "assistant", "content": " ".join(f"finding{i}-{n}" for n in range(answer_words))}
+    ]
+
+def prompt_tokens(messages) -> int:
+    return sum(memory.count_tokens(message.content) + memory.MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+async def run(turns: int, answer_words: int) -> list[dict]:
+    repository = get_topic_repository()
+    await repository.create_topic({"id": "memory", "title": "benchmark topic", "papers": [], "qna_history": []})
+    full_history, rows = [], []
+    checkpoints = {1, 5, 10, 25, 50, 100, 250, 500, turns}
+    for i in range(1, turns + 1):
+        exchange = turn(i, answer_words)
+        full_history.extend(exchange)
+        await repository.append_messages("memory", exchange)
+        rolled_up = await memory.roll_up_history(repository, "memory")
+        if i in checkpoints:
+            topic = await repository.get_topic("memory")
+            recent = await repository.recent_messages("memory", memory.MEMORY_MAX_MESSAGES)
+            rows.append({
+                "turn": i,
+                "full_history_tokens": sum(memory.message_tokens(message) for message in full_history),
+                "budgeted_tokens": prompt_tokens(memory.memory_messages(topic.get("history_summary", ""), recent)),
+                "rolled_up": rolled_up
+            })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--answer-words", type=int, default=120)
+    args = parser.parse_args()
+
+    model = FakeChatModel(latency=0)
+    set_llm(model)
+    rows = asyncio.run(run(args.turns, args.answer_words))
+    report({
+        "token_budget": memory.MEMORY_TOKEN_BUDGET,
+        "summary_max_tokens": memory.SUMMARY_MAX_TOKENS,
+        "summary_calls": model.calls,
+        "turns": rows
+    })
+
+if __name__ == "__main__":
+    main()
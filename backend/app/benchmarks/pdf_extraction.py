@@ -0,0 +1,104 @@
+"""
+PDF extraction over a corpus of generated local PDF fixtures.
+
+Per page count, compares reading every page (what PyPDFLoader did, after downloading the
+file a second time), full text capped at PDF_MAX_PAGES, and targeted extraction that stops
+once the abstract and conclusion pages are found. Then parses --concurrent PDFs at once in a
+worker thread versus the process pool and reports the event loop's worst stall while they run.
+
+Run from backend/app:  python -m benchmarks.pdf_extraction --pages 10 50 200 --concurrent 8
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+
+from benchmarks.common import report
+from benchmarks.pdf_fixtures import write_corpus
+from services import pdf_extractor
+
+def time_extraction(body: bytes, repeats: int, **kwargs) -> tuple[float, str]:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        text = pdf_extractor.extract_pdf_text(body, **kwargs)
+    return (time.perf_counter() - start) / repeats, text
+
+def found(text: str) -> bool:
+    return bool(pdf_extractor.ABSTRACT_PATTERN.search(text) and pdf_extractor.CONCLUSION_PATTERN.search(text))
+
+async def max_loop_stall(work) -> tuple[float, float]:
+    """Run work() while a ticker measures the longest delay of a 5 ms sleep; returns (seconds, stall)."""
+    stall, done = 0.0, False
+
+    async def ticker():
+        nonlocal stall
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            stall = max(stall, time.perf_counter() - start - 0.005)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await work()
+    seconds = time.perf_counter() - start
+    done = True
+    await task
+    return seconds, stall
+
+async def concurrency(bodies: list[bytes]) -> dict:
+    async def in_thread():
+        await asyncio.gather(*(asyncio.to_thread(pdf_extractor.extract_pdf_text, body) for body in bodies))
+
+    async def in_loop():
+        for body in bodies:
+            pdf_extractor.extract_pdf_text(body)
+
+    async def in_pool():
+        await asyncio.gather(*(pdf_extractor.aextract_pdf_text(body) for body in bodies))
+
+    await in_pool()  # start the worker processes before timing
+    results = {}
+    for name, work in (("event_loop", in_loop), ("thread", in_thread), ("process_pool", in_pool)):
+        seconds, stall = await max_loop_stall(work)
+        results[name] = {"seconds": round(seconds, 3), "max_loop_stall_ms": round(stall * 1000, 1)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--concurrent", type=int, default=8)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="pdf-bench-")
+    rows = []
+    for path, page_count in zip(write_corpus(directory, args.pages), args.pages):
+        with open(path, "rb") as f:
+            body = f.read()
+        row = {"pages": page_count, "bytes": len(body)}
+        for mode, kwargs in (
+            ("all_pages", {"max_pages": page_count, "full_text": True}),
+            ("full_capped", {"max_pages": pdf_extractor.PDF_MAX_PAGES, "full_text": True}),
+            ("targeted", {"full_text": False})
+        ):
+            seconds, text = time_extraction(body, args.repeats, **kwargs)
+            row[mode] = {"ms": round(seconds * 1000, 1), "chars": len(text), "abstract_and_conclusion": found(text)}
+        rows.append(row)
+
+    corpus = write_corpus(directory, [max(args.pages)], copies=args.concurrent)
+    bodies = []
+    for path in corpus:
+        with open(path, "rb") as f:
+            bodies.append(f.read())
+    concurrent = asyncio.run(concurrency(bodies))
+    pdf_extractor.shutdown_pdf_executor()
+    report({
+        "max_pages": pdf_extractor.PDF_MAX_PAGES,
+        "workers": pdf_extractor.PDF_WORKERS,
+        "extraction": rows,
+        "concurrent": {"pdfs": len(bodies), "pages_each": max(args.pages), **concurrent}
+    })
+
+if __name__ == "__main__":
+    main()
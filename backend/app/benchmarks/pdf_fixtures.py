@@ -0,0 +1,59 @@
+"""
+Generates paper-like PDF fixtures: a title page with an abstract, body pages, a conclusion
+near the end and reference pages, so extraction can be benchmarked without downloads.
+"""
+import os
+
+def escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages: list[list[str]]) -> bytes:
+    """Minimal PDF with one Helvetica text stream per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        stream = "BT /F1 9 Tf 11 TL 50 770 Td " + " ".join(f"({escape(line)}) Tj T*" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode("latin-1"))
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {len(objects)} 0 R >>".encode("latin-1")
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode("latin-1")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += b"".join(f"{offset:010d} 00000 n \n".encode("latin-1") for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+def body_lines(page: int, count: int = 60) -> list[str]:
+    return [
+        f"Section {page}.{n}: the proposed interface was evaluated with participant group G{n % 9} under condition "
+        f"C{(page + n) % 5}, and crossing onset improved by {n % 7}.{page % 10} percent."
+        for n in range(count)
+    ]
+
+def paper_pages(index: int, page_count: int) -> list[list[str]]:
+    references = min(4, max(1, page_count // 15))
+    pages = [[f"Paper {index}: External interfaces for automated vehicles", "Abstract"] + body_lines(0, 20)]
+    pages += [body_lines(page) for page in range(1, page_count - references - 1)]
+    pages.append(["Conclusion"] + body_lines(page_count, 30))
+    pages += [[f"[{n}] Reference {n} for paper {index}." for n in range(page * 50, page * 50 + 50)] for page in range(references)]
+    return pages[:page_count]
+
+def write_corpus(directory: str, page_counts: list[int], copies: int = 1) -> list[str]:
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for page_count in page_counts:
+        for copy in range(copies):
+            path = os.path.join(directory, f"paper-{page_count}p-{copy}.pdf")
+            with open(path, "wb") as f:
+                f.write(make_pdf(paper_pages(copy, page_count)))
+            paths.append(path)
+    return paths
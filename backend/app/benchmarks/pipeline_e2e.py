@@ -0,0 +1,225 @@
+"""
+Offline end-to-end benchmark of the API: topic creation, topic listing, Q&A and paper removal.
+
+Everything external is replaced by a local stand-in: Scholar and publisher pages come from
+benchmarks.fixture_server, the chat model is FakeChatModel with --llm-latency, topics are kept
+in the in-memory repository, and caches, Chroma and the job queue live in a temporary
+directory. The app runs under uvicorn in this process and is driven over HTTP:
+
+  create  POST /api/topics, then poll GET /api/jobs/{id} until the job finishes (--topics)
+  list    GET /api/topics (--list-requests)
+  qna     POST /api/topics/{id}/qna, round-robin over the created topics (--questions)
+  remove  DELETE /api/topics/{id}/papers/{paper_id} (--removals)
+
+Each phase runs at --concurrency. Results are written as JSON (--output): per operation the
+count, errors, throughput and p50/p95/p99 latency, plus peak RSS and the per-span timings
+from services.telemetry. With --compare, the run is compared to an earlier results file and
+the script exits non-zero if throughput or latency regressed by more than --threshold.
+
+--embeddings fake swaps the embedding model for a deterministic hashing stand-in so the run
+needs no model download; "model" (the default) uses the configured embedding model.
+
+Run from backend/app:
+  python -m benchmarks.pipeline_e2e --topics 4 --papers 10 --concurrency 4 --output base.json
+  python -m benchmarks.pipeline_e2e --topics 4 --papers 10 --concurrency 4 --compare base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import latency_summary, report
+from benchmarks.fixture_server import FixtureServer
+
+WORK_DIR = tempfile.mkdtemp(prefix="e2e-bench-")
+BENCHMARK_ENV = {
+    "GROQ_API_KEY": "benchmark",
+    "TOPIC_STORE": "memory",
+    "ANSWER_CACHE": "false",
+    "SEARCH_PROVIDERS": "scholar",
+    "SEARCH_LLM_FALLBACK": "false",
+    "HOST_MIN_INTERVAL": "0",
+    "MAX_FETCHES_PER_HOST": "8",
+    "CHROMA_PERSIST_DIR": os.path.join(WORK_DIR, "chroma"),
+    "CONTENT_CACHE_PATH": os.path.join(WORK_DIR, "content_cache.sqlite3"),
+    "JOB_QUEUE_PATH": os.path.join(WORK_DIR, "jobs.sqlite3")
+}
+# Throughput regresses when it drops, latencies when they grow.
+HIGHER_IS_BETTER = {"throughput_per_second": True, "p50_ms": False, "p95_ms": False, "p99_ms": False}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_app(app, port: int):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("The app failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+async def run_phase(operations: list, concurrency: int) -> dict:
+    """Run the operation coroutine functions with at most `concurrency` in flight and time each one."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def run(operation) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await operation()
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(repr(e))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(operation) for operation in operations))
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": round(seconds, 3),
+        "throughput_per_second": round(len(latencies) / seconds, 3) if seconds else 0.0,
+        "errors": len(errors),
+        "first_errors": errors[:3],
+        **latency_summary(latencies)
+    }
+
+async def drive(base_url: str, args) -> tuple[dict, list[str]]:
+    import httpx
+
+    topic_ids: list[str] = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        async def create(i: int) -> None:
+            response = await client.post("/api/topics", json={"topic": f"benchmark topic {args.seed}-{i}"})
+            response.raise_for_status()
+            submitted = response.json()
+            while True:
+                job = (await client.get(f"/api/jobs/{submitted['job_id']}")).json()["job"]
+                if job["status"] == "succeeded":
+                    topic_ids.append(submitted["topic_id"])
+                    return
+                if job["status"] == "failed":
+                    raise RuntimeError(job["error"])
+                await asyncio.sleep(args.poll_interval)
+
+        async def list_topics() -> None:
+            (await client.get("/api/topics", params={"limit": 100})).raise_for_status()
+
+        async def ask(i: int) -> None:
+            topic_id = topic_ids[i % len(topic_ids)]
+            query = f"What does method M{i} improve over the baseline, and on which corpus?"
+            (await client.post(f"/api/topics/{topic_id}/qna", json={"query": query})).raise_for_status()
+
+        def remover(topic_id: str, paper_id: str):
+            async def remove() -> None:
+                (await client.delete(f"/api/topics/{topic_id}/papers/{paper_id}")).raise_for_status()
+            return remove
+
+        phases = {"create": await run_phase([lambda i=i: create(i) for i in range(args.topics)], args.concurrency)}
+        if not topic_ids:
+            return phases, topic_ids
+        phases["list"] = await run_phase([list_topics] * args.list_requests, args.concurrency)
+        phases["qna"] = await run_phase([lambda i=i: ask(i) for i in range(args.questions)], args.concurrency)
+
+        removals = []
+        for topic_id in topic_ids:
+            topic = (await client.get(f"/api/topics/{topic_id}", params={"papers_limit": 200})).json()["topic"]
+            removals += [remover(topic_id, paper["id"]) for paper in topic["papers"]]
+        phases["remove"] = await run_phase(removals[:args.removals], args.concurrency)
+    return phases, topic_ids
+
+def compare(current: dict, baseline: dict, threshold: float) -> tuple[dict, list[str]]:
+    """Relative change of each operation's throughput and latency percentiles, and the regressions."""
+    changes, regressions = {}, []
+    for operation, stats in current["operations"].items():
+        base = baseline.get("operations", {}).get(operation)
+        if not base:
+            continue
+        changes[operation] = {}
+        for metric, higher_is_better in HIGHER_IS_BETTER.items():
+            if not base.get(metric):
+                continue
+            change = (stats[metric] - base[metric]) / base[metric]
+            changes[operation][metric] = round(change, 4)
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(f"{operation}.{metric}: {base[metric]} -> {stats[metric]} ({change:+.1%})")
+    return changes, regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topics", type=int, default=4)
+    parser.add_argument("--papers", type=int, default=10, help="Papers per topic (search results)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--list-requests", type=int, default=100)
+    parser.add_argument("--removals", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--fetch-latency", type=float, default=0.02)
+    parser.add_argument("--pdf-ratio", type=float, default=0.3)
+    parser.add_argument("--pdf-pages", type=int, default=12)
+    parser.add_argument("--embeddings", choices=["model", "fake"], default="model")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--seed", default="run", help="Distinguishes topic names, and so fixture papers, between runs")
+    parser.add_argument("--output", help="Write the results JSON to this file")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression before failing")
+    args = parser.parse_args()
+
+    with FixtureServer(papers=args.papers, pdf_ratio=args.pdf_ratio, pdf_pages=args.pdf_pages, latency=args.fetch_latency) as fixtures:
+        for name, value in BENCHMARK_ENV.items():
+            os.environ.setdefault(name, value)
+        os.environ["SCHOLAR_URL"] = f"{fixtures.url}/scholar"
+        os.environ["SEARCH_RESULTS"] = str(args.papers)
+        os.environ.setdefault("JOB_WORKERS", str(args.concurrency))
+
+        # The app reads its configuration at import time, so it is imported once the environment is set.
+        from main import app
+        from services.fake_chat_model import FakeChatModel
+        from services.providers import set_embedding_model, set_llm
+        from services.telemetry import metrics
+
+        model = FakeChatModel(latency=args.llm_latency)
+        set_llm(model)
+        if args.embeddings == "fake":
+            from langchain_core.embeddings import DeterministicFakeEmbedding
+            set_embedding_model(DeterministicFakeEmbedding(size=384))
+
+        server, thread = start_app(app, free_port())
+        try:
+            phases, topic_ids = asyncio.run(drive(f"http://127.0.0.1:{server.config.port}", args))
+        finally:
+            server.should_exit = True
+            thread.join()
+
+    results = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "operations": phases,
+        "topics_created": len(topic_ids),
+        "fixture_requests": fixtures.requests,
+        "llm_calls": model.calls,
+        # ru_maxrss is in kilobytes on Linux. Children are the PDF extraction workers.
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_rss_children_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "spans": metrics.snapshot()["spans"]
+    }
+    regressions = []
+    if args.compare:
+        with open(args.compare) as file:
+            results["comparison"], regressions = compare(results, json.load(file), args.threshold)
+        results["regressions"] = regressions
+    report(results, args.output)
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare Q&A retrieval latency before and after per-topic persistent indexes.
+
+"before" reproduces the old behaviour: every call re-embeds all papers into the shared
+"academic_papers" collection. "after" reuses the topic's persistent collection. The LLM
+completion is identical in both paths and is left out so the numbers isolate the index work.
+
+Run from backend/app:  python -m benchmarks.qna_latency --papers 5 --queries 50
+"""
+import argparse
+
+from benchmarks.common import latency_summary, offline_env, report, synthetic_papers, temp_path, timed
+
+offline_env(ANSWER_CACHE="false", CHROMA_PERSIST_DIR=temp_path("qna-bench-"))
+
+from langchain_chroma import Chroma
+
+from services import qna_chatbot_agent as qna
+from services.providers import get_embedding_model
+
+def run_before(papers: list[dict], queries: list[str]) -> list[float]:
+    latencies = []
+    for query in queries:
+        with timed(latencies):
+            vectorstore = Chroma.from_texts(
+                texts=[qna.paper_document(paper) for paper in papers],
+                embedding=get_embedding_model(),
+                metadatas=[{"paper_id": paper["id"], "link": paper["link"]} for paper in papers],
+                collection_name="academic_papers"
+            )
+            vectorstore.similarity_search(query, k=3)
+    return latencies
+
+def run_after(papers: list[dict], queries: list[str]) -> list[float]:
+    qna.index_topic_papers("benchmark", papers)
+    state = {"topic_id": "benchmark", "papers": papers}
+    latencies = []
+    for query in queries:
+        with timed(latencies):
+            vectorstore = qna.initialize_vectorstore(state)
+            vectorstore.similarity_search(query, k=3)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--papers", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    papers = synthetic_papers(args.papers)
+    queries = [f"What does method M{i % args.papers} improve?" for i in range(args.queries)]
+    results = {
+        "papers": args.papers,
+        "before": latency_summary(run_before(papers, queries)),
+        "after": latency_summary(run_after(papers, queries))
+    }
+    report(results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Time-to-first-token for Q&A: blocking graph invoke versus the streaming path.
+
+For the blocking path the user sees nothing until the whole answer is generated, so its
+time to first token is the full request latency. The streaming path is measured to the
+first "token" event. Uses the offline FakeChatModel with --latency seconds before the first
+token and --token-latency seconds between tokens.
+
+Run from backend/app:  python -m benchmarks.qna_ttft --queries 20
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import latency_summary, offline_env, report, synthetic_papers, temp_path
+
+offline_env(ANSWER_CACHE="false", CHROMA_PERSIST_DIR=temp_path("qna-ttft-"))
+
+from services import qna_chatbot_agent as qna
+from services.agent_registry import agent_registry
+from services.fake_chat_model import FakeChatModel
+from services.providers import set_llm
+
+def state_for(papers: list[dict], query: str) -> dict:
+    return {"topic_id": "ttft", "topic": "benchmark topic", "papers": papers, "query": query, "qna_history": []}
+
+async def first_token_latency(state: dict) -> float:
+    start = time.perf_counter()
+    first = None
+    async for event in qna.astream_answer(state):
+        if event["event"] == "token" and first is None:
+            first = time.perf_counter() - start
+    return first
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--papers", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    set_llm(FakeChatModel(latency=args.latency, token_latency=args.token_latency))
+    papers = synthetic_papers(args.papers)
+    qna.index_topic_papers("ttft", papers)
+    queries = [f"What does method M{i % args.papers} improve?" for i in range(args.queries)]
+
+    blocking = []
+    for query in queries:
+        start = time.perf_counter()
+        asyncio.run(agent_registry.qna.ainvoke(state_for(papers, query)))
+        blocking.append(time.perf_counter() - start)
+    streaming = [asyncio.run(first_token_latency(state_for(papers, query))) for query in queries]
+
+    report({
+        "blocking_time_to_first_token": latency_summary(blocking),
+        "streaming_time_to_first_token": latency_summary(streaming)
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Offline retrieval quality and latency for dense, hybrid and hybrid + rerank Q&A retrieval.
+
+Indexes the fixture topic in benchmarks/fixtures/retrieval_topic.json (papers with full
+text plus queries labelled with their relevant paper ids) and reports recall@k, MRR and
+retrieval latency for each mode. Pass --fixture to evaluate another topic in the same format.
+
+Run from backend/app:  python -m benchmarks.retrieval_eval --modes dense hybrid rerank
+"""
+import argparse
+import json
+import os
+
+from benchmarks.common import latency_summary, offline_env, report, temp_path, timed
+
+offline_env(ANSWER_CACHE="false", CHROMA_PERSIST_DIR=temp_path("retrieval-eval-"))
+
+from services import qna_chatbot_agent as qna
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "retrieval_topic.json")
+
+def evaluate(retriever, queries: list[dict], repeats: int) -> dict:
+    latencies, hits, reciprocal_ranks = [], 0, 0.0
+    for item in queries:
+        for _ in range(repeats):
+            with timed(latencies):
+                docs = retriever.invoke(item["query"])
+        ranked = [doc.metadata.get("paper_id") for doc in docs]
+        relevant = set(item["relevant"])
+        hits += bool(relevant & set(ranked))
+        reciprocal_ranks += next((1 / (rank + 1) for rank, paper_id in enumerate(ranked) if paper_id in relevant), 0.0)
+    return {
+        "recall_at_k": round(hits / len(queries), 3),
+        "mrr": round(reciprocal_ranks / len(queries), 3),
+        "latency": latency_summary(latencies)
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--modes", nargs="+", default=["dense", "hybrid", "rerank"], choices=["dense", "hybrid", "rerank"])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.fixture) as f:
+        fixture = json.load(f)
+    topic_id = "retrieval-eval"
+    qna.index_topic_papers(topic_id, fixture["papers"])
+    vectorstore = qna.get_topic_vectorstore(topic_id)
+
+    results = {"papers": len(fixture["papers"]), "queries": len(fixture["queries"]), "k": qna.RETRIEVER_K}
+    for mode in args.modes:
+        retriever = qna.build_retriever(
+            topic_id,
+            vectorstore,
+            mode="dense" if mode == "dense" else "hybrid",
+            rerank=mode == "rerank"
+        )
+        retriever.invoke(fixture["queries"][0]["query"])
+        results[mode] = evaluate(retriever, fixture["queries"], args.repeats)
+    qna.delete_topic_index(topic_id)
+    report(results)
+
+if __name__ == "__main__":
+    main()
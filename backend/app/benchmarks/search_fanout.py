@@ -0,0 +1,70 @@
+"""
+Multi-source paper search against offline provider fixtures.
+
+Compares querying the providers one after another with the concurrent fan-out, using
+--latency seconds of simulated latency per provider, and shows the merge: results per
+provider, merged count, duplicates removed and how many results still lack authors or a
+year after parsing (the only ones the cleaning step sends to the LLM). A second run makes one provider slower
+than --timeout and another rate-limited (429) to show that they only drop their own results.
+
+Run from backend/app:  python -m benchmarks.search_fanout --latency 0.3 0.8 1.2 0.5
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import report
+from benchmarks.search_mocks import fixture_transport
+from services.search_providers import SEARCH_PROVIDERS, search_papers
+
+async def sequential(names: list[str], limit: int, latency: dict, timeout: float) -> float:
+    start = time.perf_counter()
+    for name in names:
+        await search_papers("eHMI", limit, [name], timeout, fixture_transport(latency))
+    return time.perf_counter() - start
+
+async def run(args) -> dict:
+    names = args.providers
+    latency = dict(zip(names, args.latency))
+    sequential_seconds = await sequential(names, args.limit, latency, args.timeout)
+
+    start = time.perf_counter()
+    results, report = await search_papers("eHMI", args.limit, names, args.timeout, fixture_transport(latency))
+    fanout_seconds = time.perf_counter() - start
+
+    slow = {**latency, names[0]: args.timeout * 2}
+    start = time.perf_counter()
+    degraded, degraded_report = await search_papers(
+        "eHMI", args.limit, names, args.timeout, fixture_transport(slow, {names[-1]: 429})
+    )
+    degraded_seconds = time.perf_counter() - start
+
+    total = sum(entry["results"] for entry in report.values())
+    return {
+        "providers": names,
+        "limit": args.limit,
+        "sequential_seconds": round(sequential_seconds, 3),
+        "fanout_seconds": round(fanout_seconds, 3),
+        "provider_results": report,
+        "merged_results": len(results),
+        "duplicates_removed": total - len(results),
+        "needing_llm_fallback": sum(1 for result in results if not result.authors or result.year is None),
+        "titles": [f"{result.title} [{result.source}]" for result in results],
+        "degraded": {
+            "seconds": round(degraded_seconds, 3),
+            "merged_results": len(degraded),
+            "provider_results": degraded_report
+        }
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--providers", nargs="+", default=SEARCH_PROVIDERS)
+    parser.add_argument("--latency", type=float, nargs="+", default=[0.3, 0.8, 1.2, 0.5])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    args = parser.parse_args()
+    report(asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Offline stand-ins for the search providers: an httpx.MockTransport that answers each
+provider's API host from the fixtures in benchmarks/fixtures/search, with a configurable
+per-provider latency and optional failures.
+"""
+import asyncio
+import os
+from urllib.parse import urlparse
+
+import httpx
+
+from services import search_providers
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "search")
+
+PROVIDER_FIXTURES = {
+    urlparse(search_providers.SCHOLAR_URL).netloc: ("scholar", "scholar.html", "text/html; charset=utf-8"),
+    urlparse(search_providers.ARXIV_URL).netloc: ("arxiv", "arxiv.xml", "application/atom+xml"),
+    urlparse(search_providers.CROSSREF_URL).netloc: ("crossref", "crossref.json", "application/json"),
+    urlparse(search_providers.SEMANTIC_SCHOLAR_URL).netloc: ("semantic_scholar", "semantic_scholar.json", "application/json")
+}
+
+def load_fixture(filename: str) -> bytes:
+    with open(os.path.join(FIXTURE_DIR, filename), "rb") as f:
+        return f.read()
+
+def fixture_transport(latency: dict[str, float] | None = None, status: dict[str, int] | None = None) -> httpx.MockTransport:
+    """
+    Serve provider fixtures. latency maps provider name to seconds before the response;
+    status maps provider name to an HTTP status to return instead (e.g. 429 for Scholar).
+    """
+    latency = latency or {}
+    status = status or {}
+    bodies = {host: load_fixture(filename) for host, (_, filename, _) in PROVIDER_FIXTURES.items()}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        if host not in PROVIDER_FIXTURES:
+            return httpx.Response(404)
+        name, _, content_type = PROVIDER_FIXTURES[host]
+        await asyncio.sleep(latency.get(name, 0))
+        if name in status:
+            return httpx.Response(status[name])
+        return httpx.Response(200, content=bodies[host], headers={"content-type": content_type})
+
+    return httpx.MockTransport(handler)
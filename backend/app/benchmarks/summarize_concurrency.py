@@ -0,0 +1,51 @@
+"""
+Benchmark asummarize_papers_node against an offline fake chat model.
+
+Runs the node at several paper counts and concurrency caps. The fake model sleeps for
+--latency seconds per call and rate-limits (429) above --model-limit in-flight calls,
+so the backoff path is exercised as well.
+
+Run from backend/app:  python -m benchmarks.summarize_concurrency --papers 5 10 20 --concurrency 1 4 8
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import offline_env, report, synthetic_papers, temp_path
+
+offline_env(CONTENT_CACHE_PATH=temp_path("summarize-bench-", "cache.sqlite3"))
+
+from services import summarize_papers_agent as agent
+from services.fake_chat_model import FakeChatModel
+from services.providers import set_llm
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--papers", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--model-limit", type=int, default=6)
+    args = parser.parse_args()
+
+    results = []
+    for count in args.papers:
+        for concurrency in args.concurrency:
+            model = FakeChatModel(latency=args.latency, max_concurrency=args.model_limit)
+            set_llm(model)
+            agent.SUMMARY_CONCURRENCY = concurrency
+            papers = synthetic_papers(count)
+            for paper in papers:
+                paper["content"] = paper["summary"]
+            start = time.perf_counter()
+            asyncio.run(agent.asummarize_papers_node({"topic": "benchmark", "summarized_data": papers}))
+            results.append({
+                "papers": count,
+                "concurrency": concurrency,
+                "seconds": round(time.perf_counter() - start, 3),
+                "model_calls": model.calls,
+                "rate_limited": model.rate_limited
+            })
+    report(results)
+
+if __name__ == "__main__":
+    main()
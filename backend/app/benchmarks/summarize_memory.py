@@ -0,0 +1,64 @@
+"""
+Peak RSS of the summarize node across many topic creations.
+
+Runs asummarize_papers_node for --topics distinct topics of --papers papers each, with the
+offline FakeChatModel and a deterministic hashing embedding, and records the process's
+peak RSS every --report-every topics. Retrieval context is scoped to each call
+(services.context_index), so the curve should flatten after the first reports instead of
+growing with the number of topics.
+
+Run from backend/app:  python -m benchmarks.summarize_memory --topics 2000 --papers 10
+"""
+import argparse
+import asyncio
+import resource
+import time
+
+from benchmarks.common import offline_env, report, synthetic_papers, temp_path
+
+offline_env(CONTENT_CACHE_PATH=temp_path("summarize-memory-", "cache.sqlite3"))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from services import summarize_papers_agent as agent
+from services.content_cache import content_hash
+from services.fake_chat_model import FakeChatModel
+from services.providers import set_embedding_model, set_llm
+
+def topic_papers(topic: str, count: int, chars: int) -> list[dict]:
+    papers = synthetic_papers(count, topic, chars)
+    for paper in papers:
+        paper["content"] = paper.pop("full_text")
+        paper["content_hash"] = content_hash(paper["content"])
+    return papers
+
+async def run(args) -> list[dict]:
+    reports = []
+    start = time.perf_counter()
+    for i in range(args.topics):
+        papers = topic_papers(f"memory topic {i}", args.papers, args.content_chars)
+        await agent.asummarize_papers_node({"topic": f"memory topic {i}", "summarized_data": papers})
+        if (i + 1) % args.report_every == 0:
+            reports.append({
+                "topics": i + 1,
+                "seconds": round(time.perf_counter() - start, 2),
+                # ru_maxrss is in kilobytes on Linux.
+                "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+            })
+    return reports
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--papers", type=int, default=10)
+    parser.add_argument("--content-chars", type=int, default=3000)
+    parser.add_argument("--report-every", type=int, default=200)
+    args = parser.parse_args()
+
+    set_llm(FakeChatModel(latency=0.0))
+    set_embedding_model(DeterministicFakeEmbedding(size=384))
+    reports = asyncio.run(run(args))
+    report({"config": vars(args), "reports": reports})
+
+if __name__ == "__main__":
+    main()
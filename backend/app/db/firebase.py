@@ -1,7 +1,22 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
-from firebaseAccountKey import info
+from functools import lru_cache
 
-cred = credentials.Certificate(info)
-firebase_admin.initialize_app(cred)
-db = firestore.client()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_app():
+    """Initialise the Firebase app on first use rather than at import time."""
+    import firebase_admin
+    from firebase_admin import credentials
+    from firebaseAccountKey import info
+
+    cred = credentials.Certificate(info)
+    return firebase_admin.initialize_app(cred)
+
+@lru_cache(maxsize=1)
+def get_db():
+    from firebase_admin import firestore
+    return firestore.client(get_app())
+
+@lru_cache(maxsize=1)
+def get_async_db():
+    """Async Firestore client. It binds to the event loop that first uses it, i.e. the app's loop."""
+    from firebase_admin import firestore_async
+    return firestore_async.client(get_app())
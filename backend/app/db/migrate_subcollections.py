@@ -0,0 +1,72 @@
+"""
+Move topics stored in the old single-document layout (embedded "papers" and "qna_history"
+arrays) to the subcollection layout used by db.repository, and add every topic to the
+topic_index / topic_titles listing collections.
+
+Run from backend/app:  python -m db.migrate_subcollections [--dry-run]
+
+Safe to re-run: paper and message documents get deterministic ids, and the embedded
+arrays are only removed from a topic after its subcollections have been written.
+"""
+import argparse
+import time
+from db.firebase import get_db
+from db.repository import FIRESTORE_BATCH_LIMIT, topic_metadata, topic_summary, title_key
+
+def index_topic(db, topic: dict, dry_run: bool) -> None:
+    if dry_run:
+        return
+    summary = topic_summary(topic)
+    db.collection("topic_index").document(topic["id"]).set(summary)
+    db.collection("topic_titles").document(title_key(topic["title"])).set(summary)
+
+def migrate_topic(db, snapshot, dry_run: bool) -> bool:
+    from google.cloud import firestore
+
+    topic = snapshot.to_dict()
+    index_topic(db, topic, dry_run)
+    if "papers" not in topic and "qna_history" not in topic:
+        return False
+    papers = topic.get("papers", [])
+    messages = topic.get("qna_history", [])
+    if dry_run:
+        print(f"{snapshot.id}: would move {len(papers)} papers and {len(messages)} messages")
+        return True
+
+    # Legacy messages have no timestamps; spread them over the seconds before the migration
+    # so they sort before anything appended afterwards and keep their original order.
+    base = time.time() - len(messages)
+    writes = [
+        (snapshot.reference.collection("papers").document(paper["id"]), {**paper, "position": position})
+        for position, paper in enumerate(papers)
+    ]
+    writes += [
+        (snapshot.reference.collection("messages").document(f"legacy-{i:06d}"), {**message, "created_at": message.get("created_at") or base + i})
+        for i, message in enumerate(messages)
+    ]
+    for start in range(0, len(writes), FIRESTORE_BATCH_LIMIT):
+        batch = db.batch()
+        for ref, data in writes[start:start + FIRESTORE_BATCH_LIMIT]:
+            batch.set(ref, data)
+        batch.commit()
+
+    metadata = topic_metadata(topic)
+    snapshot.reference.update({
+        "papers": firestore.DELETE_FIELD,
+        "qna_history": firestore.DELETE_FIELD,
+        "paper_count": metadata["paper_count"]
+    })
+    print(f"{snapshot.id}: moved {len(papers)} papers and {len(messages)} messages")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    db = get_db()
+    migrated = sum(migrate_topic(db, snapshot, args.dry_run) for snapshot in db.collection("topics").stream())
+    print(f"{'Would migrate' if args.dry_run else 'Migrated'} {migrated} topics")
+
+if __name__ == "__main__":
+    main()
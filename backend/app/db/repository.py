@@ -0,0 +1,413 @@
+import asyncio
+import bisect
+import copy
+import hashlib
+import os
+import time
+from functools import lru_cache
+from db.firebase import get_async_db
+
+# "firestore" for the real database (honours FIRESTORE_EMULATOR_HOST), "memory" for the
+# in-process store used by tests and benchmarks.
+TOPIC_STORE = os.environ.get("TOPIC_STORE", "firestore")
+
+# Layout: topics/{topic_id} holds only the topic's metadata. Papers live in
+# topics/{topic_id}/papers/{paper_id} ordered by "position", and Q&A messages in
+# topics/{topic_id}/messages ordered by "created_at", so reads can be paged and the
+# topic document no longer grows with every paper and message.
+FIRESTORE_BATCH_LIMIT = 500
+
+# Listing and duplicate checks never touch topic documents. topic_index/{topic_id} holds a
+# small summary per topic ordered by "sort_key", and topic_titles/{title_key} maps a
+# normalized title to its topic so a duplicate check is a single document read. The title is
+# reserved with a create-if-absent write when creation is submitted, so two submits of the
+# same title cannot both pass the check.
+
+def normalize_title(title: str) -> str:
+    return " ".join(title.lower().split())
+
+def title_key(title: str) -> str:
+    return hashlib.sha1(normalize_title(title).encode("utf-8")).hexdigest()
+
+def topic_summary(topic: dict) -> dict:
+    normalized = normalize_title(topic["title"])
+    return {
+        "id": topic["id"],
+        "title": topic["title"],
+        "normalized_title": normalized,
+        "sort_key": f"{normalized}\x1f{topic['id']}"
+    }
+
+def stamp_messages(messages: list[dict]) -> list[dict]:
+    """Give every message a creation time, used to order and page the conversation."""
+    now = time.time()
+    return [{**message, "created_at": message.get("created_at") or now + i * 1e-6} for i, message in enumerate(messages)]
+
+def topic_metadata(topic: dict) -> dict:
+    metadata = {key: value for key, value in topic.items() if key not in ("papers", "qna_history")}
+    metadata["paper_count"] = len(topic.get("papers", []))
+    return metadata
+
+def unstored_papers(papers: list[dict], stored_ids: set[str]) -> list[dict]:
+    """The papers whose id is neither stored nor repeated earlier in the list."""
+    new, seen = [], set(stored_ids)
+    for paper in papers:
+        if paper["id"] not in seen:
+            seen.add(paper["id"])
+            new.append(paper)
+    return new
+
+class TopicRepository:
+    """
+    Data access for topics. Writes are field- or document-level; nothing rewrites a whole topic.
+    Paged reads take a cursor returned by the previous page and return (items, next_cursor),
+    where next_cursor is None on the last page.
+    """
+
+    async def create_topic(self, topic: dict) -> None:
+        """Store a topic given in the API shape (with "papers" and "qna_history" lists)."""
+        raise NotImplementedError
+
+    async def get_topic(self, topic_id: str) -> dict | None:
+        """Topic metadata only, without papers or messages."""
+        raise NotImplementedError
+
+    async def list_topics(self, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        """Topic summaries (id and title) ordered by title."""
+        raise NotImplementedError
+
+    async def find_topic_by_title(self, title: str) -> dict | None:
+        """Summary of the topic whose normalized title matches, if any."""
+        raise NotImplementedError
+
+    async def reserve_title(self, title: str, topic_id: str) -> bool:
+        """Map the normalized title to topic_id unless it is already taken; False if it is."""
+        raise NotImplementedError
+
+    async def release_title(self, title: str, topic_id: str) -> None:
+        """Remove the title mapping, but only while it still points at topic_id."""
+        raise NotImplementedError
+
+    async def delete_topic(self, topic_id: str) -> bool:
+        """Delete a topic with its papers, messages and index entries. False if it did not exist."""
+        raise NotImplementedError
+
+    async def list_papers(self, topic_id: str, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        """Papers in insertion order."""
+        raise NotImplementedError
+
+    async def list_all_papers(self, topic_id: str) -> list[dict]:
+        papers, cursor = [], None
+        while True:
+            page, cursor = await self.list_papers(topic_id, FIRESTORE_BATCH_LIMIT, cursor)
+            papers.extend(page)
+            if cursor is None:
+                return papers
+
+    async def list_messages(self, topic_id: str, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        """
+        Page backwards through the conversation: the first page is the latest `limit`
+        messages and the cursor loads older ones. Each page is in chronological order.
+        """
+        raise NotImplementedError
+
+    async def recent_messages(self, topic_id: str, limit: int) -> list[dict]:
+        messages, _ = await self.list_messages(topic_id, limit)
+        return messages
+
+    async def append_messages(self, topic_id: str, messages: list[dict]) -> None:
+        raise NotImplementedError
+
+    async def add_papers(self, topic_id: str, papers: list[dict]) -> dict | None:
+        """
+        Append papers after the topic's existing ones and return the topic metadata, or None
+        if the topic does not exist. Papers whose id is already stored are skipped, so a job
+        re-run or two concurrent jobs never overwrite a paper or count it twice; other existing
+        papers are not read or rewritten.
+        """
+        raise NotImplementedError
+
+    async def remove_paper(self, topic_id: str, paper_id: str) -> dict | None:
+        """Remove a paper and return the topic metadata, or None if the topic does not exist."""
+        raise NotImplementedError
+
+    async def update_history_summary(self, topic_id: str, summary: str, summarized_until: float) -> None:
+        """Store the rolling conversation summary and the created_at of the last message it covers."""
+        raise NotImplementedError
+
+class FirestoreTopicRepository(TopicRepository):
+    def __init__(self, client):
+        self._client = client
+        self._topics = client.collection("topics")
+        self._index = client.collection("topic_index")
+        self._titles = client.collection("topic_titles")
+
+    async def create_topic(self, topic: dict) -> None:
+        topic_ref = self._topics.document(topic["id"])
+        summary = topic_summary(topic)
+        writes = [
+            (topic_ref, topic_metadata(topic)),
+            (self._index.document(topic["id"]), summary),
+            (self._titles.document(title_key(topic["title"])), summary)
+        ]
+        writes += [
+            (topic_ref.collection("papers").document(paper["id"]), {**paper, "position": position})
+            for position, paper in enumerate(topic.get("papers", []))
+        ]
+        writes += [
+            (topic_ref.collection("messages").document(), message)
+            for message in stamp_messages(topic.get("qna_history", []))
+        ]
+        for start in range(0, len(writes), FIRESTORE_BATCH_LIMIT):
+            batch = self._client.batch()
+            for ref, data in writes[start:start + FIRESTORE_BATCH_LIMIT]:
+                batch.set(ref, data)
+            await batch.commit()
+
+    async def get_topic(self, topic_id: str) -> dict | None:
+        snapshot = await self._topics.document(topic_id).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    async def list_topics(self, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        query = self._index.order_by("sort_key").limit(limit)
+        if cursor is not None:
+            query = query.start_after({"sort_key": cursor})
+        summaries = [snapshot.to_dict() async for snapshot in query.stream()]
+        next_cursor = summaries[-1]["sort_key"] if len(summaries) == limit else None
+        return summaries, next_cursor
+
+    async def find_topic_by_title(self, title: str) -> dict | None:
+        snapshot = await self._titles.document(title_key(title)).get()
+        return snapshot.to_dict() if snapshot.exists else None
+
+    async def reserve_title(self, title: str, topic_id: str) -> bool:
+        from google.api_core.exceptions import AlreadyExists
+        try:
+            await self._titles.document(title_key(title)).create(topic_summary({"id": topic_id, "title": title}))
+        except AlreadyExists:
+            return False
+        return True
+
+    async def release_title(self, title: str, topic_id: str) -> None:
+        from google.cloud import firestore
+
+        @firestore.async_transactional
+        async def release(transaction, title_ref):
+            snapshot = await title_ref.get(transaction=transaction)
+            if snapshot.exists and snapshot.to_dict().get("id") == topic_id:
+                transaction.delete(title_ref)
+
+        await release(self._client.transaction(), self._titles.document(title_key(title)))
+
+    async def delete_topic(self, topic_id: str) -> bool:
+        topic_ref = self._topics.document(topic_id)
+        snapshot = await topic_ref.get()
+        if not snapshot.exists:
+            return False
+        for name in ("papers", "messages"):
+            refs = [ref async for ref in topic_ref.collection(name).list_documents()]
+            for start in range(0, len(refs), FIRESTORE_BATCH_LIMIT):
+                batch = self._client.batch()
+                for ref in refs[start:start + FIRESTORE_BATCH_LIMIT]:
+                    batch.delete(ref)
+                await batch.commit()
+        batch = self._client.batch()
+        batch.delete(self._index.document(topic_id))
+        batch.delete(topic_ref)
+        await batch.commit()
+        await self.release_title(snapshot.to_dict()["title"], topic_id)
+        return True
+
+    async def list_papers(self, topic_id: str, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        query = self._topics.document(topic_id).collection("papers").order_by("position").limit(limit)
+        if cursor is not None:
+            query = query.start_after({"position": int(cursor)})
+        papers = [snapshot.to_dict() async for snapshot in query.stream()]
+        next_cursor = str(papers[-1]["position"]) if len(papers) == limit else None
+        return papers, next_cursor
+
+    async def list_messages(self, topic_id: str, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        from google.cloud import firestore
+        query = (
+            self._topics.document(topic_id).collection("messages")
+            .order_by("created_at", direction=firestore.Query.DESCENDING)
+            .limit(limit)
+        )
+        if cursor is not None:
+            query = query.start_after({"created_at": float(cursor)})
+        messages = [snapshot.to_dict() async for snapshot in query.stream()]
+        next_cursor = repr(messages[-1]["created_at"]) if len(messages) == limit else None
+        return messages[::-1], next_cursor
+
+    async def append_messages(self, topic_id: str, messages: list[dict]) -> None:
+        collection = self._topics.document(topic_id).collection("messages")
+        batch = self._client.batch()
+        for message in stamp_messages(messages):
+            batch.set(collection.document(), message)
+        await batch.commit()
+
+    async def add_papers(self, topic_id: str, papers: list[dict]) -> dict | None:
+        from google.cloud import firestore
+
+        @firestore.async_transactional
+        async def add(transaction, topic_ref):
+            topic_snapshot = await topic_ref.get(transaction=transaction)
+            if not topic_snapshot.exists:
+                return None
+            papers_ref = topic_ref.collection("papers")
+            refs = [papers_ref.document(paper["id"]) for paper in papers]
+            stored = {snapshot.id async for snapshot in self._client.get_all(refs, transaction=transaction) if snapshot.exists}
+            last = papers_ref.order_by("position", direction=firestore.Query.DESCENDING).limit(1)
+            last_papers = [snapshot.to_dict() async for snapshot in last.stream(transaction=transaction)]
+            start = last_papers[0]["position"] + 1 if last_papers else 0
+            new = unstored_papers(papers, stored)
+            for position, paper in enumerate(new, start):
+                transaction.set(papers_ref.document(paper["id"]), {**paper, "position": position})
+            topic = topic_snapshot.to_dict()
+            if new:
+                transaction.update(topic_ref, {"paper_count": firestore.Increment(len(new))})
+                topic["paper_count"] = topic.get("paper_count", 0) + len(new)
+            return topic
+
+        return await add(self._client.transaction(), self._topics.document(topic_id))
+
+    async def remove_paper(self, topic_id: str, paper_id: str) -> dict | None:
+        from google.cloud import firestore
+
+        @firestore.async_transactional
+        async def remove(transaction, topic_ref):
+            topic_snapshot = await topic_ref.get(transaction=transaction)
+            if not topic_snapshot.exists:
+                return None
+            topic = topic_snapshot.to_dict()
+            paper_ref = topic_ref.collection("papers").document(paper_id)
+            paper_snapshot = await paper_ref.get(transaction=transaction)
+            if paper_snapshot.exists:
+                transaction.delete(paper_ref)
+                transaction.update(topic_ref, {"paper_count": firestore.Increment(-1)})
+                topic["paper_count"] = topic.get("paper_count", 1) - 1
+            return topic
+
+        return await remove(self._client.transaction(), self._topics.document(topic_id))
+
+    async def update_history_summary(self, topic_id: str, summary: str, summarized_until: float) -> None:
+        await self._topics.document(topic_id).update({
+            "history_summary": summary,
+            "history_summarized_until": summarized_until
+        })
+
+class InMemoryTopicRepository(TopicRepository):
+    """Process-local store with the same semantics as the Firestore repository."""
+
+    def __init__(self):
+        self._topics: dict[str, dict] = {}
+        self._papers: dict[str, list[dict]] = {}
+        self._messages: dict[str, list[dict]] = {}
+        self._summaries: dict[str, dict] = {}
+        self._sort_keys: list[str] = []
+        self._titles: dict[str, dict] = {}
+        self._lock = asyncio.Lock()
+
+    async def create_topic(self, topic: dict) -> None:
+        async with self._lock:
+            summary = topic_summary(topic)
+            if summary["sort_key"] not in self._summaries:
+                bisect.insort(self._sort_keys, summary["sort_key"])
+            self._summaries[summary["sort_key"]] = summary
+            self._titles[title_key(topic["title"])] = summary
+            self._topics[topic["id"]] = topic_metadata(copy.deepcopy(topic))
+            self._papers[topic["id"]] = [{**copy.deepcopy(paper), "position": i} for i, paper in enumerate(topic.get("papers", []))]
+            self._messages[topic["id"]] = stamp_messages(copy.deepcopy(topic.get("qna_history", [])))
+
+    async def get_topic(self, topic_id: str) -> dict | None:
+        topic = self._topics.get(topic_id)
+        return copy.deepcopy(topic) if topic else None
+
+    async def list_topics(self, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        start = bisect.bisect_right(self._sort_keys, cursor) if cursor is not None else 0
+        page = [dict(self._summaries[key]) for key in self._sort_keys[start:start + limit]]
+        return page, (page[-1]["sort_key"] if len(page) == limit else None)
+
+    async def find_topic_by_title(self, title: str) -> dict | None:
+        summary = self._titles.get(title_key(title))
+        return dict(summary) if summary else None
+
+    async def reserve_title(self, title: str, topic_id: str) -> bool:
+        async with self._lock:
+            key = title_key(title)
+            if key in self._titles:
+                return False
+            self._titles[key] = topic_summary({"id": topic_id, "title": title})
+            return True
+
+    async def release_title(self, title: str, topic_id: str) -> None:
+        async with self._lock:
+            self._release_title(title, topic_id)
+
+    def _release_title(self, title: str, topic_id: str) -> None:
+        key = title_key(title)
+        if self._titles.get(key, {}).get("id") == topic_id:
+            del self._titles[key]
+
+    async def delete_topic(self, topic_id: str) -> bool:
+        async with self._lock:
+            topic = self._topics.pop(topic_id, None)
+            if topic is None:
+                return False
+            summary = topic_summary(topic)
+            self._summaries.pop(summary["sort_key"], None)
+            self._sort_keys.remove(summary["sort_key"])
+            self._release_title(topic["title"], topic_id)
+            self._papers.pop(topic_id, None)
+            self._messages.pop(topic_id, None)
+            return True
+
+    async def list_papers(self, topic_id: str, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        papers = [paper for paper in self._papers.get(topic_id, []) if cursor is None or paper["position"] > int(cursor)]
+        page = copy.deepcopy(papers[:limit])
+        return page, (str(page[-1]["position"]) if len(page) == limit else None)
+
+    async def list_messages(self, topic_id: str, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+        messages = [message for message in self._messages.get(topic_id, []) if cursor is None or message["created_at"] < float(cursor)]
+        page = copy.deepcopy(messages[-limit:]) if limit else []
+        return page, (repr(page[0]["created_at"]) if len(page) == limit else None)
+
+    async def append_messages(self, topic_id: str, messages: list[dict]) -> None:
+        async with self._lock:
+            self._messages[topic_id].extend(stamp_messages(messages))
+
+    async def add_papers(self, topic_id: str, papers: list[dict]) -> dict | None:
+        async with self._lock:
+            topic = self._topics.get(topic_id)
+            if topic is None:
+                return None
+            existing = self._papers[topic_id]
+            start = existing[-1]["position"] + 1 if existing else 0
+            new = unstored_papers(papers, {paper["id"] for paper in existing})
+            existing.extend({**copy.deepcopy(paper), "position": position} for position, paper in enumerate(new, start))
+            topic["paper_count"] += len(new)
+            return copy.deepcopy(topic)
+
+    async def remove_paper(self, topic_id: str, paper_id: str) -> dict | None:
+        async with self._lock:
+            topic = self._topics.get(topic_id)
+            if topic is None:
+                return None
+            papers = self._papers[topic_id]
+            remaining = [paper for paper in papers if paper["id"] != paper_id]
+            topic["paper_count"] -= len(papers) - len(remaining)
+            self._papers[topic_id] = remaining
+            return copy.deepcopy(topic)
+
+    async def update_history_summary(self, topic_id: str, summary: str, summarized_until: float) -> None:
+        async with self._lock:
+            topic = self._topics.get(topic_id)
+            if topic is not None:
+                topic["history_summary"] = summary
+                topic["history_summarized_until"] = summarized_until
+
+@lru_cache(maxsize=1)
+def get_topic_repository() -> TopicRepository:
+    if TOPIC_STORE == "memory":
+        return InMemoryTopicRepository()
+    return FirestoreTopicRepository(get_async_db())
@@ -43,13 +43,33 @@
 # if __name__ == "__main__":
 #     local_run()
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 import uvicorn
 from api import endpoints
+from services.agent_registry import agent_registry
+from services.executors import shutdown_executors
+from services.job_queue import get_job_queue
+from services.pdf_extractor import shutdown_pdf_executor
+from services.telemetry import setup_telemetry, shutdown_telemetry
+from services.topic_pipeline import JOB_HANDLERS
 import os
 
-app = FastAPI(title="ScholarPilot")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(agent_registry.startup)
+    job_queue = get_job_queue()
+    job_queue.start(JOB_HANDLERS)
+    yield
+    await job_queue.stop()
+    shutdown_pdf_executor()
+    shutdown_executors()
+    shutdown_telemetry(tracer_provider)
+
+app = FastAPI(title="ScholarPilot", lifespan=lifespan)
 app.include_router(endpoints.router, prefix="/api")
+tracer_provider = setup_telemetry(app)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
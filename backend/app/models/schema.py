@@ -4,6 +4,10 @@ from typing import Literal
 class TopicPost(BaseModel):
     topic: str
 
+class PaperPost(BaseModel):
+    links: list[str] = []
+    query: str | None = None
+
 class QueryInput(BaseModel):
     query: str
 
@@ -17,12 +21,13 @@ class Paper(BaseModel):
     authors: list[str]
     summary: str
     link: str
-    year: int
+    year: int | None = None
     topic_id: str
 
 class Message(BaseModel):
     role: Literal['system', 'assistant', 'user']
     content: str
+    created_at: float | None = None
 
 class Topic(BaseModel):
     id: str
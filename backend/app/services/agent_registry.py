@@ -0,0 +1,63 @@
+import os
+import threading
+from services import search_papers_agent, summarize_papers_agent, qna_chatbot_agent
+from services.providers import get_embedding_model, get_llm
+from services.conversation_memory import get_encoding
+
+# Long-running servers warm up at startup; serverless deploys can turn this off so cold
+# starts only load the embedding model and LLM client when a request needs them.
+WARM_UP_ON_STARTUP = os.environ.get("WARM_UP_ON_STARTUP", "true").lower() == "true"
+
+class AgentRegistry:
+    """
+    Application-wide compiled LangGraph agents. Each graph is compiled once and shared;
+    requests only hand their own initial state to invoke/stream, so nothing per-request
+    is stored on the compiled graphs.
+    """
+
+    builders = {
+        "search": search_papers_agent.search_graph_agent,
+        "summarize": summarize_papers_agent.summarize_graph_agent,
+        "qna": qna_chatbot_agent.qna_graph_agent
+    }
+
+    def __init__(self):
+        self._graphs = {}
+        self._lock = threading.Lock()
+
+    def graph(self, name: str):
+        graph = self._graphs.get(name)
+        if graph is None:
+            with self._lock:
+                graph = self._graphs.get(name)
+                if graph is None:
+                    graph = self.builders[name].compile()
+                    self._graphs[name] = graph
+        return graph
+
+    @property
+    def search(self):
+        return self.graph("search")
+
+    @property
+    def summarize(self):
+        return self.graph("summarize")
+
+    @property
+    def qna(self):
+        return self.graph("qna")
+
+    def warm_up(self) -> None:
+        """Load the shared models and run one embedding so the first request doesn't pay for lazy initialisation."""
+        get_llm()
+        get_embedding_model().embed_query("warm up")
+
+    def startup(self, warm_up: bool = WARM_UP_ON_STARTUP) -> None:
+        for name in self.builders:
+            self.graph(name)
+        # The tokenizer may download its BPE file on first use; never let that happen in a request.
+        get_encoding()
+        if warm_up:
+            self.warm_up()
+
+agent_registry = AgentRegistry()
@@ -0,0 +1,186 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+# Per-topic semantic cache of Q&A answers. A question whose embedding is at least
+# ANSWER_CACHE_THRESHOLD cosine-similar to a previously answered question on the same topic
+# gets the stored answer and sources back without retrieval or a model call. Entries are
+# dropped whenever the topic's set of indexed papers changes, and each invalidation bumps the
+# topic's generation so an answer computed against the old papers cannot be stored after it.
+# The embedding matrices of at most ANSWER_CACHE_MAX_TOPICS topics are kept in memory (LRU).
+# Answers to follow-up questions are stored under a context key (a hash of the conversation
+# they were asked in) and only served to the same context; standalone questions use "".
+ANSWER_CACHE_ENABLED = os.environ.get("ANSWER_CACHE", "true").lower() == "true"
+ANSWER_CACHE_PATH = os.environ.get("ANSWER_CACHE_PATH", "answer_cache.sqlite3")
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", str(7 * 24 * 3600)))
+ANSWER_CACHE_MAX_PER_TOPIC = int(os.environ.get("ANSWER_CACHE_MAX_PER_TOPIC", "500"))
+ANSWER_CACHE_MAX_TOPICS = int(os.environ.get("ANSWER_CACHE_MAX_TOPICS", "256"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic_id TEXT NOT NULL,
+    query TEXT NOT NULL,
+    embedding TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    sources TEXT NOT NULL,
+    latency REAL NOT NULL,
+    created_at REAL NOT NULL,
+    context TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS answers_topic ON answers (topic_id, created_at);
+"""
+
+def normalize(vector: list[float]) -> Any:
+    import numpy as np
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+class AnswerCache:
+    def __init__(self, path: str = ANSWER_CACHE_PATH, threshold: float = ANSWER_CACHE_THRESHOLD,
+                 ttl: float = ANSWER_CACHE_TTL, max_per_topic: int = ANSWER_CACHE_MAX_PER_TOPIC,
+                 max_topics: int = ANSWER_CACHE_MAX_TOPICS):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_per_topic = max_per_topic
+        self.max_topics = max_topics
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        if "context" not in {column[1] for column in self._conn.execute("PRAGMA table_info(answers)")}:
+            self._conn.execute("ALTER TABLE answers ADD COLUMN context TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("DELETE FROM answers WHERE created_at < ?", (time.time() - ttl,))
+        self._conn.commit()
+        # topic_id -> (row ids, creation times, context keys, matrix of normalized question
+        # embeddings), loaded on first lookup and evicted least recently used first.
+        self._topics: OrderedDict[str, tuple[list[int], list[float], list[str], Any]] = OrderedDict()
+        # Generations come from one counter. Topics invalidated since startup keep their own (LRU
+        # bounded); every other topic, including evicted ones, reports the floor, which is at least
+        # any evicted generation, so a put captured before an eviction is rejected, never let through.
+        self._generations: OrderedDict[str, int] = OrderedDict()
+        self._generation_counter = 0
+        self._generation_floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def _load(self, topic_id: str) -> tuple[list[int], list[float], list[str], Any]:
+        """The topic's cached questions, with entries past the TTL dropped."""
+        import numpy as np
+        cutoff = time.time() - self.ttl
+        loaded = self._topics.get(topic_id)
+        if loaded is None:
+            rows = self._conn.execute(
+                "SELECT id, created_at, context, embedding FROM answers WHERE topic_id = ? AND created_at >= ? ORDER BY id",
+                (topic_id, cutoff)
+            ).fetchall()
+            matrix = np.stack([normalize(json.loads(row[3])) for row in rows]) if rows else None
+            loaded = ([row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows], matrix)
+        ids, created, contexts, matrix = loaded
+        # Rows are in insertion order, so expired entries are a prefix.
+        expired = next((i for i, created_at in enumerate(created) if created_at >= cutoff), len(created))
+        if expired:
+            ids, created, contexts = ids[expired:], created[expired:], contexts[expired:]
+            matrix = matrix[expired:] if ids else None
+        self._topics[topic_id] = (ids, created, contexts, matrix)
+        self._topics.move_to_end(topic_id)
+        while len(self._topics) > self.max_topics:
+            self._topics.popitem(last=False)
+        return ids, created, contexts, matrix
+
+    def generation(self, topic_id: str) -> int:
+        """Capture before computing an answer and pass to put, which rejects it if the topic was invalidated since."""
+        with self._lock:
+            return self._generations.get(topic_id, self._generation_floor)
+
+    def lookup(self, topic_id: str, embedding: list[float], context: str = "") -> dict | None:
+        """Return {"query", "answer", "sources"} for the closest cached question in the same context above the threshold."""
+        import numpy as np
+        with self._lock:
+            ids, _, contexts, matrix = self._load(topic_id)
+            row = None
+            if matrix is not None:
+                scores = np.where(np.asarray(contexts) == context, matrix @ normalize(embedding), -np.inf)
+                best = int(scores.argmax())
+                if scores[best] >= self.threshold:
+                    row = self._conn.execute(
+                        "SELECT query, answer, sources, latency FROM answers WHERE id = ? AND created_at >= ?",
+                        (ids[best], time.time() - self.ttl)
+                    ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += row[3]
+        return {"query": row[0], "answer": row[1], "sources": json.loads(row[2])}
+
+    def put(self, topic_id: str, query: str, embedding: list[float], answer: str, sources: list[str], latency: float,
+            generation: int, context: str = "") -> bool:
+        """
+        Store an answer; latency is the time it took to produce, credited as saved on later hits.
+        context is the key the answer was looked up under. Returns False without storing if the topic was invalidated after `generation` was captured.
+        """
+        import numpy as np
+        with self._lock:
+            if self._generations.get(topic_id, self._generation_floor) != generation:
+                return False
+            now = time.time()
+            cursor = self._conn.execute(
+                "INSERT INTO answers (topic_id, query, embedding, answer, sources, latency, created_at, context) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (topic_id, query, json.dumps(list(map(float, embedding))), answer, json.dumps(sources), latency, now, context)
+            )
+            self._conn.execute(
+                "DELETE FROM answers WHERE topic_id = ? AND id NOT IN "
+                "(SELECT id FROM answers WHERE topic_id = ? ORDER BY id DESC LIMIT ?)",
+                (topic_id, topic_id, self.max_per_topic)
+            )
+            self._conn.commit()
+            if topic_id in self._topics:
+                ids, created, contexts, matrix = self._topics[topic_id]
+                row = normalize(embedding)[None, :]
+                ids, created, contexts = ids + [cursor.lastrowid], created + [now], contexts + [context]
+                matrix = row if matrix is None else np.vstack([matrix, row])
+                limit = self.max_per_topic
+                self._topics[topic_id] = (ids[-limit:], created[-limit:], contexts[-limit:], matrix[-limit:])
+        return True
+
+    def invalidate_topic(self, topic_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM answers WHERE topic_id = ?", (topic_id,))
+            self._conn.commit()
+            self._topics.pop(topic_id, None)
+            self._generation_counter += 1
+            self._generations[topic_id] = self._generation_counter
+            self._generations.move_to_end(topic_id)
+            while len(self._generations) > self.max_topics:
+                _, evicted = self._generations.popitem(last=False)
+                self._generation_floor = max(self._generation_floor, evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, topics = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT topic_id) FROM answers").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "entries": entries,
+                "topics": topics
+            }
+
+@lru_cache(maxsize=1)
+def get_answer_cache() -> AnswerCache:
+    return AnswerCache()
+
+def invalidate_topic_answers(topic_id: str) -> None:
+    if ANSWER_CACHE_ENABLED:
+        get_answer_cache().invalidate_topic(topic_id)
@@ -0,0 +1,237 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Three cache layers in one SQLite file:
+#   pages     - fetched bodies, keyed by final URL + ETag/Last-Modified (with a request URL alias)
+#   texts     - extracted text, keyed by the hash of the fetched body
+#   summaries - model summaries, keyed by the hash of the extracted text + prompt version
+CONTENT_CACHE_PATH = os.environ.get("CONTENT_CACHE_PATH", "content_cache.sqlite3")
+CONTENT_CACHE_MAX_BYTES = int(os.environ.get("CONTENT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+CONTENT_CACHE_TTL = float(os.environ.get("CONTENT_CACHE_TTL", str(30 * 24 * 3600)))
+# Entries older than the TTL are never served; they are deleted at startup and by a sweep
+# that runs on writes at most this often.
+CONTENT_CACHE_SWEEP_SECONDS = float(os.environ.get("CONTENT_CACHE_SWEEP_SECONDS", "3600"))
+# Pages younger than this are served without contacting the origin; older ones are revalidated.
+PAGE_FRESH_SECONDS = float(os.environ.get("PAGE_FRESH_SECONDS", str(24 * 3600)))
+
+LAYERS = ("pages", "texts", "summaries")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    final_url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    status_code INTEGER NOT NULL,
+    content_type TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS page_urls (
+    url TEXT PRIMARY KEY,
+    page_key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS texts (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS summaries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+"""
+
+def content_hash(data: bytes | str) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+@dataclass
+class CachedPage:
+    key: str
+    final_url: str
+    etag: str | None
+    last_modified: str | None
+    status_code: int
+    content_type: str
+    body: bytes
+    created_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() - self.created_at < PAGE_FRESH_SECONDS
+
+class ContentCache:
+    def __init__(self, path: str = CONTENT_CACHE_PATH, max_bytes: int = CONTENT_CACHE_MAX_BYTES, ttl: float = CONTENT_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self.hits = dict.fromkeys(LAYERS, 0)
+        self.misses = dict.fromkeys(LAYERS, 0)
+        # Running byte total of all layers, so writes do not rescan the tables.
+        self._total_bytes = 0
+        self._next_sweep = 0.0
+        self.evict_expired()
+
+    def _count(self, layer: str, hit: bool) -> None:
+        if hit:
+            self.hits[layer] += 1
+        else:
+            self.misses[layer] += 1
+
+    def _expired(self, created_at: float) -> bool:
+        return created_at < time.time() - self.ttl
+
+    def get_page(self, url: str) -> CachedPage | None:
+        """
+        Look up the page last fetched for url. Fresh entries count as hits; stale ones are returned
+        for conditional revalidation and expired ones not at all. The caller reports the outcome of
+        the network request with mark_page_revalidated or mark_page_miss.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.key, p.final_url, p.etag, p.last_modified, p.status_code, p.content_type, p.body, p.created_at "
+                "FROM page_urls u JOIN pages p ON p.key = u.page_key WHERE u.url = ? AND p.created_at >= ?",
+                (url, time.time() - self.ttl)
+            ).fetchone()
+            page = CachedPage(*row) if row else None
+            if page and page.fresh:
+                self._conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), page.key))
+                self._conn.commit()
+                self._count("pages", True)
+        return page
+
+    def mark_page_revalidated(self, page: CachedPage) -> None:
+        """The origin answered 304 Not Modified for a stale entry: restart its freshness window."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE pages SET created_at = ?, accessed_at = ? WHERE key = ?", (now, now, page.key))
+            self._conn.commit()
+            self._count("pages", True)
+        page.created_at = now
+
+    def mark_page_miss(self) -> None:
+        with self._lock:
+            self._count("pages", False)
+
+    def put_page(self, url: str, final_url: str, etag: str | None, last_modified: str | None,
+                 status_code: int, content_type: str, body: bytes) -> None:
+        key = content_hash(f"{final_url}\n{etag or ''}\n{last_modified or ''}")
+        now = time.time()
+        with self._lock:
+            self._total_bytes += len(body) - self._stored_size("pages", key)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, final_url, etag, last_modified, status_code, content_type, body, len(body), now, now)
+            )
+            self._conn.execute("INSERT OR REPLACE INTO page_urls VALUES (?, ?)", (url, key))
+            self._conn.execute("INSERT OR REPLACE INTO page_urls VALUES (?, ?)", (final_url, key))
+            self._conn.commit()
+        self._after_write()
+
+    def _stored_size(self, layer: str, key: str) -> int:
+        row = self._conn.execute(f"SELECT size FROM {layer} WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _get_value(self, layer: str, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, created_at FROM {layer} WHERE key = ?", (key,)).fetchone()
+            if row and self._expired(row[1]):
+                row = None
+            if row:
+                self._conn.execute(f"UPDATE {layer} SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+            self._count(layer, row is not None)
+        return row[0] if row else None
+
+    def _put_value(self, layer: str, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._total_bytes += size - self._stored_size(layer, key)
+            self._conn.execute(f"INSERT OR REPLACE INTO {layer} VALUES (?, ?, ?, ?, ?)", (key, value, size, now, now))
+            self._conn.commit()
+        self._after_write()
+
+    def _after_write(self) -> None:
+        if time.time() >= self._next_sweep:
+            self.evict_expired()
+        if self._total_bytes > self.max_bytes:
+            self.enforce_size()
+
+    def get_text(self, body_hash: str) -> str | None:
+        return self._get_value("texts", body_hash)
+
+    def put_text(self, body_hash: str, text: str) -> None:
+        self._put_value("texts", body_hash, text)
+
+    def get_summary(self, text_hash: str, prompt_version: str) -> str | None:
+        return self._get_value("summaries", f"{text_hash}:{prompt_version}")
+
+    def put_summary(self, text_hash: str, prompt_version: str, summary: str) -> None:
+        self._put_value("summaries", f"{text_hash}:{prompt_version}", summary)
+
+    def evict_expired(self) -> None:
+        """Delete entries older than the TTL and recount the stored bytes."""
+        now = time.time()
+        with self._lock:
+            for layer in LAYERS:
+                self._conn.execute(f"DELETE FROM {layer} WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute("DELETE FROM page_urls WHERE page_key NOT IN (SELECT key FROM pages)")
+            self._conn.commit()
+            self._total_bytes = sum(self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {layer}").fetchone()[0] for layer in LAYERS)
+            self._next_sweep = now + CONTENT_CACHE_SWEEP_SECONDS
+
+    def enforce_size(self) -> None:
+        """Evict least recently used entries across all layers until the cache fits in max_bytes."""
+        with self._lock:
+            total = self._total_bytes
+            if total <= self.max_bytes:
+                return
+            entries = self._conn.execute(
+                " UNION ALL ".join(f"SELECT '{layer}', key, size, accessed_at FROM {layer}" for layer in LAYERS)
+                + " ORDER BY accessed_at"
+            ).fetchall()
+            for layer, key, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute(f"DELETE FROM {layer} WHERE key = ?", (key,))
+                total -= size
+            self._conn.execute("DELETE FROM page_urls WHERE page_key NOT IN (SELECT key FROM pages)")
+            self._conn.commit()
+            self._total_bytes = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {}
+            for layer in LAYERS:
+                entries, size = self._conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {layer}").fetchone()
+                lookups = self.hits[layer] + self.misses[layer]
+                stats[layer] = {
+                    "hits": self.hits[layer],
+                    "misses": self.misses[layer],
+                    "hit_rate": round(self.hits[layer] / lookups, 3) if lookups else 0.0,
+                    "entries": entries,
+                    "bytes": size
+                }
+        return stats
+
+@lru_cache(maxsize=1)
+def get_content_cache() -> ContentCache:
+    return ContentCache()
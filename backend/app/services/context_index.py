@@ -0,0 +1,34 @@
+import numpy as np
+
+# Retrieval context for summaries comes from the papers scraped in the same request, not from
+# a process-wide collection: a ContextIndex is built per summarize call and dropped when the
+# call returns, so nothing accumulates across topics. A request holds at most a few dozen
+# papers, so an exact cosine top-k over one NumPy matrix is faster than a vector database.
+
+class ContextIndex:
+    """Exact top-k cosine search over a small, fixed set of texts and their embeddings."""
+
+    def __init__(self, texts: list[str], vectors: list[list[float]]):
+        self.texts = list(texts)
+        if self.texts:
+            matrix = np.asarray(vectors, dtype=np.float32).reshape(len(self.texts), -1)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self._matrix = matrix / np.clip(norms, 1e-12, None)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def search(self, vector: list[float], k: int = 3, exclude: str | None = None) -> list[str]:
+        """The k texts most similar to vector, skipping any text equal to exclude (the query paper itself)."""
+        if not self.texts or k <= 0:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        scores = self._matrix @ (query / max(float(np.linalg.norm(query)), 1e-12))
+        if exclude is not None:
+            scores[[i for i, text in enumerate(self.texts) if text == exclude]] = -np.inf
+        count = min(k, len(self.texts))
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top])]
+        return [self.texts[i] for i in top if np.isfinite(scores[i])]
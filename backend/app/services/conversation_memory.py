@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import os
+import re
+import weakref
+from functools import lru_cache
+from typing import List
+from services.providers import get_llm
+
+# Q&A conversation memory. The most recent turns are sent verbatim up to MEMORY_TOKEN_BUDGET
+# tokens (and at most MEMORY_MAX_MESSAGES messages); everything older is folded into a
+# running summary stored on the topic as history_summary, capped at SUMMARY_MAX_TOKENS.
+# history_summarized_until is the created_at of the last message folded in, so each roll-up
+# only summarizes turns that left the verbatim window since the previous one.
+MEMORY_TOKEN_BUDGET = int(os.environ.get("MEMORY_TOKEN_BUDGET", "1500"))
+MEMORY_MAX_MESSAGES = int(os.environ.get("MEMORY_MAX_MESSAGES", "20"))
+SUMMARY_MAX_TOKENS = int(os.environ.get("SUMMARY_MAX_TOKENS", "400"))
+# Token counts use tiktoken's cl100k_base as an approximation of the served model's tokenizer.
+TOKENIZER_ENCODING = os.environ.get("TOKENIZER_ENCODING", "cl100k_base")
+# Per-message overhead for role markers in chat formats.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Words that make a question lean on earlier turns ("why does it work?", "explain that more").
+# Deliberately broad: a standalone question caught by it only loses the shared answer cache.
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|their|he|she|his|her|above|earlier|previous|previously|"
+    r"before|again|also|same|other|else|more|further|elaborate|expand|continue|instead|"
+    r"you said|you mentioned|what about|how about)\b|^\s*(and|but|so|or|why)\b",
+    re.IGNORECASE
+)
+
+SUMMARY_PROMPT = """
+You maintain a running summary of a conversation between a user and an assistant about research papers on '{topic}'.
+Update the summary with the new messages. Keep the questions asked, the papers and findings discussed, and any user preferences.
+Be concise: at most {max_words} words. Reply with the updated summary only.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+"""
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    import tiktoken
+    return tiktoken.get_encoding(TOKENIZER_ENCODING)
+
+def count_tokens(text: str) -> int:
+    return len(get_encoding().encode(text))
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    tokens = get_encoding().encode(text)
+    return text if len(tokens) <= max_tokens else get_encoding().decode(tokens[:max_tokens])
+
+def message_tokens(message: dict) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+def split_history(messages: List[dict], budget: int = MEMORY_TOKEN_BUDGET, max_messages: int = MEMORY_MAX_MESSAGES) -> tuple[List[dict], List[dict]]:
+    """
+    Split the conversation (chronological, system messages ignored) into (older, recent):
+    recent is the longest suffix within the token budget and message limit.
+    """
+    turns = [message for message in messages if message["role"] != "system"]
+    used, start = 0, len(turns)
+    while start > 0 and len(turns) - start < max_messages:
+        cost = message_tokens(turns[start - 1])
+        if used + cost > budget:
+            break
+        used += cost
+        start -= 1
+    return turns[:start], turns[start:]
+
+def memory_messages(summary: str, history: List[dict]) -> list:
+    """Chat messages carrying the conversation into the prompt: the summary, then recent turns verbatim."""
+    from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+    _, recent = split_history(history)
+    messages = []
+    if summary:
+        messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+    for message in recent:
+        cls = HumanMessage if message["role"] == "user" else AIMessage
+        messages.append(cls(content=message["content"]))
+    return messages
+
+def refers_to_conversation(query: str) -> bool:
+    """True if the question may only make sense given the earlier conversation."""
+    return FOLLOW_UP_PATTERN.search(query) is not None
+
+def conversation_key(summary: str, history: List[dict]) -> str:
+    """Hash of the memory a question is answered with: the summary and the recent turns sent verbatim."""
+    _, recent = split_history(history)
+    digest = hashlib.sha256(summary.encode())
+    for message in recent:
+        digest.update(f"\0{message['role']}\0{message['content']}".encode())
+    return digest.hexdigest()
+
+async def asummarize_turns(topic: str, summary: str, turns: List[dict]) -> str:
+    from langchain_core.messages import HumanMessage
+    prompt = SUMMARY_PROMPT.format(
+        topic=topic,
+        max_words=SUMMARY_MAX_TOKENS * 3 // 4,
+        summary=summary or "(empty)",
+        messages="\n".join(f"{message['role']}: {message['content']}" for message in turns)
+    )
+    response = await get_llm().ainvoke([HumanMessage(content=prompt)])
+    return truncate_tokens(response.content.strip(), SUMMARY_MAX_TOKENS)
+
+# A lock lives only while a roll-up holds or waits for it, so topics never asked about again
+# (or deleted) leave nothing behind.
+_roll_up_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+async def roll_up_history(repository, topic_id: str) -> bool:
+    """
+    Fold turns that have left the verbatim window into the topic's stored summary. Only messages
+    newer than history_summarized_until are sent to the model. Returns True if the summary changed.
+    """
+    lock = _roll_up_locks.get(topic_id)
+    if lock is None:
+        lock = _roll_up_locks[topic_id] = asyncio.Lock()
+    async with lock:
+        return await _roll_up_history(repository, topic_id)
+
+async def _roll_up_history(repository, topic_id: str) -> bool:
+    topic = await repository.get_topic(topic_id)
+    if not topic:
+        return False
+    messages = await repository.recent_messages(topic_id, 2 * MEMORY_MAX_MESSAGES)
+    older, _ = split_history(messages)
+    summarized_until = topic.get("history_summarized_until") or 0
+    new_turns = [message for message in older if message["created_at"] > summarized_until]
+    if not new_turns:
+        return False
+    summary = await asummarize_turns(topic["title"], topic.get("history_summary", ""), new_turns)
+    await repository.update_history_summary(topic_id, summary, new_turns[-1]["created_at"])
+    return True
@@ -0,0 +1,214 @@
+import hashlib
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from langchain_core.embeddings import Embeddings
+from services.telemetry import metrics
+
+# One embedding service per process. Texts submitted by concurrent callers are queued and a
+# single worker thread encodes them in batches of up to EMBEDDING_BATCH_SIZE, waiting at most
+# EMBEDDING_BATCH_WAIT_MS for a batch to fill. Vectors are kept in an LRU keyed by the text's
+# hash, and identical texts already being encoded share one result. Queries are queued ahead
+# of document batches, so a Q&A request is not stuck behind a topic being indexed.
+# EMBEDDING_BACKEND is "torch" (sentence-transformers) or "onnx" (onnxruntime, exported once
+# to EMBEDDING_ONNX_DIR and, with EMBEDDING_QUANTIZE=int8, dynamically quantized).
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+EMBEDDING_QUANTIZE = os.environ.get("EMBEDDING_QUANTIZE", "int8")
+EMBEDDING_ONNX_DIR = os.environ.get("EMBEDDING_ONNX_DIR", "onnx_models")
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.environ.get("EMBEDDING_BATCH_WAIT_MS", "5"))
+EMBEDDING_CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", "20000"))
+
+QUERY_PRIORITY = 0
+DOCUMENT_PRIORITY = 1
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class TorchEncoder:
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        return self.model.encode(texts, batch_size=len(texts), show_progress_bar=False).tolist()
+
+def onnx_model_dir(model_name: str, root: str = EMBEDDING_ONNX_DIR) -> str:
+    return os.path.join(root, model_name.replace("/", "--"))
+
+def pooling_mode(pooling) -> str:
+    """"cls" or "mean" for a sentence-transformers Pooling module (get_pooling_mode_str before v5, pooling_mode after)."""
+    if pooling is None:
+        return "mean"
+    if hasattr(pooling, "get_pooling_mode_str"):
+        return pooling.get_pooling_mode_str()
+    mode = pooling.pooling_mode
+    return mode if isinstance(mode, str) else "+".join(mode)
+
+def export_onnx_model(model_name: str, model_dir: str) -> None:
+    """
+    Export the sentence-transformers model's encoder to model_dir/model.onnx, with its
+    tokenizer, an int8 dynamically quantized copy and the pooling settings. Needs torch once;
+    loading the exported model afterwards does not.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    mode = pooling_mode(next((module for module in model if type(module).__name__ == "Pooling"), None))
+    if mode not in ("cls", "mean"):
+        raise ValueError(f"ONNX backend supports cls and mean pooling, not {mode!r}")
+    os.makedirs(model_dir, exist_ok=True)
+    model.tokenizer.save_pretrained(model_dir)
+    sample = model.tokenizer(["export"], return_tensors="pt")
+    # Positional order of the transformer's forward().
+    names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    axes = {0: "batch", 1: "sequence"}
+    torch.onnx.export(
+        model[0].auto_model,
+        tuple(sample[name] for name in names),
+        os.path.join(model_dir, "model.onnx"),
+        input_names=names,
+        output_names=["last_hidden_state"],
+        dynamic_axes={name: axes for name in names + ["last_hidden_state"]},
+        opset_version=14
+    )
+    quantize_dynamic(os.path.join(model_dir, "model.onnx"), os.path.join(model_dir, "model.int8.onnx"), weight_type=QuantType.QInt8)
+    with open(os.path.join(model_dir, "pooling.json"), "w") as file:
+        json.dump({
+            "mode": mode,
+            "normalize": any(type(module).__name__ == "Normalize" for module in model),
+            "max_length": model.max_seq_length
+        }, file)
+
+class OnnxEncoder:
+    def __init__(self, model_name: str, quantize: str = EMBEDDING_QUANTIZE, root: str = EMBEDDING_ONNX_DIR):
+        import onnxruntime
+        from transformers import AutoTokenizer
+        model_dir = onnx_model_dir(model_name, root)
+        if not os.path.exists(os.path.join(model_dir, "pooling.json")):
+            export_onnx_model(model_name, model_dir)
+        file_name = "model.int8.onnx" if quantize == "int8" else "model.onnx"
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(os.path.join(model_dir, file_name), options, providers=["CPUExecutionProvider"])
+        self.input_names = [input.name for input in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        with open(os.path.join(model_dir, "pooling.json")) as file:
+            self.pooling = json.load(file)
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        import numpy as np
+        inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=self.pooling["max_length"], return_tensors="np")
+        hidden = self.session.run(None, {name: inputs[name].astype(np.int64) for name in self.input_names})[0]
+        if self.pooling["mode"] == "cls":
+            vectors = hidden[:, 0]
+        else:
+            mask = inputs["attention_mask"][..., None].astype(hidden.dtype)
+            vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.pooling["normalize"]:
+            vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors.tolist()
+
+def create_encoder(model_name: str, backend: str = EMBEDDING_BACKEND):
+    if backend == "onnx":
+        return OnnxEncoder(model_name)
+    return TorchEncoder(model_name)
+
+class EmbeddingService(Embeddings):
+    """
+    LangChain Embeddings backed by a micro-batching worker thread and a text-hash cache. Safe to
+    call from any number of threads; each call blocks until its own texts are embedded.
+    """
+
+    def __init__(self, encoder, batch_size: int = EMBEDDING_BATCH_SIZE, batch_wait_ms: float = EMBEDDING_BATCH_WAIT_MS,
+                 cache_size: int = EMBEDDING_CACHE_SIZE):
+        self.encoder = encoder
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait_ms / 1000
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, list[float]] = OrderedDict()
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # (priority, sequence, key, text, future); the sequence keeps FIFO order within a priority.
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._worker: threading.Thread | None = None
+        self.cache_hits = 0
+        self.texts_embedded = 0
+        self.batches = 0
+
+    def _futures(self, texts: list[str], priority: int = DOCUMENT_PRIORITY) -> list[Future]:
+        futures, queued = [], []
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+            for text in texts:
+                key = text_key(text)
+                future = self._pending.get(key)
+                if future is None:
+                    future = Future()
+                    vector = self._cache.get(key)
+                    if vector is not None:
+                        self._cache.move_to_end(key)
+                        self.cache_hits += 1
+                        future.set_result(vector)
+                    else:
+                        self._pending[key] = future
+                        queued.append((priority, next(self._sequence), key, text, future))
+                futures.append(future)
+        for item in queued:
+            self._queue.put(item)
+        return futures
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            start = time.perf_counter()
+            try:
+                vectors = self.encoder.encode([text for _, _, _, text, _ in batch])
+            except Exception as e:
+                vectors, error = None, e
+            # The worker has no caller context to attach a span to, so batches are only timed.
+            metrics.observe("embed.batch", time.perf_counter() - start, vectors is None)
+            with self._lock:
+                self.batches += 1
+                for i, (_, _, key, _, future) in enumerate(batch):
+                    self._pending.pop(key, None)
+                    if vectors is None:
+                        future.set_exception(error)
+                        continue
+                    self._cache[key] = vectors[i]
+                    self.texts_embedded += 1
+                    future.set_result(vectors[i])
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [future.result() for future in self._futures(texts)]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._futures([text], QUERY_PRIORITY)[0].result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cache_hits": self.cache_hits,
+                "texts_embedded": self.texts_embedded,
+                "batches": self.batches,
+                "mean_batch_size": round(self.texts_embedded / self.batches, 2) if self.batches else 0.0,
+                "cached_vectors": len(self._cache)
+            }
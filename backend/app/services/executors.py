@@ -0,0 +1,43 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Blocking work is never run on the event loop or on Starlette's shared threadpool. It goes
+# to one of three sized pools, so a burst of topic creations cannot take the threads that
+# listing and Q&A requests need:
+#   cpu   - CPU-bound parsing and vector store calls that embed or search (CPU_WORKERS)
+#   heavy - blocking steps of background jobs such as topic indexing (HEAVY_WORKERS)
+#   light - short blocking calls on request paths: index lookups, SQLite caches (LIGHT_WORKERS)
+# PDFs are parsed in their own process pool (services.pdf_extractor) and embeddings are
+# batched on the embedding service's own thread.
+CPU_WORKERS = int(os.environ.get("CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+HEAVY_WORKERS = int(os.environ.get("HEAVY_WORKERS", "4"))
+LIGHT_WORKERS = int(os.environ.get("LIGHT_WORKERS", "16"))
+
+POOL_SIZES = {"cpu": CPU_WORKERS, "heavy": HEAVY_WORKERS, "light": LIGHT_WORKERS}
+
+_executors: dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+def get_executor(pool: str) -> ThreadPoolExecutor:
+    with _executors_lock:
+        executor = _executors.get(pool)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=POOL_SIZES[pool], thread_name_prefix=f"{pool}-pool")
+            _executors[pool] = executor
+        return executor
+
+async def run_in_pool(pool: str, func, *args, **kwargs):
+    """Run a blocking function on the named pool and await its result, keeping the caller's context (e.g. the current span)."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(pool), functools.partial(context.run, func, *args, **kwargs))
+
+def shutdown_executors() -> None:
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+class FakeRateLimitError(Exception):
+    """Mimics the 429 raised by the Groq client, including a Retry-After header."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Rate limit reached")
+        self.status_code = 429
+        self.response = type("Response", (), {"headers": {"retry-after": str(retry_after)}})()
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic offline stand-in for ChatGroq, used for benchmarks.
+
+    Every call sleeps for `latency` seconds; streamed calls then emit one word every
+    `token_latency` seconds. When `max_concurrency` is set, calls beyond
+    that many in flight fail with a FakeRateLimitError, like a provider enforcing a limit.
+    """
+
+    latency: float = 0.5
+    token_latency: float = 0.01
+    max_concurrency: Optional[int] = None
+    retry_after: float = 0.1
+    _in_flight: int = PrivateAttr(default=0)
+    calls: int = 0
+    rate_limited: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def respond(self, messages: list[BaseMessage]) -> str:
+        system = messages[0].content if messages else ""
+        prompt = messages[-1].content if messages else ""
+        if "summarizing academic papers" in system:
+            content = prompt.split("Content:", 1)[-1].split("\nContext:", 1)[0].strip()
+            summary = {"authors": [], "summary": f"Summary: {content[:200]}"}
+            return f"```json\n{json.dumps(summary)}\n```"
+        return f"Answer based on {len(prompt)} characters of context."
+
+    def _enter(self) -> None:
+        if self.max_concurrency is not None and self._in_flight >= self.max_concurrency:
+            self.rate_limited += 1
+            raise FakeRateLimitError(self.retry_after)
+        self._in_flight += 1
+        self.calls += 1
+
+    def usage(self, messages: list[BaseMessage], content: str) -> dict:
+        """Word counts standing in for token usage, so offline runs report LLM usage too."""
+        input_tokens = sum(len(str(message.content).split()) for message in messages)
+        output_tokens = len(content.split())
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _result(self, messages: list[BaseMessage]) -> ChatResult:
+        content = self.respond(messages)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content, usage_metadata=self.usage(messages, content)))])
+
+    def _generate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            return self._result(messages)
+        finally:
+            self._in_flight -= 1
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: Optional[list[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        self._enter()
+        try:
+            await asyncio.sleep(self.latency)
+            return self._result(messages)
+        finally:
+            self._in_flight -= 1
+
+    async def _astream(self, messages: list[BaseMessage], stop: Optional[list[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self._enter()
+        try:
+            await asyncio.sleep(self.latency)
+            content = self.respond(messages)
+            words = content.split(" ")
+            for i, word in enumerate(words):
+                if i:
+                    await asyncio.sleep(self.token_latency)
+                # Usage is reported on the last chunk, as providers do when streaming.
+                usage = self.usage(messages, content) if i == len(words) - 1 else None
+                yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else f" {word}", usage_metadata=usage))
+        finally:
+            self._in_flight -= 1
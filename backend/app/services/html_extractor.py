@@ -0,0 +1,128 @@
+import json
+import os
+import re
+from dataclasses import dataclass, field, asdict
+
+# Publisher pages are parsed with lxml. The abstract comes from citation/Dublin Core
+# metadata or JSON-LD when the page has it, otherwise from an "Abstract" heading, and last
+# from og:description; the conclusion comes from a "Conclusion(s)" heading. Only headings
+# are matched, so navigation links that say "Abstract" are ignored. With
+# HTML_FULL_TEXT=false the walk stops as soon as both sections are complete instead of
+# collecting the whole page. Each block contributes only the text outside its nested blocks,
+# so nested lists and quotes are not repeated; pages whose text is mostly outside any block
+# fall back to the whole body text.
+HTML_FULL_TEXT = os.environ.get("HTML_FULL_TEXT", "true").lower() == "true"
+SECTION_MAX_CHARS = 4000
+# Below this share of the body's text, the block walk missed the page's content.
+MIN_BLOCK_TEXT_RATIO = 0.5
+# Part of the content cache key; bump when the extracted output changes.
+EXTRACTOR_VERSION = 2
+
+BOILERPLATE_TAGS = ("header", "footer", "nav", "aside", "script", "style", "noscript", "button", "svg")
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+BLOCK_TAGS = HEADING_TAGS + ("p", "li", "blockquote", "figcaption", "td", "th", "dt", "dd", "pre", "div", "section", "article")
+ABSTRACT_HEADING = re.compile(r"^\s*(abstract|summary)\b", re.IGNORECASE)
+CONCLUSION_HEADING = re.compile(
+    r"^\s*([\dIVX]+\.?\s*)?(conclusions?|concluding remarks|summary and conclusions?|discussion and conclusions?)\b",
+    re.IGNORECASE
+)
+ABSTRACT_META = ("citation_abstract", "dc.description", "dcterms.abstract")
+DESCRIPTION_META = ("og:description", "twitter:description", "description")
+
+@dataclass
+class HtmlSections:
+    title: str = ""
+    abstract: str = ""
+    conclusion: str = ""
+    sections: list[dict] = field(default_factory=list)
+    full_text: str = ""
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+def clean(text: str | None) -> str:
+    return " ".join((text or "").split())
+
+def own_text(element) -> str:
+    """Text of element, leaving out nested blocks (they are visited on their own)."""
+    parts = [element.text or ""]
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in BLOCK_TAGS:
+            parts.append(own_text(child))
+        parts.append(child.tail or "")
+    return clean(" ".join(parts))
+
+def meta_content(tree, names: tuple[str, ...]) -> str:
+    values = {}
+    for meta in tree.iter("meta"):
+        key = (meta.get("name") or meta.get("property") or "").lower()
+        if key in names and key not in values and meta.get("content"):
+            values[key] = clean(meta.get("content"))
+    return next((values[name] for name in names if name in values), "")
+
+def json_ld_abstract(tree) -> str:
+    def find(node) -> str:
+        if isinstance(node, list):
+            return next((found for found in map(find, node) if found), "")
+        if isinstance(node, dict):
+            for key in ("abstract", "description"):
+                if isinstance(node.get(key), str) and node[key].strip():
+                    return clean(node[key])
+            return find(node.get("@graph", []))
+        return ""
+
+    for script in tree.iter("script"):
+        if (script.get("type") or "").lower() != "application/ld+json":
+            continue
+        try:
+            found = find(json.loads(script.text or ""))
+        except ValueError:
+            continue
+        if found:
+            return found
+    return ""
+
+def extract_html_sections(html: str | bytes, full_text: bool = HTML_FULL_TEXT) -> HtmlSections:
+    """Title, abstract, conclusion and heading-delimited sections of a page, plus its text."""
+    import lxml.html
+    from lxml import etree
+
+    tree = lxml.html.fromstring(html)
+    result = HtmlSections(
+        title=meta_content(tree, ("citation_title", "og:title", "dc.title")) or clean(tree.findtext(".//title")),
+        abstract=meta_content(tree, ABSTRACT_META) or json_ld_abstract(tree)
+    )
+    description = meta_content(tree, DESCRIPTION_META)
+    etree.strip_elements(tree, *BOILERPLATE_TAGS, with_tail=False)
+
+    abstract_from_meta = bool(result.abstract)
+    heading, texts, section_texts = "", [], []
+    for element in tree.iter(*BLOCK_TAGS):
+        text = own_text(element)
+        if not text:
+            continue
+        if element.tag in HEADING_TAGS:
+            if heading or section_texts:
+                result.sections.append({"heading": heading, "text": " ".join(section_texts)})
+            heading, section_texts = text, []
+            if not full_text and result.abstract and result.conclusion:
+                break
+        else:
+            section_texts.append(text)
+            if not abstract_from_meta and ABSTRACT_HEADING.match(heading) and len(result.abstract) < SECTION_MAX_CHARS:
+                result.abstract = clean(f"{result.abstract} {text}")
+            elif CONCLUSION_HEADING.match(heading) and len(result.conclusion) < SECTION_MAX_CHARS:
+                result.conclusion = clean(f"{result.conclusion} {text}")
+        texts.append(text)
+    else:
+        if heading or section_texts:
+            result.sections.append({"heading": heading, "text": " ".join(section_texts)})
+        body = tree.find(".//body")
+        body_text = clean(" ".join((body if body is not None else tree).itertext()))
+        if sum(map(len, texts)) < MIN_BLOCK_TEXT_RATIO * len(body_text):
+            texts = [body_text]
+            if not result.sections:
+                result.sections.append({"heading": "", "text": body_text})
+    result.abstract = result.abstract or description
+    result.full_text = "\n".join(texts)
+    return result
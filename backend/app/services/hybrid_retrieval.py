@@ -0,0 +1,286 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, List
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# Hybrid retrieval for Q&A: an in-process BM25 index per topic, fused with dense results by
+# reciprocal rank fusion, optionally reranked by a CPU cross-encoder within a latency budget.
+# Selected with QNA_RETRIEVER=hybrid; BM25 is only maintained in that mode. Chunks are
+# persisted row by row in one SQLite file next to the vector indexes, so adding or removing
+# a paper writes only its own chunks.
+QNA_RETRIEVER = os.environ.get("QNA_RETRIEVER", "dense")
+QNA_RERANK = os.environ.get("QNA_RERANK", "false").lower() == "true"
+RERANK_MODEL_NAME = os.environ.get("RERANK_MODEL_NAME", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_BUDGET_MS = float(os.environ.get("RERANK_BUDGET_MS", "150"))
+BM25_PATH = os.path.join(os.environ.get("CHROMA_PERSIST_DIR", "chroma_db"), "bm25.sqlite3")
+RRF_K = 60
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+def chunk_key(metadata: dict) -> str:
+    return f"{metadata.get('paper_id', '')}:{metadata.get('chunk', 0)}"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    topic_id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    topic_id TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    PRIMARY KEY (topic_id, doc_id)
+);
+CREATE INDEX IF NOT EXISTS chunks_paper ON chunks (topic_id, paper_id);
+"""
+
+class BM25Store:
+    """Persisted BM25 chunks. A topic row marks an index as built, even when it has no chunks."""
+
+    def __init__(self, path: str = BM25_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def exists(self, topic_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM topics WHERE topic_id = ?", (topic_id,)).fetchone() is not None
+
+    def load(self, topic_id: str) -> dict[str, dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT doc_id, text, metadata FROM chunks WHERE topic_id = ?", (topic_id,)).fetchall()
+        return {doc_id: {"text": text, "metadata": json.loads(metadata)} for doc_id, text, metadata in rows}
+
+    def upsert(self, topic_id: str, ids: list[str], texts: list[str], metadatas: list[dict]) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO topics VALUES (?)", (topic_id,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?)",
+                [(topic_id, doc_id, metadata.get("paper_id", ""), text, json.dumps(metadata))
+                 for doc_id, text, metadata in zip(ids, texts, metadatas)]
+            )
+            self._conn.commit()
+
+    def remove_paper(self, topic_id: str, paper_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks WHERE topic_id = ? AND paper_id = ?", (topic_id, paper_id))
+            self._conn.commit()
+
+    def delete(self, topic_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks WHERE topic_id = ?", (topic_id,))
+            self._conn.execute("DELETE FROM topics WHERE topic_id = ?", (topic_id,))
+            self._conn.commit()
+
+_bm25_store: BM25Store | None = None
+
+def get_bm25_store() -> BM25Store:
+    global _bm25_store
+    if _bm25_store is None:
+        _bm25_store = BM25Store()
+    return _bm25_store
+
+class BM25Index:
+    """Okapi BM25 over a topic's chunks, with an inverted index kept up to date on add/remove."""
+
+    def __init__(self, topic_id: str | None = None, store: BM25Store | None = None, k1: float = 1.5, b: float = 0.75):
+        self.topic_id = topic_id
+        self.store = store
+        self.k1 = k1
+        self.b = b
+        self.documents: dict[str, dict] = {}
+        self._postings: dict[str, dict[str, int]] = defaultdict(dict)
+        self._lengths: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _index(self, doc_id: str, text: str) -> None:
+        terms = Counter(tokenize(text))
+        for term, count in terms.items():
+            self._postings[term][doc_id] = count
+        self._lengths[doc_id] = sum(terms.values())
+
+    def _unindex(self, doc_id: str) -> None:
+        for term in set(tokenize(self.documents[doc_id]["text"])):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._lengths.pop(doc_id, None)
+
+    def add(self, ids: list[str], texts: list[str], metadatas: list[dict]) -> None:
+        with self._lock:
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                if doc_id in self.documents:
+                    self._unindex(doc_id)
+                self.documents[doc_id] = {"text": text, "metadata": metadata}
+                self._index(doc_id, text)
+        if self.store is not None:
+            self.store.upsert(self.topic_id, ids, texts, metadatas)
+
+    def remove_paper(self, paper_id: str) -> None:
+        with self._lock:
+            for doc_id in [doc_id for doc_id, doc in self.documents.items() if doc["metadata"].get("paper_id") == paper_id]:
+                self._unindex(doc_id)
+                del self.documents[doc_id]
+        if self.store is not None:
+            self.store.remove_paper(self.topic_id, paper_id)
+
+    def search(self, query: str, k: int) -> list[tuple[str, float]]:
+        with self._lock:
+            if not self.documents:
+                return []
+            total = len(self.documents)
+            avg_length = sum(self._lengths.values()) / total
+            scores: dict[str, float] = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = 1 - self.b + self.b * self._lengths[doc_id] / avg_length
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return sorted(scores.items(), key=lambda item: -item[1])[:k]
+
+    def document(self, doc_id: str) -> Document:
+        doc = self.documents[doc_id]
+        return Document(page_content=doc["text"], metadata=doc["metadata"])
+
+    @classmethod
+    def load(cls, topic_id: str, store: BM25Store) -> "BM25Index":
+        index = cls(topic_id, store)
+        index.documents = store.load(topic_id)
+        for doc_id, doc in index.documents.items():
+            index._index(doc_id, doc["text"])
+        return index
+
+_bm25_indexes: dict[str, BM25Index] = {}
+_bm25_lock = threading.Lock()
+
+def get_bm25_index(topic_id: str, vectorstore: Any = None) -> BM25Index:
+    """
+    Load the topic's BM25 index. Topics indexed while hybrid retrieval was off have no stored
+    BM25 chunks; their index is rebuilt once from the chunks stored in the vectorstore.
+    """
+    with _bm25_lock:
+        index = _bm25_indexes.get(topic_id)
+        if index is None:
+            store = get_bm25_store()
+            if store.exists(topic_id):
+                index = BM25Index.load(topic_id, store)
+            else:
+                index = BM25Index(topic_id, store)
+                stored = vectorstore.get(include=["documents", "metadatas"]) if vectorstore is not None else {"ids": []}
+                index.add(
+                    [chunk_key(metadata) for metadata in stored.get("metadatas") or []],
+                    stored.get("documents") or [],
+                    stored.get("metadatas") or []
+                )
+            _bm25_indexes[topic_id] = index
+        return index
+
+def delete_bm25_index(topic_id: str) -> None:
+    with _bm25_lock:
+        _bm25_indexes.pop(topic_id, None)
+        get_bm25_store().delete(topic_id)
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = RRF_K) -> list[str]:
+    scores: dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] += 1 / (k + rank + 1)
+    return sorted(scores, key=lambda key: -scores[key])
+
+class CrossEncoderReranker:
+    """
+    Reranks the head of a candidate list with a cross-encoder. The number of candidates
+    scored is chosen from a running estimate of per-pair latency so a call stays within
+    budget_ms; the remaining candidates keep their fused order.
+    """
+
+    def __init__(self, model_name: str = RERANK_MODEL_NAME, budget_ms: float = RERANK_BUDGET_MS):
+        self.model_name = model_name
+        self.budget_ms = budget_ms
+        self.ms_per_pair = 5.0
+        self._model = None
+
+    def _get_model(self):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+            self._model = CrossEncoder(self.model_name)
+        return self._model
+
+    def rerank(self, query: str, docs: list[Document]) -> list[Document]:
+        count = min(len(docs), int(self.budget_ms / self.ms_per_pair))
+        if count < 2:
+            return docs
+        model = self._get_model()
+        start = time.perf_counter()
+        scores = model.predict([(query, doc.page_content) for doc in docs[:count]])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.ms_per_pair = 0.8 * self.ms_per_pair + 0.2 * (elapsed_ms / count)
+        head = [doc for _, doc in sorted(zip(scores, docs[:count]), key=lambda item: -item[0])]
+        return head + docs[count:]
+
+_reranker: CrossEncoderReranker | None = None
+
+def get_reranker() -> CrossEncoderReranker:
+    global _reranker
+    if _reranker is None:
+        _reranker = CrossEncoderReranker()
+    return _reranker
+
+def dedupe_by_paper(docs: list[Document], k: int) -> list[Document]:
+    results, seen = [], set()
+    for doc in docs:
+        paper_id = doc.metadata.get("paper_id")
+        if paper_id in seen:
+            continue
+        seen.add(paper_id)
+        results.append(doc)
+        if len(results) == k:
+            break
+    return results
+
+class HybridRetriever(BaseRetriever):
+    """Dense + BM25 chunk retrieval fused with RRF, optional rerank, one chunk per paper."""
+
+    vectorstore: Any
+    bm25: Any
+    k: int = 3
+    fetch_k: int = 12
+    reranker: Any = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        candidates: dict[str, Document] = {}
+        dense = []
+        for doc in self.vectorstore.similarity_search(query, k=self.fetch_k):
+            key = chunk_key(doc.metadata)
+            candidates.setdefault(key, doc)
+            dense.append(key)
+        sparse = []
+        for key, _ in self.bm25.search(query, self.fetch_k):
+            candidates.setdefault(key, self.bm25.document(key))
+            sparse.append(key)
+        fused = [candidates[key] for key in reciprocal_rank_fusion([dense, sparse])]
+        if self.reranker is not None:
+            fused = self.reranker.rerank(query, fused)
+        return dedupe_by_paper(fused, self.k)
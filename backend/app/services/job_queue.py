@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable
+from uuid import uuid4
+from services.executors import run_in_pool
+
+logger = logging.getLogger(__name__)
+
+# Long-running work (topic creation) is persisted to a local SQLite queue and executed by a
+# small pool of worker tasks on the application's event loop; handlers push blocking work
+# to the pools in services.executors themselves. Several processes may share the queue file:
+# a claimed job records its owner, which refreshes the job's heartbeat every
+# JOB_HEARTBEAT_INTERVAL seconds. Running jobs whose heartbeat is older than JOB_STALE_AFTER
+# (their process stopped or crashed) are queued again, so interrupted jobs are picked up by
+# the next start or by another live process without taking over jobs that are still running.
+JOB_QUEUE_PATH = os.environ.get("JOB_QUEUE_PATH", "jobs.sqlite3")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_HEARTBEAT_INTERVAL = float(os.environ.get("JOB_HEARTBEAT_INTERVAL", "10"))
+JOB_STALE_AFTER = float(os.environ.get("JOB_STALE_AFTER", "60"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    owner TEXT,
+    heartbeat REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+# A handler receives the job payload and an async callback used to report progress steps;
+# the callback writes to SQLite on the "light" pool, so awaiting it never blocks the loop.
+JobHandler = Callable[[dict, Callable[[str], Awaitable[None]]], Awaitable[dict]]
+
+class JobQueue:
+    def __init__(self, path: str = JOB_QUEUE_PATH, workers: int = JOB_WORKERS,
+                 heartbeat_interval: float = JOB_HEARTBEAT_INTERVAL, stale_after: float = JOB_STALE_AFTER):
+        self.workers = workers
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._handlers: dict[str, JobHandler] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Progress is written after every graph node; in WAL mode this skips the fsync per commit
+        # (a crash can lose the last updates, never corrupt the queue).
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {column[1] for column in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, declaration in (("owner", "TEXT"), ("heartbeat", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {declaration}")
+        self._conn.commit()
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cursor
+
+    def submit(self, kind: str, payload: dict) -> str:
+        job_id = uuid4().hex
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, kind, payload, status, progress, created_at, updated_at) VALUES (?, ?, ?, 'queued', '[]', ?, ?)",
+            (job_id, kind, json.dumps(payload), now, now)
+        )
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, status, progress, result, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if not row:
+            return None
+        id, kind, status, progress, result, error, created_at, updated_at = row
+        return {
+            "id": id,
+            "kind": kind,
+            "status": status,
+            "progress": json.loads(progress),
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+    def _claim_next(self) -> tuple[str, str, dict] | None:
+        """Claim the oldest queued job. Another process may claim the same row first; then try the next one."""
+        with self._lock:
+            while True:
+                row = self._conn.execute(
+                    "SELECT id, kind, payload FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if not row:
+                    return None
+                now = time.time()
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, heartbeat = ?, updated_at = ? WHERE id = ? AND status = 'queued'",
+                    (self.owner, now, now, row[0])
+                ).rowcount
+                self._conn.commit()
+                if claimed == 1:
+                    return row[0], row[1], json.loads(row[2])
+
+    def _heartbeat(self) -> None:
+        self._execute("UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = 'running'", (time.time(), self.owner))
+
+    def _requeue_stale(self) -> int:
+        """Queue running jobs again whose owner stopped sending heartbeats; returns how many."""
+        now = time.time()
+        return self._execute(
+            "UPDATE jobs SET status = 'queued', owner = NULL, updated_at = ? "
+            "WHERE status = 'running' AND (heartbeat IS NULL OR heartbeat < ?)",
+            (now, now - self.stale_after)
+        ).rowcount
+
+    def _report_progress(self, job_id: str, step: str) -> None:
+        with self._lock:
+            (progress,) = self._conn.execute("SELECT progress FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            steps = json.loads(progress) + [step]
+            self._conn.execute(
+                "UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(steps), time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def _finish(self, job_id: str, status: str, result: dict | None = None, error: str | None = None) -> None:
+        # A job re-queued as stale and claimed by another process is no longer ours to finish.
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ? AND owner = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id, self.owner)
+        )
+
+    async def _worker(self) -> None:
+        while True:
+            job = await run_in_pool("light", self._claim_next)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            job_id, kind, payload = job
+            handler = self._handlers.get(kind)
+            if handler is None:
+                await run_in_pool("light", self._finish, job_id, "failed", error=f"No handler registered for job kind '{kind}'")
+                continue
+            try:
+                result = await handler(payload, lambda step: run_in_pool("light", self._report_progress, job_id, step))
+                await run_in_pool("light", self._finish, job_id, "succeeded", result=result)
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", job_id, kind)
+                await run_in_pool("light", self._finish, job_id, "failed", error=str(e))
+
+    async def _keep_alive(self) -> None:
+        """Refresh the heartbeat of this process's jobs and re-queue jobs of processes that stopped."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            await run_in_pool("light", self._heartbeat)
+            if await run_in_pool("light", self._requeue_stale):
+                self._wakeup.set()
+
+    def start(self, handlers: dict[str, JobHandler]) -> None:
+        """
+        Register handlers, re-queue jobs whose process stopped and start the worker tasks.
+        Must be called from the running event loop (the FastAPI lifespan hook).
+        """
+        self._handlers.update(handlers)
+        self._requeue_stale()
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [self._loop.create_task(self._worker(), name=f"job-worker-{i}") for i in range(self.workers)]
+        self._tasks.append(self._loop.create_task(self._keep_alive(), name="job-heartbeat"))
+
+    async def stop(self) -> None:
+        """
+        Stop the workers. Jobs still running stay 'running' and are re-queued once their
+        heartbeat is older than stale_after, by the next start or another live process.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._loop = None
+
+@lru_cache(maxsize=1)
+def get_job_queue() -> JobQueue:
+    return JobQueue()
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass
+from urllib.parse import urlparse
+import httpx
+from services.content_cache import ContentCache, content_hash
+from services.executors import run_in_pool
+
+# A global cap on in-flight requests plus per-host politeness limits. These replace the
+# old random 1-3s sleep before every fetch: different publishers are fetched in parallel,
+# while requests to the same host are capped and spaced out.
+MAX_CONCURRENT_FETCHES = int(os.environ.get("MAX_CONCURRENT_FETCHES", "8"))
+MAX_FETCHES_PER_HOST = int(os.environ.get("MAX_FETCHES_PER_HOST", "2"))
+HOST_MIN_INTERVAL = float(os.environ.get("HOST_MIN_INTERVAL", "1.0"))
+FETCH_TIMEOUT = float(os.environ.get("FETCH_TIMEOUT", "10"))
+# Bodies are streamed and the download is abandoned once it exceeds this size.
+MAX_RESPONSE_BYTES = int(os.environ.get("MAX_RESPONSE_BYTES", str(25 * 1024 * 1024)))
+
+COMMON_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://scholar.google.com/",
+    "Upgrade-Insecure-Requests": "1",
+    "Connection": "keep-alive",
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "same-origin"
+}
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.1 Safari/605.1.15"
+]
+
+class ResponseTooLarge(Exception):
+    pass
+
+@dataclass
+class FetchedPage:
+    url: str
+    final_url: str
+    status_code: int
+    content_type: str
+    body: bytes
+
+    @property
+    def content_hash(self) -> str:
+        return content_hash(self.body)
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    @property
+    def is_pdf(self) -> bool:
+        return (
+            self.body.startswith(b"%PDF")
+            or "application/pdf" in self.content_type
+            or self.final_url.lower().endswith(".pdf")
+        )
+
+class HostLimiter:
+    """Caps concurrent requests per host and spaces request starts to the same host by min_interval."""
+
+    def __init__(self, max_per_host: int = MAX_FETCHES_PER_HOST, min_interval: float = HOST_MIN_INTERVAL):
+        self.max_per_host = max_per_host
+        self.min_interval = min_interval
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    async def acquire(self, host: str) -> None:
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        await semaphore.acquire()
+        now = time.monotonic()
+        start = max(now, self._next_start.get(host, now))
+        self._next_start[host] = start + self.min_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def release(self, host: str) -> None:
+        self._semaphores[host].release()
+
+class PaperFetcher:
+    """
+    Async HTTP client for paper links. Must be used as an async context manager inside the
+    event loop that runs the fetches, since the limits are bound to that loop.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_FETCHES, host_limiter: HostLimiter | None = None,
+                 transport: httpx.AsyncBaseTransport | None = None, cache: ContentCache | None = None,
+                 max_bytes: int = MAX_RESPONSE_BYTES):
+        self._cache = cache
+        self.max_bytes = max_bytes
+        self._global_limit = asyncio.Semaphore(max_concurrency)
+        self._host_limiter = host_limiter or HostLimiter()
+        self._client = httpx.AsyncClient(
+            headers=COMMON_HEADERS,
+            follow_redirects=True,
+            timeout=FETCH_TIMEOUT,
+            transport=transport
+        )
+
+    async def __aenter__(self) -> "PaperFetcher":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._client.aclose()
+
+    async def _get(self, url: str, headers: dict) -> tuple[httpx.Response, bytes]:
+        async with self._client.stream("GET", url, headers=headers) as response:
+            if int(response.headers.get("content-length") or 0) > self.max_bytes:
+                raise ResponseTooLarge(f"{url} is larger than {self.max_bytes} bytes")
+            chunks, size = [], 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ResponseTooLarge(f"{url} is larger than {self.max_bytes} bytes")
+                chunks.append(chunk)
+        return response, b"".join(chunks)
+
+    async def fetch(self, url: str) -> FetchedPage:
+        # Cache calls hit SQLite (and page bodies can be megabytes), so they run on the "light" pool.
+        cached = await run_in_pool("light", self._cache.get_page, url) if self._cache else None
+        if cached and cached.fresh:
+            return FetchedPage(url, cached.final_url, cached.status_code, cached.content_type, cached.body)
+
+        headers = {"User-Agent": random.choice(USER_AGENTS)}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        host = urlparse(url).netloc
+        async with self._global_limit:
+            await self._host_limiter.acquire(host)
+            try:
+                response, body = await self._get(url, headers)
+            finally:
+                self._host_limiter.release(host)
+
+        if cached and response.status_code == 304:
+            await run_in_pool("light", self._cache.mark_page_revalidated, cached)
+            return FetchedPage(url, cached.final_url, cached.status_code, cached.content_type, cached.body)
+
+        page = FetchedPage(
+            url=url,
+            final_url=str(response.url),
+            status_code=response.status_code,
+            content_type=response.headers.get("content-type", ""),
+            body=body
+        )
+        if self._cache:
+            await run_in_pool("light", self._cache.mark_page_miss)
+            if page.status_code == 200:
+                await run_in_pool(
+                    "light",
+                    self._cache.put_page,
+                    url, page.final_url, response.headers.get("etag"), response.headers.get("last-modified"),
+                    page.status_code, page.content_type, page.body
+                )
+        return page
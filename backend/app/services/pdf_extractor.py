@@ -0,0 +1,79 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# PDFs are parsed from the bytes the fetcher already downloaded, in a process pool so large
+# files never block the event loop. At most PDF_MAX_PAGES pages are read; for longer files
+# the last pages are still searched for the conclusion. With PDF_FULL_TEXT=false only the
+# pages needed for the summary are read: from the front until the abstract is found and
+# from the back (past the references) until the conclusion is found.
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "60"))
+PDF_FULL_TEXT = os.environ.get("PDF_FULL_TEXT", "true").lower() == "true"
+PDF_HEAD_PAGES = int(os.environ.get("PDF_HEAD_PAGES", "2"))
+PDF_TAIL_PAGES = int(os.environ.get("PDF_TAIL_PAGES", "12"))
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+ABSTRACT_PATTERN = re.compile(r"\babstract\b", re.IGNORECASE)
+CONCLUSION_PATTERN = re.compile(r"\bconclusions?\b", re.IGNORECASE)
+
+def page_text(reader, index: int) -> str:
+    return reader.pages[index].extract_text() or ""
+
+def tail_page_texts(reader, page_count: int, first: int, budget: int) -> list[str]:
+    """Read backwards from the last page, no further than page `first`, until the conclusion is found."""
+    texts = []
+    for index in range(page_count - 1, max(first, page_count - budget) - 1, -1):
+        texts.append(page_text(reader, index))
+        if CONCLUSION_PATTERN.search(texts[-1]):
+            break
+    return texts[::-1]
+
+def head_page_texts(reader, page_count: int, max_pages: int) -> list[str]:
+    texts = []
+    for index in range(min(PDF_HEAD_PAGES, page_count, max_pages)):
+        texts.append(page_text(reader, index))
+        if ABSTRACT_PATTERN.search(texts[-1]):
+            break
+    return texts
+
+def extract_pdf_text(body: bytes, max_pages: int = PDF_MAX_PAGES, full_text: bool = PDF_FULL_TEXT) -> str:
+    """Text of a PDF given its bytes: every page up to max_pages, or only the targeted pages."""
+    from pypdf import PdfReader
+    reader = PdfReader(io.BytesIO(body))
+    page_count = len(reader.pages)
+    tail_budget = min(PDF_TAIL_PAGES, max_pages // 2)
+    if full_text and page_count <= max_pages:
+        texts = [page_text(reader, index) for index in range(page_count)]
+    elif full_text:
+        texts = [page_text(reader, index) for index in range(max_pages - tail_budget)]
+        texts += tail_page_texts(reader, page_count, len(texts), tail_budget)
+    else:
+        texts = head_page_texts(reader, page_count, max_pages)
+        texts += tail_page_texts(reader, page_count, len(texts), min(PDF_TAIL_PAGES, max_pages - len(texts)))
+    return "\n".join(texts)
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned workers only import this module, not the server's models and threads.
+            _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+def shutdown_pdf_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+async def aextract_pdf_text(body: bytes, max_pages: int = PDF_MAX_PAGES, full_text: bool = PDF_FULL_TEXT) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pdf_executor(), extract_pdf_text, body, max_pages, full_text)
@@ -0,0 +1,52 @@
+import os
+import threading
+
+# Shared, lazily created model clients. Importing this module (or any agent module) does not
+# load torch, sentence-transformers, onnxruntime or the Groq client; they are created on first
+# use and then shared by every agent in the process.
+EMBEDDING_MODEL_NAME = os.environ.get("EMBEDDING_MODEL_NAME", "BAAI/bge-small-en")
+LLM_MODEL_NAME = os.environ.get("LLM_MODEL_NAME", "llama-3.3-70b-versatile")
+# "groq" for the real model, "fake" for the deterministic offline model used by benchmarks.
+LLM_PROVIDER = os.environ.get("LLM_PROVIDER", "groq")
+FAKE_LLM_LATENCY = float(os.environ.get("FAKE_LLM_LATENCY", "0.5"))
+
+_lock = threading.Lock()
+_embedding_model = None
+_llm = None
+
+def get_embedding_model():
+    global _embedding_model
+    if _embedding_model is None:
+        with _lock:
+            if _embedding_model is None:
+                os.environ["TOKENIZERS_PARALLELISM"] = "false"
+                from services.embedding_service import EmbeddingService, create_encoder
+                _embedding_model = EmbeddingService(create_encoder(EMBEDDING_MODEL_NAME))
+    return _embedding_model
+
+def embedding_stats() -> dict | None:
+    """Batching and cache counters of the embedding service, or None if it has not been created."""
+    return _embedding_model.stats() if hasattr(_embedding_model, "stats") else None
+
+def get_llm():
+    global _llm
+    if _llm is None:
+        with _lock:
+            if _llm is None:
+                if LLM_PROVIDER == "fake":
+                    from services.fake_chat_model import FakeChatModel
+                    _llm = FakeChatModel(latency=FAKE_LLM_LATENCY)
+                else:
+                    from langchain_groq import ChatGroq
+                    _llm = ChatGroq(model_name=LLM_MODEL_NAME, temperature=0.7)
+    return _llm
+
+def set_embedding_model(embedding_model) -> None:
+    """Replace the shared embedding model, e.g. with a local stand-in for benchmarks."""
+    global _embedding_model
+    _embedding_model = embedding_model
+
+def set_llm(llm) -> None:
+    """Replace the shared chat model, e.g. with FakeChatModel for benchmarks."""
+    global _llm
+    _llm = llm
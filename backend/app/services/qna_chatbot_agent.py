@@ -1,88 +1,303 @@
 import os
-import json
-from typing import TypedDict, List
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from langchain.chains import RetrievalQA
-from langchain.memory import ConversationBufferMemory
-from langchain_groq import ChatGroq
+import threading
+import time
+from typing import TypedDict, List, Any, AsyncIterator, TYPE_CHECKING
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from langgraph.graph import StateGraph
 from dotenv import load_dotenv
+from services.providers import get_embedding_model, get_llm
+from services.answer_cache import ANSWER_CACHE_ENABLED, get_answer_cache, invalidate_topic_answers
+from services.conversation_memory import conversation_key, memory_messages, refers_to_conversation
+from services.telemetry import record_llm_usage, span, traced
+from services.executors import run_in_pool
+from services.hybrid_retrieval import BM25_PATH, QNA_RETRIEVER, QNA_RERANK, HybridRetriever, get_bm25_index, delete_bm25_index, get_reranker
+
+if TYPE_CHECKING:
+    from langchain_chroma import Chroma
 
 load_dotenv()
-os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-# Define the AgentState. It holds the topic name, list of papers, a current query,
-# and a QnA history (which is a list of dicts with question/answer pairs).
+# Define the AgentState. It holds the topic id and name, list of papers, a current query,
+# a QnA history (which is a list of dicts with question/answer pairs) and the rolling
+# summary of the conversation before that history.
 class AgentState(TypedDict):
+    topic_id: str
     topic: str            
     papers: List[dict] 
     query: str   
     qna_history: List[dict]  
+    history_summary: str
 
-llm = ChatGroq(model_name="llama-3.3-70b-versatile", temperature=0.7)
-embedding_model = HuggingFaceEmbeddings(model_name="BAAI/bge-small-en")
-
-def initialize_vectorstore(state: AgentState) -> Chroma:
-    documents = []
-    metadatas = []
-    for paper in state.get("papers", []):
-        doc_text = (
-            f"Title: {paper.get('title','')}\n"
-            f"Summary: {paper.get('summary','')}\n"
-            f"Authors: {', '.join(paper.get('authors', []))}\n"
-            f"Link: {paper.get('link','')}"
-        )
-        documents.append(doc_text)
-        metadatas.append({"paper_id": paper.get("id", ""), "link": paper.get("link", "")})
-    
-    vectorstore = Chroma.from_texts(
-        texts=documents,
-        embedding=embedding_model,
-        metadatas=metadatas,
-        collection_name="academic_papers"
+# Each topic gets its own persistent Chroma collection. It is built once when the topic is
+# created and reused by every Q&A call instead of re-embedding all papers per request.
+CHROMA_PERSIST_DIR = os.environ.get("CHROMA_PERSIST_DIR", "chroma_db")
+_topic_vectorstores: dict[str, "Chroma"] = {}
+_topic_vectorstores_lock = threading.Lock()
+
+# Papers are indexed as overlapping chunks of their full text (plus one chunk with the
+# title/summary card), embedded in batches. Retrieval fetches extra chunks and keeps the
+# best one per paper so answers draw on several papers rather than one paper's chunks.
+CHUNK_SIZE = int(os.environ.get("CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP", "150"))
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "64"))
+RETRIEVER_K = 3
+RETRIEVER_FETCH_K = 12
+
+def paper_document(paper: dict) -> str:
+    return (
+        f"Title: {paper.get('title','')}\n"
+        f"Summary: {paper.get('summary','')}\n"
+        f"Authors: {', '.join(paper.get('authors', []))}\n"
+        f"Link: {paper.get('link','')}"
     )
-    return vectorstore
 
-def build_retrieval_qa_chain(state: AgentState, vectorstore: Chroma) -> RetrievalQA:
-    retriever = vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 3})
-    # qa_memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-    qa_chain = RetrievalQA.from_chain_type(
-        llm=llm,
-        chain_type="stuff",  
-        retriever=retriever,
-        return_source_documents=True,
-        # memory=qa_memory,
-        output_key="result"   
+def get_topic_vectorstore(topic_id: str) -> "Chroma":
+    with _topic_vectorstores_lock:
+        vectorstore = _topic_vectorstores.get(topic_id)
+        if vectorstore is None:
+            from langchain_chroma import Chroma
+            vectorstore = Chroma(
+                collection_name=f"topic_{topic_id}",
+                embedding_function=get_embedding_model(),
+                persist_directory=CHROMA_PERSIST_DIR
+            )
+            _topic_vectorstores[topic_id] = vectorstore
+        return vectorstore
+
+def paper_chunks(paper: dict) -> List[str]:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    header = f"Title: {paper.get('title','')}\n"
+    return [paper_document(paper)] + [header + chunk for chunk in splitter.split_text(paper.get("full_text") or "")]
+
+def index_topic_papers(topic_id: str, papers: List[dict]) -> int:
+    """
+    Chunk and embed papers into the topic's index and return the number of chunks written.
+    Chunk ids are "<paper_id>:<n>", so re-indexing a paper upserts its chunks.
+    """
+    texts, metadatas, ids = [], [], []
+    for paper in papers:
+        for n, chunk in enumerate(paper_chunks(paper)):
+            texts.append(chunk)
+            metadatas.append({"paper_id": paper.get("id", ""), "link": paper.get("link", ""), "chunk": n})
+            ids.append(f"{paper['id']}:{n}")
+    if not texts:
+        return 0
+    vectorstore = get_topic_vectorstore(topic_id)
+    with span("index.papers", papers=len(papers), chunks=len(texts)):
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            end = start + EMBED_BATCH_SIZE
+            vectorstore.add_texts(texts=texts[start:end], metadatas=metadatas[start:end], ids=ids[start:end])
+        update_bm25_index(topic_id, vectorstore, lambda bm25: bm25.add(ids, texts, metadatas))
+    invalidate_topic_answers(topic_id)
+    return len(texts)
+
+def update_bm25_index(topic_id: str, vectorstore: "Chroma", update) -> None:
+    """
+    Apply an index change to the topic's BM25 index in hybrid mode. In dense mode BM25 is not
+    maintained; any stored copy is dropped instead, so enabling hybrid later rebuilds it from
+    the vectorstore rather than serving stale chunks.
+    """
+    if QNA_RETRIEVER == "hybrid":
+        update(get_bm25_index(topic_id, vectorstore))
+    elif os.path.exists(BM25_PATH):
+        delete_bm25_index(topic_id)
+
+def remove_paper_from_index(topic_id: str, paper_id: str) -> None:
+    vectorstore = get_topic_vectorstore(topic_id)
+    vectorstore.delete(where={"paper_id": paper_id})
+    update_bm25_index(topic_id, vectorstore, lambda bm25: bm25.remove_paper(paper_id))
+    invalidate_topic_answers(topic_id)
+
+class ParentDedupRetriever(BaseRetriever):
+    """Chunk-level similarity search that returns at most one chunk (the best) per paper."""
+
+    vectorstore: Any
+    k: int = RETRIEVER_K
+    fetch_k: int = RETRIEVER_FETCH_K
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        docs, seen = [], set()
+        for doc in self.vectorstore.similarity_search(query, k=self.fetch_k):
+            paper_id = doc.metadata.get("paper_id")
+            if paper_id in seen:
+                continue
+            seen.add(paper_id)
+            docs.append(doc)
+            if len(docs) == self.k:
+                break
+        return docs
+
+def build_retriever(topic_id: str, vectorstore: "Chroma", mode: str = QNA_RETRIEVER, rerank: bool = QNA_RERANK) -> BaseRetriever:
+    """Dense-only retrieval by default; QNA_RETRIEVER=hybrid adds BM25 and QNA_RERANK a cross-encoder."""
+    if mode != "hybrid":
+        return ParentDedupRetriever(vectorstore=vectorstore)
+    return HybridRetriever(
+        vectorstore=vectorstore,
+        bm25=get_bm25_index(topic_id, vectorstore),
+        k=RETRIEVER_K,
+        fetch_k=RETRIEVER_FETCH_K,
+        reranker=get_reranker() if rerank else None
     )
-    return qa_chain
 
-def qna_agent_node(state: AgentState) -> AgentState:
+def delete_topic_index(topic_id: str) -> None:
+    get_topic_vectorstore(topic_id).delete_collection()
+    with _topic_vectorstores_lock:
+        _topic_vectorstores.pop(topic_id, None)
+    delete_bm25_index(topic_id)
+    invalidate_topic_answers(topic_id)
+
+def topic_index_is_empty(topic_id: str) -> bool:
+    return not get_topic_vectorstore(topic_id).get(limit=1)["ids"]
+
+def initialize_vectorstore(state: AgentState) -> "Chroma":
     """
-    Process a user query by:
-      1. (Re)initializing the vectorstore from the provided papers.
-      2. Building a RetrievalQA chain with proper memory.
-      3. Running the chain on a prompt that includes a system instruction and the user query.
-      4. Appending the question–answer exchange to the qna_history in the AgentState.
+    Return the topic's persistent index. Topics created before per-topic indexes existed
+    have an empty collection, so they are indexed from the provided papers on first use.
     """
-    vectorstore = initialize_vectorstore(state)
-    qa_chain = build_retrieval_qa_chain(state, vectorstore)
-    
-    user_query = state["query"]
-    
-    system_prompt = (
+    vectorstore = get_topic_vectorstore(state["topic_id"])
+    if topic_index_is_empty(state["topic_id"]):
+        index_topic_papers(state["topic_id"], state.get("papers", []))
+    return vectorstore
+
+def system_prompt_for(state: AgentState) -> str:
+    return (
         f"You are an expert on the topic '{state['topic']}' and are very patient and clear when explaining complex subjects. "
         "Answer the question below in simple, detailed language."
     )
+
+def has_memory(state: AgentState) -> bool:
+    """True once the conversation has turns or a rolled-up summary that the answer depends on."""
+    return bool(state.get("history_summary")) or any(message.get("role") != "system" for message in state["qna_history"])
+
+def answer_context(state: AgentState) -> str:
+    """
+    Answer-cache context key for the query: "" for questions that stand on their own, so they
+    share answers across conversations; a hash of the memory for follow-ups that refer to it.
+    """
+    if has_memory(state) and refers_to_conversation(state["query"]):
+        return conversation_key(state.get("history_summary", ""), state["qna_history"])
+    return ""
+
+def lookup_cached_answer(state: AgentState) -> tuple[dict | None, dict | None]:
+    """
+    Embed the query and look it up in the topic's answer cache; returns (key, hit), where key
+    holds the embedding, generation and context an answer computed on a miss is stored under
+    (None when the cache is disabled).
+    """
+    if not ANSWER_CACHE_ENABLED:
+        return None, None
+    with span("qna.cache_lookup"):
+        cache = get_answer_cache()
+        key = {
+            "generation": cache.generation(state["topic_id"]),
+            "context": answer_context(state),
+            "embedding": get_embedding_model().embed_query(state["query"])
+        }
+        return key, cache.lookup(state["topic_id"], key["embedding"], key["context"])
+
+def append_exchange(state: AgentState, answer: str) -> None:
     if len(state["qna_history"]) == 0:
-        state["qna_history"].append({"role": "system", "content": system_prompt})
-    
-    result = qa_chain.invoke(user_query)
-    state["qna_history"].append({"role": "user", "content": user_query})
-    state["qna_history"].append({"role": "assistant", "content": result["result"]})
-    return 
+        state["qna_history"].append({"role": "system", "content": system_prompt_for(state)})
+    state["qna_history"].append({"role": "user", "content": state["query"]})
+    state["qna_history"].append({"role": "assistant", "content": answer})
+
+# Same prompt the "stuff" RetrievalQA chain sends to chat models, followed by the
+# conversation memory and the question.
+STUFF_SYSTEM_PROMPT = (
+    "Use the following pieces of context to answer the user's question. \n"
+    "If you don't know the answer, just say that you don't know, don't try to make up an answer.\n"
+    "----------------\n"
+    "{context}"
+)
+
+def answer_messages(state: AgentState, docs: List[Document]) -> list:
+    """Prompt for one answer: retrieved context, summary of older turns, recent turns, then the question."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+    context = "\n\n".join(doc.page_content for doc in docs)
+    return (
+        [SystemMessage(content=STUFF_SYSTEM_PROMPT.format(context=context))]
+        + memory_messages(state.get("history_summary", ""), state["qna_history"])
+        + [HumanMessage(content=state["query"])]
+    )
+
+def retrieve(state: AgentState) -> List[Document]:
+    """Load the topic's index (building it only if it is empty) and retrieve context for the query."""
+    vectorstore = initialize_vectorstore(state)
+    return build_retriever(state["topic_id"], vectorstore).invoke(state["query"])
+
+@traced("qna.answer")
+async def qna_agent_node(state: AgentState) -> AgentState:
+    """
+    Process a user query by:
+      1. Returning the cached answer if a near-identical question was already answered.
+      2. Loading the topic's persistent vectorstore (indexing the papers only if it is empty).
+      3. Retrieving context and prompting the model with it, the conversation memory and the query.
+      4. Appending the question–answer exchange to the qna_history in the AgentState.
+    Embedding, retrieval and prompt building run on the "cpu" pool, cache writes on the "light"
+    pool, and the model is awaited, so the event loop stays free.
+    """
+    cache_key, cached = await run_in_pool("cpu", lookup_cached_answer, state)
+    if cached:
+        append_exchange(state, cached["answer"])
+        return {"qna_history": state["qna_history"]}
+
+    start = time.perf_counter()
+    with span("qna.retrieve"):
+        docs = await run_in_pool("cpu", retrieve, state)
+    with span("llm.qna"):
+        response = await get_llm().ainvoke(await run_in_pool("cpu", answer_messages, state, docs))
+    record_llm_usage("qna", response)
+    answer = response.content
+    if cache_key is not None:
+        sources = [doc.metadata.get("paper_id", "") for doc in docs]
+        await run_in_pool(
+            "light", get_answer_cache().put, state["topic_id"], state["query"],
+            answer=answer, sources=sources, latency=time.perf_counter() - start, **cache_key
+        )
+    append_exchange(state, answer)
+    return {"qna_history": state["qna_history"]}
+
+async def astream_answer(state: AgentState) -> AsyncIterator[dict]:
+    """
+    Streaming variant of qna_agent_node. Yields a "sources" event with the retrieved paper ids
+    as soon as retrieval finishes, then one "token" event per chunk from the model's astream.
+    The exchange is appended to state["qna_history"] once the answer is complete.
+    """
+    user_query = state["query"]
+    cache_key, cached = await run_in_pool("cpu", lookup_cached_answer, state)
+    if cached:
+        yield {"event": "sources", "data": cached["sources"]}
+        yield {"event": "token", "data": cached["answer"]}
+        append_exchange(state, cached["answer"])
+        return
+
+    start = time.perf_counter()
+    with span("qna.retrieve"):
+        docs = await run_in_pool("cpu", retrieve, state)
+    sources = [doc.metadata.get("paper_id", "") for doc in docs]
+    yield {"event": "sources", "data": sources}
+
+    answer, usage = "", None
+    with span("llm.qna_stream"):
+        async for chunk in get_llm().astream(await run_in_pool("cpu", answer_messages, state, docs)):
+            usage = chunk if usage is None else usage + chunk
+            if chunk.content:
+                answer += chunk.content
+                yield {"event": "token", "data": chunk.content}
+    record_llm_usage("qna", usage)
+
+    if cache_key is not None:
+        await run_in_pool(
+            "light", get_answer_cache().put, state["topic_id"], user_query,
+            answer=answer, sources=sources, latency=time.perf_counter() - start, **cache_key
+        )
+    append_exchange(state, answer)
 
 qna_graph_agent = StateGraph(AgentState)
+# The node is async; run the compiled graph with ainvoke.
 qna_graph_agent.add_node("qna", qna_agent_node)
 qna_graph_agent.set_entry_point("qna")
 
@@ -120,6 +335,7 @@ qna_graph_agent.set_entry_point("qna")
 #     }
     
 #     initial_state: AgentState = {
+#         "topic_id": "ehmi-example",
 #         "topic": topic_data["topic"],
 #         "papers": topic_data["papers"],
 #         "query": topic_data["query"],
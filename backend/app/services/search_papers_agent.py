@@ -1,93 +1,116 @@
+import logging
 import os
-import requests
-from bs4 import BeautifulSoup
-from typing import TypedDict, List
+from typing import TypedDict, List, Optional
+from pydantic import BaseModel, Field
 from langgraph.graph import StateGraph
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from langchain_groq import ChatGroq
+from langchain_core.messages import HumanMessage, SystemMessage
 from dotenv import load_dotenv
-import json
+from services.providers import get_llm
+from services.search_providers import SEARCH_RESULTS, SearchResult, search_papers
+from services.telemetry import record_llm_usage, span, traced
 
 load_dotenv()
-model = ChatGroq(model_name="llama-3.3-70b-versatile", temperature=0.7)
+
+logger = logging.getLogger(__name__)
 
 class AgentState(TypedDict):
     topic: str
     scraped_data: str
+    search_results: List[dict]
     cleaned_data: List[dict]
 
-def srape_scholar_papers_node(state: AgentState):
-    topic = state["topic"]
-    url = f"https://scholar.google.com/scholar?q={topic}"
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-        )
-    }
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            scraped = f"Error: Received status code {response.status_code}"
-        else:
-            soup = BeautifulSoup(response.text, "html.parser")
-            results = []
-            for idx, div in enumerate(soup.find_all("div", class_="gs_ri")):
-                if idx >= 5:  
-                    break
-                title_elem = div.find("h3", class_="gs_rt")
-                if title_elem:
-                    link_tag = title_elem.find("a")
-                    title = title_elem.get_text(strip=True)
-                    link = link_tag["href"] if link_tag and link_tag.has_attr("href") else "No link"
-                else:
-                    title = "No title"
-                    link = "No link"
-                authors_elem = div.find("div", class_="gs_a")
-                year_elem = div.find("div", class_="gs_a")
-                authors = authors_elem.get_text(strip=True) if authors_elem else "No authors"
-                year = year_elem.get_text(strip=True) if year_elem else "No years"
-                snippet_elem = div.find("div", class_="gs_rs")
-                snippet = snippet_elem.get_text(strip=True) if snippet_elem else "No snippet"
-                results.append(f"{idx+1}. {title}\nLink: {link}\nSnippet: {snippet}\nAuthors: {authors}\nYear: {year}")
-            if not results:
-                scraped = "No results found."
-            else:
-                scraped = "\n\n".join(results)
-    except Exception as e:
-        scraped = f"Exception during scraping: {e}"
-    return {"scraped_data": scraped}
+def format_search_result(idx: int, result: SearchResult) -> str:
+    authors = ", ".join(result.authors) or result.byline or "No authors"
+    lines = [
+        f"{idx}. {result.title}",
+        f"Link: {result.link or 'No link'}",
+        f"Snippet: {result.snippet or 'No snippet'}",
+        f"Authors: {authors}",
+        f"Year: {result.year or 'No years'}"
+    ]
+    if result.venue:
+        lines.append(f"Venue: {result.venue}")
+    if result.doi:
+        lines.append(f"DOI: {result.doi}")
+    return "\n".join(lines)
+
+@traced("search.scrape")
+async def asearch_papers_node(state: AgentState):
+    """Search every configured provider concurrently and keep the top SEARCH_RESULTS merged results."""
+    results, report = await search_papers(state["topic"], SEARCH_RESULTS)
+    if results:
+        scraped = "\n\n".join(format_search_result(idx + 1, result) for idx, result in enumerate(results))
+    elif all(entry["error"] for entry in report.values()):
+        scraped = "Exception during scraping: " + "; ".join(f"{name}: {entry['error']}" for name, entry in report.items())
+    else:
+        scraped = "No results found."
+    return {"scraped_data": scraped, "search_results": [result.to_dict() for result in results]}
+
+# The LLM only fills fields the byline parser could not extract (authors or year), for the
+# affected results only, through schema-validated structured output.
+SEARCH_LLM_FALLBACK = os.environ.get("SEARCH_LLM_FALLBACK", "true").lower() == "true"
+
+class MissingFields(BaseModel):
+    index: int = Field(description="The number of the search result")
+    authors: List[str] = Field(default_factory=list, description="Author names")
+    year: Optional[int] = Field(default=None, description="Publication year")
+
+class MissingFieldsList(BaseModel):
+    results: List[MissingFields]
 
 CLEANED_PROMPT = (
     "You are an expert in interpreting raw data scraped from Google Scholar. "
-    "Please provide a cleaned JSON version of the data without typos or formatting errors. "
-    "Change authors into lists and ensure the year is in the correct format. "
-    "Keep the links intact."
+    "For each numbered search result, extract the list of authors and the publication year. "
+    "Leave a field empty if the data does not contain it."
 )
 
 USER_PROMPT = (
-    "Clean the following raw data into proper JSON format:\n\n{scraped_data}"
+    "Extract the authors and year of each of the following search results:\n\n{scraped_data}"
 )
 
-def clean_scraped_data_node(state: AgentState):
-    scraped = state.get("scraped_data", "")
+async def afill_missing_fields(results: List[dict]) -> None:
+    incomplete = {idx + 1: result for idx, result in enumerate(results) if not result["authors"] or result["year"] is None}
+    if not incomplete or not SEARCH_LLM_FALLBACK:
+        return
+    scraped = "\n\n".join(format_search_result(idx, SearchResult(**result)) for idx, result in incomplete.items())
     messages = [
         SystemMessage(content=CLEANED_PROMPT),
         HumanMessage(content=USER_PROMPT.format(scraped_data=scraped))
     ]
-    response: AIMessage = model.invoke(messages)
-    content = response.content
-    start = content.find("```json") + len("```json")
-    end = content.find("```", start)
+    try:
+        with span("llm.search_clean", results=len(incomplete)):
+            output = await get_llm().with_structured_output(MissingFieldsList, include_raw=True).ainvoke(messages)
+        record_llm_usage("search_clean", output["raw"])
+        if output["parsed"] is None:
+            raise ValueError(output["parsing_error"])
+    except Exception as e:
+        logger.warning("Error filling search result fields: %s", e)
+        return
+    parsed: MissingFieldsList = output["parsed"]
+    for fields in parsed.results:
+        result = incomplete.get(fields.index)
+        if result is None:
+            continue
+        if not result["authors"]:
+            result["authors"] = fields.authors
+        if result["year"] is None:
+            result["year"] = fields.year
 
-    if start != -1 and end != -1:
-        json_str = content[start:end].strip()
-        cleaned_data = json.loads(json_str)  
+@traced("search.clean")
+async def aclean_scraped_data_node(state: AgentState):
+    """Turn the merged search results into paper dicts, asking the LLM only for fields the parsers missed."""
+    results = [dict(result) for result in state.get("search_results", [])]
+    await afill_missing_fields(results)
+    cleaned_data = [
+        {key: result[key] for key in ("title", "link", "authors", "year", "venue", "doi", "snippet")}
+        for result in results
+    ]
     return {"cleaned_data": cleaned_data}
 
 
 search_graph_agent = StateGraph(AgentState)
 search_graph_agent.set_entry_point("scrape")
-search_graph_agent.add_node("scrape", srape_scholar_papers_node)
-search_graph_agent.add_node("clean", clean_scraped_data_node)
+# Nodes are async; run the compiled graph with ainvoke/astream.
+search_graph_agent.add_node("scrape", asearch_papers_node)
+search_graph_agent.add_node("clean", aclean_scraped_data_node)
 search_graph_agent.add_edge("scrape", "clean")
\ No newline at end of file
@@ -0,0 +1,269 @@
+import asyncio
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field, asdict
+import httpx
+from services.telemetry import span
+
+# Paper search fans out to several sources at once, each with its own timeout, and merges
+# the results. A source that fails, times out or rate-limits only drops its own results.
+SEARCH_PROVIDERS = [name.strip() for name in os.environ.get("SEARCH_PROVIDERS", "scholar,arxiv,crossref,semantic_scholar").split(",") if name.strip()]
+SEARCH_RESULTS = int(os.environ.get("SEARCH_RESULTS", "10"))
+SEARCH_PROVIDER_TIMEOUT = float(os.environ.get("SEARCH_PROVIDER_TIMEOUT", "8"))
+CROSSREF_MAILTO = os.environ.get("CROSSREF_MAILTO", "")
+SEMANTIC_SCHOLAR_API_KEY = os.environ.get("SEMANTIC_SCHOLAR_API_KEY", "")
+
+# Endpoints can be pointed at local fixture servers for offline benchmarks.
+SCHOLAR_URL = os.environ.get("SCHOLAR_URL", "https://scholar.google.com/scholar")
+ARXIV_URL = os.environ.get("ARXIV_URL", "https://export.arxiv.org/api/query")
+CROSSREF_URL = os.environ.get("CROSSREF_URL", "https://api.crossref.org/works")
+SEMANTIC_SCHOLAR_URL = os.environ.get("SEMANTIC_SCHOLAR_URL", "https://api.semanticscholar.org/graph/v1/paper/search")
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+)
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+
+@dataclass
+class SearchResult:
+    title: str
+    link: str
+    source: str
+    authors: list[str] = field(default_factory=list)
+    year: int | None = None
+    doi: str | None = None
+    venue: str = ""
+    snippet: str = ""
+    # Unparsed author/venue/year line, for sources that only give one (Scholar's gs_a).
+    byline: str = ""
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+def title_match_key(title: str) -> str:
+    """Lowercase alphanumeric words of a title, for matching the same paper across sources."""
+    return " ".join(re.findall(r"[a-z0-9]+", title.lower()))
+
+def clean_text(text: str | None) -> str:
+    return " ".join((text or "").split())
+
+class SearchProvider:
+    name = ""
+
+    async def search(self, client: httpx.AsyncClient, query: str, limit: int) -> list[SearchResult]:
+        raise NotImplementedError
+
+class ScholarProvider(SearchProvider):
+    name = "scholar"
+
+    async def search(self, client: httpx.AsyncClient, query: str, limit: int) -> list[SearchResult]:
+        response = await client.get(SCHOLAR_URL, params={"q": query}, headers={"User-Agent": USER_AGENT})
+        response.raise_for_status()
+        return parse_scholar_html(response.text)[:limit]
+
+HOST_PATTERN = re.compile(r"[\w-]+(\.[\w-]+)+")
+TAG_PATTERN = re.compile(r"^(\[[A-Z]+\]\s*)+")
+
+def parse_byline(byline: str) -> dict:
+    """
+    Split a Scholar gs_a line, "A Author, B Author… - Venue…, 2019 - host.com", into
+    authors, venue and year. Any part may be missing or truncated with an ellipsis.
+    """
+    parts = [part.strip() for part in byline.replace("\xa0", " ").split(" - ")]
+    authors = [name.strip(" …") for name in parts[0].split(",") if name.strip(" …")] if parts[0] else []
+    middle = parts[1] if len(parts) > 1 else ""
+    if len(parts) == 2 and HOST_PATTERN.fullmatch(middle):
+        middle = ""
+    # The year comes last ("Venue, 2019"); earlier matches can be part of an arXiv id.
+    years = list(YEAR_PATTERN.finditer(middle))
+    year = years[-1] if years else None
+    venue = middle[:year.start()] if year else middle
+    return {
+        "authors": authors,
+        "venue": venue.strip(" ,…"),
+        "year": int(year.group()) if year else None
+    }
+
+def parse_scholar_html(html: str) -> list[SearchResult]:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    results = []
+    for div in soup.find_all("div", class_="gs_ri"):
+        title_elem = div.find("h3", class_="gs_rt")
+        if not title_elem:
+            continue
+        link_tag = title_elem.find("a", href=True)
+        link = link_tag["href"] if link_tag else ""
+        if not link:
+            # [CITATION] entries have no title link; use the side PDF/HTML link if there is one.
+            side = div.parent.find("div", class_="gs_or_ggsm") if div.parent else None
+            side_link = side.find("a", href=True) if side else None
+            link = side_link["href"] if side_link else ""
+        byline_elem = div.find("div", class_="gs_a")
+        snippet_elem = div.find("div", class_="gs_rs")
+        byline = byline_elem.get_text(" ", strip=True) if byline_elem else ""
+        fields = parse_byline(byline)
+        results.append(SearchResult(
+            title=TAG_PATTERN.sub("", (link_tag or title_elem).get_text(" ", strip=True)),
+            link=link,
+            source="scholar",
+            authors=fields["authors"],
+            year=fields["year"],
+            venue=fields["venue"],
+            snippet=snippet_elem.get_text(" ", strip=True) if snippet_elem else "",
+            byline=byline
+        ))
+    return results
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+ARXIV = "{http://arxiv.org/schemas/atom}"
+
+class ArxivProvider(SearchProvider):
+    name = "arxiv"
+
+    async def search(self, client: httpx.AsyncClient, query: str, limit: int) -> list[SearchResult]:
+        response = await client.get(ARXIV_URL, params={"search_query": f"all:{query}", "max_results": limit})
+        response.raise_for_status()
+        return parse_arxiv_feed(response.text)[:limit]
+
+def parse_arxiv_feed(xml: str) -> list[SearchResult]:
+    results = []
+    for entry in ET.fromstring(xml).iter(f"{ATOM}entry"):
+        published = entry.findtext(f"{ATOM}published") or ""
+        results.append(SearchResult(
+            title=clean_text(entry.findtext(f"{ATOM}title")),
+            link=entry.findtext(f"{ATOM}id") or "",
+            source="arxiv",
+            authors=[clean_text(author.findtext(f"{ATOM}name")) for author in entry.findall(f"{ATOM}author")],
+            year=int(published[:4]) if published[:4].isdigit() else None,
+            doi=entry.findtext(f"{ARXIV}doi"),
+            venue=clean_text(entry.findtext(f"{ARXIV}journal_ref")) or "arXiv",
+            snippet=clean_text(entry.findtext(f"{ATOM}summary"))
+        ))
+    return results
+
+class CrossrefProvider(SearchProvider):
+    name = "crossref"
+
+    async def search(self, client: httpx.AsyncClient, query: str, limit: int) -> list[SearchResult]:
+        params = {
+            "query.bibliographic": query,
+            "rows": limit,
+            "select": "DOI,title,author,issued,container-title,URL,abstract"
+        }
+        if CROSSREF_MAILTO:
+            params["mailto"] = CROSSREF_MAILTO
+        response = await client.get(CROSSREF_URL, params=params)
+        response.raise_for_status()
+        return parse_crossref_works(response.json())[:limit]
+
+def parse_crossref_works(data: dict) -> list[SearchResult]:
+    results = []
+    for item in data.get("message", {}).get("items", []):
+        titles = item.get("title") or []
+        if not titles:
+            continue
+        date_parts = (item.get("issued") or {}).get("date-parts") or [[None]]
+        results.append(SearchResult(
+            title=clean_text(titles[0]),
+            link=item.get("URL") or f"https://doi.org/{item['DOI']}",
+            source="crossref",
+            authors=[clean_text(f"{author.get('given', '')} {author.get('family', '')}") for author in item.get("author", [])],
+            year=date_parts[0][0] if date_parts[0] else None,
+            doi=item.get("DOI"),
+            venue=clean_text((item.get("container-title") or [""])[0]),
+            snippet=clean_text(re.sub(r"<[^>]+>", " ", item.get("abstract", "")))
+        ))
+    return results
+
+class SemanticScholarProvider(SearchProvider):
+    name = "semantic_scholar"
+
+    async def search(self, client: httpx.AsyncClient, query: str, limit: int) -> list[SearchResult]:
+        headers = {"x-api-key": SEMANTIC_SCHOLAR_API_KEY} if SEMANTIC_SCHOLAR_API_KEY else {}
+        params = {
+            "query": query,
+            "limit": limit,
+            "fields": "title,url,authors,year,externalIds,venue,abstract,openAccessPdf"
+        }
+        response = await client.get(SEMANTIC_SCHOLAR_URL, params=params, headers=headers)
+        response.raise_for_status()
+        return parse_semantic_scholar(response.json())[:limit]
+
+def parse_semantic_scholar(data: dict) -> list[SearchResult]:
+    results = []
+    for item in data.get("data", []):
+        pdf = item.get("openAccessPdf") or {}
+        results.append(SearchResult(
+            title=clean_text(item.get("title")),
+            link=pdf.get("url") or item.get("url") or "",
+            source="semantic_scholar",
+            authors=[clean_text(author.get("name")) for author in item.get("authors", [])],
+            year=item.get("year"),
+            doi=(item.get("externalIds") or {}).get("DOI"),
+            venue=clean_text(item.get("venue")),
+            snippet=clean_text(item.get("abstract"))
+        ))
+    return results
+
+PROVIDERS: dict[str, type[SearchProvider]] = {
+    provider.name: provider for provider in (ScholarProvider, ArxivProvider, CrossrefProvider, SemanticScholarProvider)
+}
+
+def merge_results(ranked_lists: list[list[SearchResult]], limit: int) -> list[SearchResult]:
+    """
+    Interleave the providers' ranked lists (first result of each, then second, ...) and drop
+    duplicates by DOI or normalized title. A duplicate fills in fields the kept result lacks.
+    """
+    merged: list[SearchResult] = []
+    by_doi: dict[str, SearchResult] = {}
+    by_title: dict[str, SearchResult] = {}
+    for rank in range(max((len(results) for results in ranked_lists), default=0)):
+        for results in ranked_lists:
+            if rank >= len(results):
+                continue
+            result = results[rank]
+            doi, title = (result.doi or "").lower(), title_match_key(result.title)
+            kept = by_doi.get(doi) if doi else None
+            # Untitled results only merge by DOI; an empty key would collapse them all into one.
+            kept = kept or (by_title.get(title) if title else None)
+            if kept is None:
+                kept = result
+                merged.append(result)
+            else:
+                for name in ("link", "authors", "year", "doi", "venue", "snippet", "byline"):
+                    if not getattr(kept, name) and getattr(result, name):
+                        setattr(kept, name, getattr(result, name))
+            if doi:
+                by_doi[doi] = kept
+            if title:
+                by_title[title] = kept
+    return merged[:limit]
+
+async def search_papers(query: str, limit: int = SEARCH_RESULTS, providers: list[str] | None = None,
+                        timeout: float = SEARCH_PROVIDER_TIMEOUT,
+                        transport: httpx.AsyncBaseTransport | None = None) -> tuple[list[SearchResult], dict]:
+    """
+    Query the providers concurrently and return (merged results, report), where the report has
+    each provider's result count, seconds taken and error, if any.
+    """
+    names = providers or SEARCH_PROVIDERS
+    report = {}
+
+    async def run(client: httpx.AsyncClient, name: str) -> list[SearchResult]:
+        start = time.perf_counter()
+        try:
+            with span(f"search.provider.{name}"):
+                results = await asyncio.wait_for(PROVIDERS[name]().search(client, query, limit), timeout)
+            report[name] = {"results": len(results), "seconds": round(time.perf_counter() - start, 3), "error": None}
+            return results
+        except Exception as e:
+            report[name] = {"results": 0, "seconds": round(time.perf_counter() - start, 3), "error": repr(e)}
+            return []
+
+    async with httpx.AsyncClient(follow_redirects=True, timeout=timeout, transport=transport) as client:
+        ranked_lists = await asyncio.gather(*(run(client, name) for name in names))
+    return merge_results(ranked_lists, limit), report
@@ -0,0 +1,30 @@
+import json
+import threading
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Append finished spans to a file, one JSON object per line, for offline analysis."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans) -> SpanExportResult:
+        with self._lock:
+            for span in spans:
+                self._file.write(json.dumps({
+                    "name": span.name,
+                    "trace_id": format(span.context.trace_id, "032x"),
+                    "span_id": format(span.context.span_id, "016x"),
+                    "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+                    "start": span.start_time / 1e9,
+                    "duration_ms": round((span.end_time - span.start_time) / 1e6, 3),
+                    "status": span.status.status_code.name,
+                    "attributes": dict(span.attributes or {})
+                }) + "\n")
+            self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
@@ -1,31 +1,30 @@
 import os
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import hashlib
+import logging
+import random
 from typing import TypedDict, List
 from langgraph.graph import StateGraph
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 import json
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-import random
-import time
+from services.paper_fetcher import PaperFetcher, FetchedPage
+from services.pdf_extractor import PDF_FULL_TEXT, aextract_pdf_text
+from services.html_extractor import EXTRACTOR_VERSION, HTML_FULL_TEXT, extract_html_sections
+from services.content_cache import get_content_cache, content_hash
+from services.providers import get_embedding_model, get_llm, LLM_MODEL_NAME
+from services.telemetry import record_llm_usage, span, traced
+from services.executors import run_in_pool
+from services.context_index import ContextIndex
 
 load_dotenv()
-os.environ["TOKENIZERS_PARALLELISM"] = "false"  
 
-model = ChatGroq(model_name="llama-3.3-70b-versatile", temperature=0.7)
-embedding_model = HuggingFaceEmbeddings(model_name="BAAI/bge-small-en")
+logger = logging.getLogger(__name__)
 
 class AgentState(TypedDict):
     topic: str
     summarized_data: List[dict]
 
-vectorstore = Chroma(collection_name="academic_papers", embedding_function=embedding_model)
-retriever = vectorstore.as_retriever(search_type="similarity", search_kwargs={"k": 3})
-
 def extract_relevant_sections(text: str) -> str:
     """
     If the text is short (< 3000 characters), return the entire text.
@@ -62,66 +61,82 @@ def extract_relevant_sections(text: str) -> str:
         # If neither keyword is found, return the first threshold characters.
         return text[:threshold]
 
-def scrape_papers_node(state: AgentState) -> AgentState:
-    """Scrape and process each paper. Errors for individual links are caught so the chain continues."""
+def text_cache_key(page: FetchedPage) -> str:
+    # Targeted extraction reads only part of a document, so its text is cached separately.
+    if page.is_pdf:
+        return page.content_hash if PDF_FULL_TEXT else f"{page.content_hash}:pdf-sections"
+    return f"{page.content_hash}:html-sections-v{EXTRACTOR_VERSION}" + ("" if HTML_FULL_TEXT else ":partial")
+
+def sections_content(sections: dict) -> str:
+    """Summarizer input from structured HTML sections, in the same shape as extract_relevant_sections."""
+    parts = []
+    if sections["abstract"]:
+        parts.append(f"Abstract: {sections['abstract'][:1000]}")
+    if sections["conclusion"]:
+        parts.append(f"Conclusion: {sections['conclusion'][:1000]}")
+    return "\n\n".join(parts) or extract_relevant_sections(sections["full_text"])
+
+async def extract_page(page: FetchedPage, cache) -> tuple[str, str, str]:
+    """Return (full text, summarizer content, page title) for a fetched page, using the cached extraction if any."""
+    key = text_cache_key(page)
+    cached = await run_in_pool("light", cache.get_text, key)
+    if page.is_pdf:
+        if cached is None:
+            with span("parse.pdf", bytes=len(page.body)):
+                full_text = await aextract_pdf_text(page.body)
+            await run_in_pool("light", cache.put_text, key, full_text)
+        else:
+            full_text = cached
+        return full_text, extract_relevant_sections(full_text), ""
+    if cached is not None:
+        sections = json.loads(cached)
+    else:
+        with span("parse.html", bytes=len(page.body)):
+            sections = (await run_in_pool("cpu", extract_html_sections, page.body)).to_dict()
+        await run_in_pool("light", cache.put_text, key, json.dumps(sections))
+    return sections["full_text"], sections_content(sections), sections["title"]
+
+@traced("summarize.scrape")
+async def ascrape_papers_node(state: AgentState) -> AgentState:
+    """
+    Fetch every paper concurrently and parse each one as soon as its own fetch finishes,
+    so the node takes about as long as the slowest paper. Errors for individual links are
+    caught so the chain continues. The summarizer gets the relevant sections in "content";
+    the full text is kept in "full_text" for the topic's Q&A index.
+    """
     papers = state["summarized_data"] or []
-    session = requests.Session()
-    
-    common_headers = {
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Referer": "https://scholar.google.com/",
-        "Upgrade-Insecure-Requests": "1",
-        "Connection": "keep-alive",
-        "Sec-Fetch-Dest": "document",
-        "Sec-Fetch-Mode": "navigate",
-        "Sec-Fetch-Site": "same-origin"
-    }
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.1 Safari/605.1.15"
-    ]
-    
-    for paper in papers:
+
+    async def scrape(fetcher: PaperFetcher, paper: dict) -> None:
         url = paper.get("link")
-        text = ""
         if not url:
             paper["content"] = "No URL provided"
-            continue
-
-        headers = common_headers.copy()
-        headers["User-Agent"] = random.choice(user_agents)
-        
+            return
         try:
-            time.sleep(random.uniform(1, 3))
-            response = session.get(url, headers=headers, timeout=10)
-            final_url = response.url  
-            
-            if response.status_code != 200:
-                text = f"Error: Received status code {response.status_code}"
+            with span("fetch.page", url=url):
+                page = await fetcher.fetch(url)
+            if page.status_code != 200:
+                text = f"Error: Received status code {page.status_code}"
             else:
-                if final_url.lower().endswith(".pdf"):
-                    try:
-                        loader = PyPDFLoader(final_url)
-                        pdf_text = "\n".join([page.page_content for page in loader.load()])
-                        text = extract_relevant_sections(pdf_text)
-                    except Exception as e:
-                        text = f"Error loading PDF: {e}"
-                else:
-                    soup = BeautifulSoup(response.text, "html.parser")
-                    for tag in soup.find_all(["header", "footer", "nav", "script", "style"]):
-                        tag.decompose()
-                    scraped_text = soup.get_text(separator="\n")
-                    text = extract_relevant_sections(scraped_text)
+                try:
+                    full_text, text, title = await extract_page(page, cache)
+                except Exception as e:
+                    if not page.is_pdf:
+                        raise
+                    paper["content"] = f"Error loading PDF: {e}"
+                    return
+                paper["full_text"] = full_text
+                # Papers added by link have no search-result title.
+                if not paper.get("title"):
+                    paper["title"] = title or url
+                # Only real paper text is cacheable; error strings must never share a summary.
+                paper["content_hash"] = content_hash(text)
         except Exception as e:
             text = f"Exception: {e}"
-        
-        try:
-            vectorstore.add_texts([text], metadatas=[{"source": url}])
-        except Exception as e:
-            print(f"Error adding text to vectorstore: {e}")
-        
         paper["content"] = text
+
+    cache = get_content_cache()
+    async with PaperFetcher(cache=cache) as fetcher:
+        await asyncio.gather(*(scrape(fetcher, paper) for paper in papers))
     return {"summarized_data": papers}
 
 SUMMARIZED_PROMPT = (
@@ -136,40 +151,106 @@ USER_PROMPT = (
     "Context: {context}\n"
 )
 
+# Cached summaries are keyed by content hash plus this version, so editing the prompts or
+# switching models invalidates them automatically.
+PROMPT_VERSION = hashlib.sha256(f"{LLM_MODEL_NAME}\n{SUMMARIZED_PROMPT}\n{USER_PROMPT}".encode()).hexdigest()[:16]
 
-def summarize_papers_node(state: AgentState):
-    papers = state["summarized_data"]
 
+# Summaries run concurrently up to SUMMARY_CONCURRENCY in-flight model calls, so topic
+# creation is bounded by the model's concurrency limit instead of the number of papers.
+SUMMARY_CONCURRENCY = int(os.environ.get("SUMMARY_CONCURRENCY", "4"))
+SUMMARY_MAX_RETRIES = int(os.environ.get("SUMMARY_MAX_RETRIES", "5"))
+
+def is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+def retry_after_seconds(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+async def ainvoke_with_backoff(messages: list) -> AIMessage:
+    """Invoke the model, backing off on 429s (honouring Retry-After when the API sends it)."""
+    for attempt in range(SUMMARY_MAX_RETRIES + 1):
+        try:
+            with span("llm.summarize", attempt=attempt):
+                response = await get_llm().ainvoke(messages)
+            record_llm_usage("summarize", response)
+            return response
+        except Exception as e:
+            if not is_rate_limited(e) or attempt == SUMMARY_MAX_RETRIES:
+                raise
+            delay = retry_after_seconds(e) or min(2 ** attempt, 30) * random.uniform(0.5, 1.5)
+            await asyncio.sleep(delay)
+
+def apply_summary(paper: dict, content: str) -> None:
+    start = content.find("```json") + len("```json")
+    end = content.find("```", start)
+
+    if start != -1 and end != -1:
+        json_str = content[start:end].strip()
+        try:
+            extracted = json.loads(json_str)
+            paper["compared_authors"] = extracted.get("authors", [])
+            paper["summary"] = extracted.get("summary", "")
+            del paper["content"]
+        except json.JSONDecodeError:
+            paper["error"] = "Invalid JSON returned"
+    else:
+        paper["error"] = "No JSON found in response"
+
+@traced("summarize.summarize")
+async def asummarize_papers_node(state: AgentState):
+    papers = state["summarized_data"]
+    cache = get_content_cache()
+    pending = []
     for paper in papers:
-        retrieved_docs = retriever.invoke(paper["content"])
-        retrieved_context = "\n\n".join([doc.page_content for doc in retrieved_docs]) if retrieved_docs else "No additional context found."
+        cached = await run_in_pool("light", cache.get_summary, paper["content_hash"], PROMPT_VERSION) if paper.get("content_hash") else None
+        if cached is not None:
+            apply_summary(paper, cached)
+        else:
+            pending.append(paper)
+    if not pending:
+        return {"summarized_data": papers}
+
+    # Context for each summary comes from the other papers of this request. Their texts and the
+    # pending queries are embedded in one call; the index is dropped when the node returns.
+    indexed = list(dict.fromkeys(paper["content"] for paper in papers if paper.get("content_hash")))
+    texts = list(dict.fromkeys(indexed + [paper["content"] for paper in pending]))
+    vectors, context_index = {}, ContextIndex([], [])
+    if indexed:
+        try:
+            with span("embed.summary_context", texts=len(texts)):
+                vectors = dict(zip(texts, await run_in_pool("cpu", get_embedding_model().embed_documents, texts)))
+            context_index = ContextIndex(indexed, [vectors[text] for text in indexed])
+        except Exception as e:
+            logger.warning("Error embedding summary context: %s", e)
+    semaphore = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+
+    async def summarize(paper: dict) -> None:
+        query_vector = vectors.get(paper["content"])
+        retrieved = context_index.search(query_vector, k=3, exclude=paper["content"]) if query_vector is not None else []
+        retrieved_context = "\n\n".join(retrieved) if retrieved else "No additional context found."
         messages = [
             SystemMessage(content=SUMMARIZED_PROMPT),
             HumanMessage(content=USER_PROMPT.format(content=paper["content"], context=retrieved_context))
         ]
-        response: AIMessage = model.invoke(messages)
-        content = response.content
-
-        start = content.find("```json") + len("```json")
-        end = content.find("```", start)
-
-        if start != -1 and end != -1:
-            json_str = content[start:end].strip()
-            try:
-                extracted = json.loads(json_str)
-                paper["compared_authors"] = extracted.get("authors", [])
-                paper["summary"] = extracted.get("summary", "")
-                del paper["content"]
-            except json.JSONDecodeError:
-                paper["error"] = "Invalid JSON returned"
-        else:
-            paper["error"] = "No JSON found in response"
+        async with semaphore:
+            response = await ainvoke_with_backoff(messages)
+        apply_summary(paper, response.content)
+        if paper.get("content_hash") and "error" not in paper:
+            await run_in_pool("light", cache.put_summary, paper["content_hash"], PROMPT_VERSION, response.content)
 
+    await asyncio.gather(*(summarize(paper) for paper in pending))
     return {"summarized_data": papers}
 
 summarize_graph_agent = StateGraph(AgentState)
-summarize_graph_agent.add_node("scrape", scrape_papers_node)
-summarize_graph_agent.add_node("summarize", summarize_papers_node)
+# Nodes are async; run the compiled graph with ainvoke/astream.
+summarize_graph_agent.add_node("scrape", ascrape_papers_node)
+summarize_graph_agent.add_node("summarize", asummarize_papers_node)
 summarize_graph_agent.add_edge("scrape", "summarize")
 summarize_graph_agent.set_entry_point("scrape")
 
@@ -0,0 +1,184 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from opentelemetry import trace
+
+# Every LangGraph node and external call runs inside span(), which opens an OpenTelemetry span
+# and records its duration in an in-process histogram served by GET /metrics in Prometheus
+# text format. Spans are exported according to TELEMETRY_EXPORTER: "none" (metrics only),
+# "console", "json" (one JSON object per line in TELEMETRY_JSON_PATH, for offline runs) or
+# "otlp" (the standard OTEL_EXPORTER_OTLP_* variables apply).
+TELEMETRY_EXPORTER = os.environ.get("TELEMETRY_EXPORTER", "none")
+TELEMETRY_JSON_PATH = os.environ.get("TELEMETRY_JSON_PATH", "spans.jsonl")
+SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "scholarpilot")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+tracer = trace.get_tracer("scholarpilot")
+
+class Metrics:
+    """Latency histograms per span name, error counts and LLM token counters."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # name -> [bucket counts..., +Inf count], sum
+        self._histograms: dict[str, tuple[list[int], list[float]]] = {}
+        self._errors: dict[str, int] = {}
+        self._llm_calls: dict[str, int] = {}
+        self._llm_tokens: dict[tuple[str, str], int] = {}
+
+    def observe(self, name: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            counts, total = self._histograms.setdefault(name, ([0] * (len(self.buckets) + 1), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            total[0] += seconds
+            if error:
+                self._errors[name] = self._errors.get(name, 0) + 1
+
+    def record_llm(self, operation: str, input_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            self._llm_calls[operation] = self._llm_calls.get(operation, 0) + 1
+            for kind, count in (("input", input_tokens), ("output", output_tokens)):
+                self._llm_tokens[(operation, kind)] = self._llm_tokens.get((operation, kind), 0) + count
+
+    def snapshot(self) -> dict:
+        """Per-span count, mean and p50/p95 estimated from the buckets, plus LLM usage."""
+        with self._lock:
+            spans = {}
+            for name, (counts, total) in sorted(self._histograms.items()):
+                spans[name] = {
+                    "count": counts[-1],
+                    "errors": self._errors.get(name, 0),
+                    "mean_ms": round(total[0] / counts[-1] * 1000, 2) if counts[-1] else 0.0,
+                    "p50_le_ms": self._quantile_bound(counts, 0.5),
+                    "p95_le_ms": self._quantile_bound(counts, 0.95)
+                }
+            tokens = {f"{operation}.{kind}": count for (operation, kind), count in sorted(self._llm_tokens.items())}
+            return {"spans": spans, "llm_calls": dict(self._llm_calls), "llm_tokens": tokens}
+
+    def _quantile_bound(self, counts: list[int], quantile: float) -> float | None:
+        target = quantile * counts[-1]
+        for bound, count in zip(self.buckets, counts):
+            if count >= target:
+                return bound * 1000
+        return None
+
+    def render_prometheus(self, caches: dict[str, dict] | None = None) -> str:
+        """
+        Prometheus text exposition of the metrics. caches maps a cache name to a dict with
+        "hits" and "misses", read from the caches' own counters at scrape time.
+        """
+        lines = [
+            "# HELP scholarpilot_span_duration_seconds Duration of instrumented operations.",
+            "# TYPE scholarpilot_span_duration_seconds histogram"
+        ]
+        with self._lock:
+            for name, (counts, total) in sorted(self._histograms.items()):
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'scholarpilot_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+                lines.append(f'scholarpilot_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {counts[-1]}')
+                lines.append(f'scholarpilot_span_duration_seconds_sum{{span="{name}"}} {total[0]}')
+                lines.append(f'scholarpilot_span_duration_seconds_count{{span="{name}"}} {counts[-1]}')
+            lines += ["# HELP scholarpilot_span_errors_total Instrumented operations that raised.",
+                      "# TYPE scholarpilot_span_errors_total counter"]
+            lines += [f'scholarpilot_span_errors_total{{span="{name}"}} {count}' for name, count in sorted(self._errors.items())]
+            lines += ["# HELP scholarpilot_llm_calls_total Chat model calls.",
+                      "# TYPE scholarpilot_llm_calls_total counter"]
+            lines += [f'scholarpilot_llm_calls_total{{operation="{name}"}} {count}' for name, count in sorted(self._llm_calls.items())]
+            lines += ["# HELP scholarpilot_llm_tokens_total Chat model tokens, as reported by the provider.",
+                      "# TYPE scholarpilot_llm_tokens_total counter"]
+            lines += [
+                f'scholarpilot_llm_tokens_total{{operation="{operation}",type="{kind}"}} {count}'
+                for (operation, kind), count in sorted(self._llm_tokens.items())
+            ]
+        caches = caches or {}
+        for metric, kind, help_text in (
+            ("hits", "counter", "Cache lookups that were served from the cache."),
+            ("misses", "counter", "Cache lookups that missed."),
+            ("hit_ratio", "gauge", "Share of cache lookups that hit since the process started.")
+        ):
+            name = f"scholarpilot_cache_{metric}" + ("_total" if kind == "counter" else "")
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for cache, stats in sorted(caches.items()):
+                lookups = stats["hits"] + stats["misses"]
+                value = stats[metric] if metric != "hit_ratio" else (stats["hits"] / lookups if lookups else 0.0)
+                lines.append(f'{name}{{cache="{cache}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+@contextmanager
+def span(name: str, **attributes):
+    """Trace a block as an OpenTelemetry span and record its duration under `name`."""
+    start = time.perf_counter()
+    error = False
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        try:
+            yield current
+        except BaseException:
+            error = True
+            raise
+        finally:
+            metrics.observe(name, time.perf_counter() - start, error)
+
+def traced(name: str):
+    """Decorator form of span() for LangGraph nodes and other sync or async functions."""
+    def decorator(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record_llm_usage(operation: str, message) -> None:
+    """Count a model call and the tokens in the response's usage_metadata, when the provider reports them."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    metrics.record_llm(operation, usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+
+def setup_telemetry(app=None, exporter: str = TELEMETRY_EXPORTER):
+    """
+    Install the tracer provider for the configured exporter and instrument the FastAPI app.
+    With exporter "none" spans are not recorded (metrics still are).
+    """
+    if exporter == "none":
+        return None
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if exporter == "console":
+        span_exporter = ConsoleSpanExporter()
+    elif exporter == "json":
+        from services.span_exporters import JsonLinesSpanExporter
+        span_exporter = JsonLinesSpanExporter(TELEMETRY_JSON_PATH)
+    elif exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        span_exporter = OTLPSpanExporter()
+    else:
+        raise ValueError(f"Unknown TELEMETRY_EXPORTER {exporter!r}")
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    if app is not None:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics")
+    return provider
+
+def shutdown_telemetry(provider) -> None:
+    if provider is not None:
+        provider.shutdown()
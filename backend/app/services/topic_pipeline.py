@@ -0,0 +1,156 @@
+import hashlib
+from typing import Awaitable, Callable
+from urllib.parse import urlsplit
+from models.schema import Paper, Topic
+from db.repository import get_topic_repository
+from services.agent_registry import agent_registry
+from services.executors import run_in_pool
+from services.qna_chatbot_agent import index_topic_papers, topic_index_is_empty
+from services.search_providers import title_match_key
+from services.telemetry import span
+
+async def run_graph(graph, state: dict, name: str, report_progress: Callable[[str], Awaitable[None]]) -> dict:
+    """Run a compiled graph with astream(), reporting each finished node as '<name>:<node>'."""
+    state = dict(state)
+    async for update in graph.astream(state, stream_mode="updates"):
+        for node, values in update.items():
+            if values:
+                state.update(values)
+            await report_progress(f"{name}:{node}")
+    return state
+
+def paper_id(topic_id: str, paper: dict) -> str:
+    """
+    Stable id of a paper within a topic, from its normalized link (or title if it has none). A job
+    re-run after a restart produces the same ids, so it overwrites the stored papers and upserts
+    their index chunks instead of duplicating them.
+    """
+    key = normalize_link(paper["link"]) if paper.get("link") else f"title:{title_match_key(paper.get('title', ''))}"
+    return hashlib.sha1(f"{topic_id}\n{key}".encode("utf-8")).hexdigest()
+
+def paper_records(topic_id: str, summarized: list[dict]) -> tuple[list[dict], list[str]]:
+    """Stored paper records for summarized papers, and their full texts for the vector index."""
+    papers, full_texts, seen = [], [], set()
+    for paper in summarized:
+        id = paper_id(topic_id, paper)
+        if id in seen:
+            continue
+        seen.add(id)
+        authors = list(set(paper.get("compared_authors", []) + paper.get("authors", [])))
+        papers.append(Paper(
+            id=id,
+            title=paper.get("title") or paper["link"],
+            authors=authors,
+            summary=paper.get("summary", ""),
+            topic_id=topic_id,
+            link=paper["link"],
+            year=paper.get("year")
+        ).dict())
+        full_texts.append(paper.get("full_text", ""))
+    return papers, full_texts
+
+async def summarize_papers(topic: str, papers: list[dict], report_progress: Callable[[str], Awaitable[None]]) -> list[dict]:
+    final_state = await run_graph(agent_registry.summarize, {"topic": topic, "summarized_data": papers}, "summarize", report_progress)
+    return final_state["summarized_data"]
+
+async def search_papers(query: str, report_progress: Callable[[str], Awaitable[None]]) -> list[dict]:
+    scraped_state = await run_graph(agent_registry.search, {
+        "topic": query,
+        "scraped_data": "",
+        "search_results": [],
+        "cleaned_data": ""
+    }, "search", report_progress)
+    return scraped_state["cleaned_data"] or []
+
+async def create_topic(payload: dict, report_progress: Callable[[str], Awaitable[None]]) -> dict:
+    """
+    Job handler for topic creation: search, scrape and summarize papers, then store the topic
+    and build its vector index. The topic id is chosen when the job is submitted and paper ids
+    derive from it (paper_id), so a job re-run after a restart overwrites the same documents
+    and index chunks instead of creating duplicates.
+    """
+    id = payload["topic_id"]
+    repository = get_topic_repository()
+    try:
+        found = await search_papers(payload["topic"], report_progress)
+        summarized = await summarize_papers(payload["topic"], found, report_progress)
+        papers, full_texts = paper_records(id, summarized)
+        topic = Topic(id=id, title=payload["topic"], papers=papers, qna_history=[]).dict()
+        with span("db.create_topic", papers=len(papers)):
+            await repository.create_topic(topic)
+    except Exception:
+        # The title was reserved when the job was submitted; free it so the topic can be requested again.
+        await repository.release_title(payload["topic"], id)
+        raise
+    await report_progress("store")
+    # The full text only goes to the vector index; the stored papers keep just their summaries.
+    indexed = [{**paper, "full_text": full_text} for paper, full_text in zip(topic["papers"], full_texts)]
+    await run_in_pool("heavy", index_topic_papers, id, indexed)
+    await report_progress("index")
+    return {"topic": topic}
+
+def normalize_link(link: str) -> str:
+    """Scheme-, "www."- and trailing-slash-insensitive form of a URL, for duplicate checks."""
+    parts = urlsplit(link.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{host}{parts.path.rstrip('/')}{query}"
+
+def paper_keys(paper: dict) -> set[str]:
+    keys = set()
+    if paper.get("link"):
+        keys.add(f"link:{normalize_link(paper['link'])}")
+    title = title_match_key(paper.get("title") or "")
+    if title:
+        keys.add(f"title:{title}")
+    return keys
+
+def new_candidates(candidates: list[dict], existing: list[dict]) -> list[dict]:
+    """Candidates whose link and title match neither an existing paper nor an earlier candidate."""
+    seen = set().union(*(paper_keys(paper) for paper in existing))
+    new = []
+    for candidate in candidates:
+        keys = paper_keys(candidate)
+        if keys and not keys & seen:
+            new.append(candidate)
+        seen |= keys
+    return new
+
+async def add_papers(payload: dict, report_progress: Callable[[str], Awaitable[None]]) -> dict:
+    """
+    Job handler for growing an existing topic from links and/or a follow-up search query.
+    Candidates already in the topic (same normalized link or title) are dropped before
+    scraping, so only new papers are summarized, stored and indexed.
+    """
+    id = payload["topic_id"]
+    repository = get_topic_repository()
+    topic = await repository.get_topic(id)
+    if not topic:
+        raise ValueError(f"Topic {id} not found")
+    candidates = [{"title": "", "link": link, "authors": [], "year": None} for link in payload.get("links", [])]
+    if payload.get("query"):
+        candidates += await search_papers(payload["query"], report_progress)
+    existing = await repository.list_all_papers(id)
+    candidates = new_candidates(candidates, existing)
+    await report_progress("dedupe")
+    if not candidates:
+        return {"topic": topic, "added": []}
+    summarized = await summarize_papers(topic["title"], candidates, report_progress)
+    # A link's page title is only known after scraping, so check titles again.
+    summarized = new_candidates(summarized, existing)
+    papers, full_texts = paper_records(id, summarized)
+    with span("db.add_papers", papers=len(papers)):
+        topic = await repository.add_papers(id, papers)
+    if topic is None:
+        raise ValueError(f"Topic {id} was deleted")
+    await report_progress("store")
+    indexed = [{**paper, "full_text": full_text} for paper, full_text in zip(papers, full_texts)]
+    # Topics that predate per-topic indexes are indexed on their first question; index the
+    # existing papers now, or that backfill would never run once the new papers are in.
+    if await run_in_pool("heavy", topic_index_is_empty, id):
+        indexed = existing + indexed
+    await run_in_pool("heavy", index_topic_papers, id, indexed)
+    await report_progress("index")
+    return {"topic": topic, "added": papers}
+
+JOB_HANDLERS = {"create_topic": create_topic, "add_papers": add_papers}
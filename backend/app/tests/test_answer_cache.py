@@ -0,0 +1,74 @@
+"""Run from backend/app:  python -m pytest tests"""
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from services.answer_cache import AnswerCache
+
+QUESTION = [1.0, 0.0, 0.0]
+SIMILAR = [0.99, 0.05, 0.0]
+OTHER = [0.0, 1.0, 0.0]
+
+def make_cache(tmp_path, **kwargs) -> AnswerCache:
+    return AnswerCache(str(tmp_path / "answers.sqlite3"), **kwargs)
+
+def store(cache: AnswerCache, topic_id: str, answer: str, embedding=QUESTION, context: str = "") -> bool:
+    return cache.put(topic_id, "question", embedding, answer, ["p1"], 1.5, cache.generation(topic_id), context)
+
+def test_similar_question_hits_and_other_question_misses(tmp_path):
+    cache = make_cache(tmp_path)
+    store(cache, "t", "answer")
+    assert cache.lookup("t", SIMILAR) == {"query": "question", "answer": "answer", "sources": ["p1"]}
+    assert cache.lookup("t", OTHER) is None
+    assert cache.lookup("other topic", QUESTION) is None
+    assert (cache.hits, cache.misses, cache.saved_seconds) == (1, 2, 1.5)
+
+def test_expired_answers_are_not_served_and_leave_the_matrix(tmp_path):
+    cache = make_cache(tmp_path, ttl=60)
+    store(cache, "t", "answer")
+    assert cache.lookup("t", QUESTION)["answer"] == "answer"
+    cache.ttl = 0.001
+    time.sleep(0.01)
+    assert cache.lookup("t", QUESTION) is None
+    assert cache._topics["t"][0] == []
+
+def test_expired_answers_are_not_loaded(tmp_path):
+    store(make_cache(tmp_path), "t", "answer")
+    time.sleep(0.01)
+    assert make_cache(tmp_path, ttl=0.001).lookup("t", QUESTION) is None
+
+def test_invalidate_drops_answers_and_rejects_puts_from_before(tmp_path):
+    cache = make_cache(tmp_path)
+    store(cache, "t", "answer")
+    generation = cache.generation("t")
+    cache.invalidate_topic("t")
+    assert cache.lookup("t", QUESTION) is None
+    assert not cache.put("t", "question", QUESTION, "stale", [], 1.0, generation)
+    assert cache.lookup("t", QUESTION) is None
+    assert store(cache, "t", "fresh")
+    assert cache.lookup("t", QUESTION)["answer"] == "fresh"
+
+def test_puts_are_rejected_after_the_generation_is_evicted(tmp_path):
+    cache = make_cache(tmp_path, max_topics=1)
+    generation = cache.generation("a")
+    cache.invalidate_topic("a")
+    cache.invalidate_topic("b")
+    assert not cache.put("a", "question", QUESTION, "stale", [], 1.0, generation)
+
+def test_topic_matrices_are_evicted_least_recently_used_first(tmp_path):
+    cache = make_cache(tmp_path, max_topics=2)
+    for topic_id in ("a", "b", "a", "c"):
+        store(cache, topic_id, f"answer {topic_id}")
+        cache.lookup(topic_id, QUESTION)
+    assert list(cache._topics) == ["a", "c"]
+    assert cache.lookup("b", QUESTION)["answer"] == "answer b"
+
+def test_answers_are_only_served_in_their_context(tmp_path):
+    cache = make_cache(tmp_path)
+    store(cache, "t", "standalone")
+    store(cache, "t", "follow-up", context="conversation-1")
+    assert cache.lookup("t", QUESTION)["answer"] == "standalone"
+    assert cache.lookup("t", QUESTION, "conversation-1")["answer"] == "follow-up"
+    assert cache.lookup("t", QUESTION, "conversation-2") is None
@@ -0,0 +1,52 @@
+"""Run from backend/app:  python -m pytest tests"""
+import pytest
+
+pytest.importorskip("lxml")
+
+from services.html_extractor import extract_html_sections
+
+def test_div_only_page_keeps_its_text():
+    html = """
+    <html><head><title>Div page</title></head><body>
+      <div class="abstract"><div>Abstract</div><div>We study div-only publisher pages.</div></div>
+      <div>The method works on every layout we tried.</div>
+    </body></html>
+    """
+    result = extract_html_sections(html)
+    assert result.full_text.split("\n") == [
+        "Abstract",
+        "We study div-only publisher pages.",
+        "The method works on every layout we tried."
+    ]
+
+def test_nested_lists_and_quotes_are_not_repeated():
+    html = """
+    <html><body>
+      <h2>Conclusion</h2>
+      <ul><li>Outer point<ul><li>Inner one</li><li>Inner two</li></ul></li></ul>
+      <blockquote>Quoted<blockquote>Nested quote</blockquote></blockquote>
+    </body></html>
+    """
+    result = extract_html_sections(html)
+    assert result.full_text.split("\n") == ["Conclusion", "Outer point", "Inner one", "Inner two", "Quoted", "Nested quote"]
+    assert result.conclusion == "Outer point Inner one Inner two Quoted Nested quote"
+    assert result.sections == [{"heading": "Conclusion", "text": result.conclusion}]
+
+def test_bare_body_text_falls_back_to_the_whole_body():
+    html = "<html><body>Text straight in the body<br>with no blocks around it<p>short</p></body></html>"
+    result = extract_html_sections(html)
+    assert result.full_text == "Text straight in the body with no blocks around it short"
+
+def test_abstract_and_conclusion_from_headings():
+    html = """
+    <html><body>
+      <nav><a href="#abstract">Abstract</a></nav>
+      <h2>Abstract</h2><p>First part.</p><p>Second part.</p>
+      <h2>1. Introduction</h2><p>Intro.</p>
+      <h2>5. Conclusions</h2><p>It works.</p>
+    </body></html>
+    """
+    result = extract_html_sections(html)
+    assert result.abstract == "First part. Second part."
+    assert result.conclusion == "It works."
+    assert [section["heading"] for section in result.sections] == ["Abstract", "1. Introduction", "5. Conclusions"]
@@ -0,0 +1,77 @@
+"""Run from backend/app:  python -m pytest tests"""
+import time
+
+from services.job_queue import JobQueue
+
+def make_queue(tmp_path, **kwargs) -> JobQueue:
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), **kwargs)
+
+def status(queue: JobQueue, job_id: str) -> str:
+    return queue.get(job_id)["status"]
+
+def test_claim_takes_jobs_oldest_first_and_only_once(tmp_path):
+    queue = make_queue(tmp_path)
+    first = queue.submit("create_topic", {"topic": "a"})
+    second = queue.submit("create_topic", {"topic": "b"})
+    assert queue._claim_next() == (first, "create_topic", {"topic": "a"})
+    assert queue._claim_next() == (second, "create_topic", {"topic": "b"})
+    assert queue._claim_next() is None
+    assert status(queue, first) == status(queue, second) == "running"
+
+def test_claim_skips_a_job_another_process_claimed(tmp_path):
+    queue = make_queue(tmp_path)
+    other = make_queue(tmp_path)
+    first = queue.submit("create_topic", {"topic": "a"})
+    second = queue.submit("create_topic", {"topic": "b"})
+    conn = queue._conn
+
+    class RacingConnection:
+        """Lets the other process claim the oldest job between this process's SELECT and UPDATE."""
+        def __getattr__(self, name):
+            return getattr(conn, name)
+
+        def execute(self, sql, params=()):
+            if sql.startswith("UPDATE") and params[-1] == first:
+                assert other._claim_next()[0] == first
+            return conn.execute(sql, params)
+
+    queue._conn = RacingConnection()
+    assert queue._claim_next()[0] == second
+    assert other.get(first)["status"] == "running"
+
+def test_start_requeues_only_stale_running_jobs(tmp_path):
+    crashed = make_queue(tmp_path, stale_after=60)
+    stale = crashed.submit("create_topic", {"topic": "a"})
+    crashed._claim_next()
+    crashed._execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time() - 120, stale))
+    live = make_queue(tmp_path, stale_after=60)
+    running = live.submit("create_topic", {"topic": "b"})
+    live._claim_next()
+
+    restarted = make_queue(tmp_path, stale_after=60)
+    assert restarted._requeue_stale() == 1
+    assert status(restarted, stale) == "queued"
+    assert status(restarted, running) == "running"
+    assert restarted._claim_next()[0] == stale
+
+def test_heartbeat_keeps_jobs_running(tmp_path):
+    queue = make_queue(tmp_path, stale_after=60)
+    job_id = queue.submit("create_topic", {"topic": "a"})
+    queue._claim_next()
+    queue._execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time() - 120, job_id))
+    queue._heartbeat()
+    assert queue._requeue_stale() == 0
+    assert status(queue, job_id) == "running"
+
+def test_finish_ignores_jobs_taken_over_by_another_process(tmp_path):
+    queue = make_queue(tmp_path, stale_after=0)
+    job_id = queue.submit("create_topic", {"topic": "a"})
+    queue._claim_next()
+    other = make_queue(tmp_path, stale_after=0)
+    time.sleep(0.01)
+    assert other._requeue_stale() == 1
+    assert other._claim_next()[0] == job_id
+    queue._finish(job_id, "failed", error="late")
+    assert status(queue, job_id) == "running"
+    other._finish(job_id, "succeeded", result={"ok": True})
+    assert queue.get(job_id)["result"] == {"ok": True}
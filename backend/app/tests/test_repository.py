@@ -0,0 +1,25 @@
+"""Run from backend/app:  python -m pytest tests"""
+import asyncio
+
+from db.repository import InMemoryTopicRepository
+
+def paper(id: str) -> dict:
+    return {"id": id, "title": f"Paper {id}", "link": f"https://example.org/{id}"}
+
+def test_add_papers_skips_stored_and_repeated_ids():
+    async def run():
+        repository = InMemoryTopicRepository()
+        await repository.create_topic({"id": "t", "title": "Topic", "papers": [paper("a")]})
+        first, second = await asyncio.gather(
+            repository.add_papers("t", [paper("b"), paper("a"), paper("b")]),
+            repository.add_papers("t", [{**paper("b"), "title": "Rewritten"}, paper("c")])
+        )
+        return repository, first, second
+
+    repository, first, second = asyncio.run(run())
+    assert (first["paper_count"], second["paper_count"]) == (2, 3)
+    papers = asyncio.run(repository.list_all_papers("t"))
+    assert [(p["id"], p["title"], p["position"]) for p in papers] == [("a", "Paper a", 0), ("b", "Paper b", 1), ("c", "Paper c", 2)]
+
+def test_add_papers_to_a_missing_topic():
+    assert asyncio.run(InMemoryTopicRepository().add_papers("missing", [paper("a")])) is None
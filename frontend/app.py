@@ -1,8 +1,19 @@
 import streamlit as st
 import requests
+import json
+import time
 
 base_url = 'http://localhost:8000/api'
 
+def stream_answer_tokens(response):
+    """Yield answer tokens from the Q&A server-sent event stream."""
+    event = None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: ") and event == "token":
+            yield json.loads(line[len("data: "):])
+
 if "topic_data" not in st.session_state:
     st.session_state.topic_data = None
 if "chat_history" not in st.session_state:
@@ -22,25 +33,49 @@ selected_topic_id = None
 if mode == "Create New Topic":
     new_topic = st.text_input('Enter a topic query', key="new_topic_input")
     if st.button('Submit New Topic', key='new_topic_submit') and new_topic:
-        if new_topic.lower() in [topic.split(' - ')[0].lower() for topic in requests.get(url=f"{base_url}/topics").json().get('topics', [])]:
+        res_lookup = requests.get(url=f"{base_url}/topics/lookup", params={'title': new_topic})
+        res_new = None if res_lookup.status_code == 200 else requests.post(url=f"{base_url}/topics", json={'topic': new_topic})
+        if res_new is None or res_new.status_code == 409:
             st.error("Topic already exists.")
-        res_new = requests.post(url=f"{base_url}/topics", json={'topic': new_topic})
-        if res_new.status_code == 200:
-            data_new = res_new.json()
-            st.success("Topic created!")
-            selected_topic_id = data_new.get('topic', {}).get('id')
-            res_topic = requests.get(url=f"{base_url}/topics/{selected_topic_id}")
-            if res_topic.status_code == 200:
-                st.session_state.topic_data = res_topic.json().get("topic", {})
-                st.session_state.chat_history = st.session_state.topic_data.get("qna_history", [])
+        elif res_new.status_code == 202:
+            job_id = res_new.json().get('job_id')
+            job = {}
+            with st.status("Creating topic...", expanded=True) as status:
+                reported = 0
+                while job.get('status') not in ('succeeded', 'failed'):
+                    time.sleep(1)
+                    res_job = requests.get(url=f"{base_url}/jobs/{job_id}")
+                    if res_job.status_code != 200:
+                        break
+                    job = res_job.json().get('job', {})
+                    for step in job.get('progress', [])[reported:]:
+                        st.write(f"Finished {step}")
+                    reported = len(job.get('progress', []))
+                status.update(label="Topic creation finished", state="complete" if job.get('status') == 'succeeded' else "error")
+            if job.get('status') == 'succeeded':
+                st.success("Topic created!")
+                selected_topic_id = job.get('result', {}).get('topic', {}).get('id')
+                res_topic = requests.get(url=f"{base_url}/topics/{selected_topic_id}")
+                if res_topic.status_code == 200:
+                    st.session_state.topic_data = res_topic.json().get("topic", {})
+                    st.session_state.chat_history = st.session_state.topic_data.get("qna_history", [])
+                else:
+                    st.error("Failed to fetch topic details after creation.")
             else:
-                st.error("Failed to fetch topic details after creation.")
+                st.error(f"Failed to create topic. {job.get('error') or ''}".strip())
         else:
             st.error("Failed to create topic.")
 elif mode == "Select Existing Topic":
-    res_list = requests.get(url=f"{base_url}/topics")
+    topics_list, cursor = [], None
+    while True:
+        res_list = requests.get(url=f"{base_url}/topics", params={'limit': 200, 'cursor': cursor})
+        if res_list.status_code != 200:
+            break
+        topics_list += res_list.json().get('topics', [])
+        cursor = res_list.json().get('next_cursor')
+        if not cursor:
+            break
     if res_list.status_code == 200:
-        topics_list = res_list.json().get('topics', [])
         if topics_list:
             topic_chosen = st.selectbox('Select a topic', topics_list)
             try:
@@ -53,8 +88,10 @@ elif mode == "Select Existing Topic":
                     res_topic = requests.get(url=f"{base_url}/topics/{selected_topic_id}")
                     if res_topic.status_code == 200:
                         st.session_state.topic_data = res_topic.json().get("topic", {})
-                        st.session_state.chat_history = st.session_state.topic_data.get("qna_history", [])
-                        st.session_state.chat_history = st.session_state.chat_history[1:]
+                        st.session_state.chat_history = [
+                            message for message in st.session_state.topic_data.get("qna_history", [])
+                            if message.get("role") != "system"
+                        ]
                     else:
                         st.error("Failed to retrieve topic details.")
         else:
@@ -78,7 +115,7 @@ if st.session_state.topic_data:
                     unsafe_allow_html=True
                 )
                 st.markdown(
-                    f"<p style='margin: 0;'><strong>Authors:</strong> {', '.join(paper.get('authors', []))} ({paper.get('year', 'N/A')})</p>",
+                    f"<p style='margin: 0;'><strong>Authors:</strong> {', '.join(paper.get('authors', []))} ({paper.get('year') or 'N/A'})</p>",
                     unsafe_allow_html=True
                 )
                 if st.button("Delete", key=f"delete_{paper.get('id')}"):
@@ -95,6 +132,22 @@ if st.session_state.topic_data:
                     unsafe_allow_html=True
                 )
             st.write("---")
+        # GET /topics/{id} returns one page of papers; follow papers_cursor for the rest.
+        if topic_data.get("papers_cursor"):
+            total = topic_data.get("paper_count")
+            st.caption(f"Showing {len(papers)} of {total} papers." if total else f"Showing the first {len(papers)} papers.")
+            if st.button("Load more papers"):
+                res_more = requests.get(
+                    url=f"{base_url}/topics/{topic_data.get('id')}",
+                    params={'papers_cursor': topic_data.get("papers_cursor"), 'papers_limit': 50}
+                )
+                if res_more.status_code == 200:
+                    more = res_more.json().get("topic", {})
+                    topic_data["papers"] = papers + more.get("papers", [])
+                    topic_data["papers_cursor"] = more.get("papers_cursor")
+                    st.rerun()
+                else:
+                    st.error("Failed to load more papers.")
     else:
         st.write("No papers found for this topic.")
 
@@ -110,11 +163,10 @@ if st.session_state.topic_data:
     user_input = st.chat_input("Type your question here...")
     if user_input:
         st.chat_message("user").write(user_input)
-        res_qna = requests.post(url=f"{base_url}/topics/{topic_data.get('id')}/qna", json={"query": user_input})
+        res_qna = requests.post(url=f"{base_url}/topics/{topic_data.get('id')}/qna/stream", json={"query": user_input}, stream=True)
         if res_qna.status_code == 200:
-            answer = res_qna.json().get("response", "No answer returned")
-            st.chat_message("assistant").write(answer)
+            answer = st.chat_message("assistant").write_stream(stream_answer_tokens(res_qna))
             st.session_state.chat_history.append({"role": "user", "content": user_input})
-            st.session_state.chat_history.append({"role": "assistant", "content": answer})
+            st.session_state.chat_history.append({"role": "assistant", "content": answer or "No answer returned"})
         else:
             st.error("Error processing your question.")